@@ -0,0 +1,196 @@
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff")
+
+_decoder = None
+_load_error = None
+
+
+class EngineLoadError(RuntimeError):
+    pass
+
+
+def expand_inputs(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+        elif any(ch in item for ch in "*?["):
+            paths.extend(p for p in glob.glob(item, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS))
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            print(f"[BATCH] Skipping missing input: {item}", file=sys.stderr)
+
+    seen = set()
+    unique = []
+    for path in sorted(os.path.abspath(p) for p in paths):
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
+
+
+def load_done_paths(output_path):
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a partially written last line from an interrupted run
+            if "path" in record and not record.get("error"):
+                done.add(record["path"])
+    return done
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _init_worker():
+    global _decoder, _load_error
+    # Keep worker logging (including native library output) off stdout, which may carry the JSONL stream
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    from ocr import load_engines, load_classifier
+    try:
+        load_engines()
+        load_classifier()
+    except Exception as e:
+        # Raising from the initializer makes the Pool respawn the worker forever; the first chunk
+        # reports it instead
+        _load_error = f"{type(e).__name__}: {e}"
+        return
+    _decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode")
+
+
+def _decode(path):
+    start = time.perf_counter()
+    try:
+        # np.fromfile + imdecode handles non-ASCII paths, unlike cv2.imread on Windows
+        img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        error = None if img is not None else "could not decode image"
+    except Exception as e:
+        img, error = None, str(e)
+    return img, round((time.perf_counter() - start) * 1000, 2), error
+
+
+def _process_chunk(paths):
+    from ocr import extract_text_details
+
+    if _load_error is not None:
+        raise EngineLoadError(_load_error)
+    records = []
+    # Decode the next image on a helper thread while the current one is in inference
+    pending = _decoder.submit(_decode, paths[0])
+    for i, path in enumerate(paths):
+        img, decode_ms, error = pending.result()
+        if i + 1 < len(paths):
+            pending = _decoder.submit(_decode, paths[i + 1])
+
+        if error:
+            records.append({"path": path, "error": error, "timings": {"decode_ms": decode_ms}})
+            continue
+
+        start = time.perf_counter()
+        try:
+            result = extract_text_details(img)
+        except Exception as e:
+            # Recorded like a decode failure, so a resumed run tries the image again
+            records.append({"path": path, "error": str(e), "timings": {"decode_ms": decode_ms}})
+            continue
+        timings = {"decode_ms": decode_ms, **result["timings"]}
+        timings["total_ms"] = round(decode_ms + (time.perf_counter() - start) * 1000, 2)
+        records.append({
+            "path": path,
+            "text": result["text"],
+            "lang": result["lang"],
+            "confidence": result["confidence"],
+            "lines": len(result["lines"]),
+            "timings": timings
+        })
+    return records
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_batch(paths, out, workers, chunk_size):
+    ctx = mp.get_context("spawn")
+    written = 0
+    with ctx.Pool(processes=workers, initializer=_init_worker) as pool:
+        for records in pool.imap_unordered(_process_chunk, _chunks(paths, chunk_size)):
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            written += len(records)
+            print(f"[BATCH] {written}/{len(paths)} images", file=sys.stderr)
+        # Let workers exit normally so their exit hooks (e.g. cache persistence) run
+        pool.close()
+        pool.join()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run OCR over image files and stream JSONL results.")
+    parser.add_argument("inputs", nargs="+", help="image files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout (default)")
+    parser.add_argument("-w", "--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="number of OCR processes, each holding its own model")
+    parser.add_argument("--chunk-size", type=int, default=4, help="images handed to a worker at a time")
+    parser.add_argument("--no-resume", action="store_true", help="re-process images already in the output file")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    to_stdout = args.output == "-"
+    if not to_stdout and not args.no_resume:
+        done = load_done_paths(args.output)
+        if done:
+            print(f"[BATCH] Resuming: {len(done)} image(s) already in {args.output}", file=sys.stderr)
+        paths = [p for p in paths if p not in done]
+
+    if not paths:
+        print("[BATCH] Nothing to do.", file=sys.stderr)
+        return 0
+
+    workers = max(1, min(args.workers, len(paths)))
+    start = time.perf_counter()
+    try:
+        if to_stdout:
+            written = run_batch(paths, sys.stdout, workers, max(1, args.chunk_size))
+        else:
+            mode = "w" if args.no_resume else "a"
+            with open(args.output, mode, encoding="utf-8") as out:
+                if mode == "a" and out.tell() > 0 and not _ends_with_newline(args.output):
+                    out.write("\n")
+                written = run_batch(paths, out, workers, max(1, args.chunk_size))
+    except EngineLoadError as e:
+        print(f"[BATCH] Could not load the OCR engine: {e}", file=sys.stderr)
+        return 1
+
+    elapsed = time.perf_counter() - start
+    print(f"[BATCH] Processed {written} image(s) in {elapsed:.1f}s ({written / elapsed:.2f} img/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
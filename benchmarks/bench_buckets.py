@@ -0,0 +1,88 @@
+"""Padded size (and optionally predict latency) of typical crops under the old and current shape buckets.
+
+The old buckets rounded each side up to the next `shape_buckets` size, so a single 40x300 line
+became 320x320. Pixels are what detection pays for; with --predict every padded crop is also run
+through the configured backend (needs PaddleOCR or the onnx_* models). Run from the repository root:
+    python -m benchmarks.bench_buckets [--predict] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synth import render_text_image
+from logs import setup_logging
+from utils import settings
+
+# (height, width): single lines, short dialogue boxes, panels, a full screen
+CROP_SHAPES = [(28, 180), (40, 300), (64, 640), (120, 500), (330, 330), (700, 1000), (1080, 1920)]
+
+
+def old_bucket_shape(height, width, sides):
+    def fit(n):
+        for side in sides:
+            if n <= side:
+                return side
+        return -(-n // 32) * 32
+    return fit(height), fit(width)
+
+
+def synthetic_crop(height, width):
+    text = render_text_image(["The quick brown fox jumps over the lazy dog"], max(12, min(32, height // 2)))
+    crop = np.full((height, width, 3), 255, dtype=np.uint8)
+    h, w = min(height, text.shape[0]), min(width, text.shape[1])
+    crop[:h, :w] = text[:h, :w]
+    return crop
+
+
+def padded(crop, shape):
+    import cv2
+    height, width = crop.shape[:2]
+    return cv2.copyMakeBorder(crop, 0, shape[0] - height, 0, shape[1] - width, cv2.BORDER_CONSTANT,
+                              value=[255, 255, 255])
+
+
+def predict_ms(engine, image, repeat):
+    engine.predict(image)  # warm-up for this shape
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.predict(image)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--predict", action="store_true", help="also time predict() on the padded crops")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    setup_logging("WARNING")
+
+    from ocr import bucket_shape
+    sides = sorted(settings.get("shape_buckets") or [])
+    engine = None
+    if args.predict:
+        from ocr import load_engine
+        engine = load_engine()
+
+    header = f"{'crop':>10} {'old pad':>10} {'x area':>7} {'new pad':>10} {'x area':>7}"
+    print(f"shape_buckets {sides}")
+    print(header + (f" {'old ms':>8} {'new ms':>8}" if engine else ""))
+    for height, width in CROP_SHAPES:
+        old = old_bucket_shape(height, width, sides)
+        new = bucket_shape(height, width, sides)
+        area = height * width
+        row = (f"{f'{height}x{width}':>10} {f'{old[0]}x{old[1]}':>10} {old[0] * old[1] / area:>7.1f} "
+               f"{f'{new[0]}x{new[1]}':>10} {new[0] * new[1] / area:>7.1f}")
+        if engine:
+            crop = synthetic_crop(height, width)
+            row += (f" {predict_ms(engine, padded(crop, old), args.repeat):>8.1f}"
+                    f" {predict_ms(engine, padded(crop, new), args.repeat):>8.1f}")
+        print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
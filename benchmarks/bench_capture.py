@@ -0,0 +1,134 @@
+"""Per-stage timing and allocation comparison of the old and current selector capture paths.
+
+The current path is what RegionSelector does: the screen QPixmap (from QScreen.grabWindow),
+a downscaled preview to paint from and pixmap_to_bgr() of the selection. Uses a synthetic
+screenshot instead of a live grab so runs are comparable.
+Run from the repository root:  python -m benchmarks.bench_capture [--width 3840 --height 2160]
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from PIL import Image
+from PIL.ImageQt import ImageQt
+from PyQt6.QtCore import QRect, QRectF
+from PyQt6.QtGui import QImage, QPainter, QPixmap
+from PyQt6.QtWidgets import QApplication
+
+from capture import pixmap_to_bgr, preview_pixmap
+
+
+def synthetic_screenshot(width, height, seed=7):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return Image.fromarray(pixels, "RGB")
+
+
+class StageTimer:
+    def __init__(self):
+        self.rows = []
+
+    def run(self, name, fn, qt_bytes=None):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        native = qt_bytes(result) if qt_bytes else 0
+        self.rows.append((name, elapsed * 1000, peak, native))
+        return result
+
+    def print(self, title):
+        print(f"\n{title}")
+        print(f"  {'stage':<36} {'ms':>9} {'py/numpy alloc':>16} {'Qt buffers':>12}")
+        for name, ms, peak, native in self.rows:
+            print(f"  {name:<36} {ms:9.2f} {peak / 1e6:13.2f} MB {native / 1e6:9.2f} MB")
+        total_ms = sum(r[1] for r in self.rows)
+        total_bytes = sum(r[2] + r[3] for r in self.rows)
+        print(f"  {'total':<36} {total_ms:9.2f} {total_bytes / 1e6:13.2f} MB (all buffers)")
+        return total_ms, total_bytes
+
+
+def legacy_path(img, rect, widget_size):
+    t = StageTimer()
+    qimage = t.run("ImageQt(img).copy()", lambda: ImageQt(img).copy(), lambda q: q.sizeInBytes())
+    pixmap = t.run("QPixmap.fromImage", lambda: QPixmap.fromImage(qimage), lambda p: p.width() * p.height() * 4)
+
+    def paint():
+        target = QImage(widget_size[0], widget_size[1], QImage.Format.Format_ARGB32_Premultiplied)
+        painter = QPainter(target)
+        painter.drawPixmap(target.rect(), pixmap)
+        painter.end()
+    t.run("paint (full drawPixmap)", paint)
+
+    cropped = t.run("pixmap.copy(rect).toImage()", lambda: pixmap.copy(rect).toImage(), lambda q: q.sizeInBytes() * 2)
+    argb = t.run("convertToFormat(ARGB32)", lambda: cropped.convertToFormat(QImage.Format.Format_ARGB32),
+                 lambda q: q.sizeInBytes())
+
+    def to_array():
+        ptr = argb.constBits()
+        ptr.setsize(argb.bytesPerLine() * argb.height())
+        return np.array(ptr).reshape(argb.height(), argb.width(), 4)
+    arr = t.run("np.array(constBits)", to_array)
+    bgr = t.run("cv2.cvtColor(BGRA2BGR)", lambda: cv2.cvtColor(arr, cv2.COLOR_BGRA2BGR))
+    return t, bgr
+
+
+def new_path(img, rect, widget_size, preview_scale):
+    t = StageTimer()
+    # Stands in for QScreen.grabWindow(), which hands back a 32-bit pixmap of the monitor
+    screen = ImageQt(img).convertToFormat(QImage.Format.Format_RGB32)
+    pixmap = t.run("screen QPixmap (grabWindow stand-in)", lambda: QPixmap.fromImage(screen),
+                   lambda p: p.width() * p.height() * 4)
+    preview = t.run(f"preview_pixmap(x{preview_scale})", lambda: preview_pixmap(pixmap, preview_scale),
+                    lambda p: p.width() * p.height() * 4)
+
+    def paint():
+        target = QImage(widget_size[0], widget_size[1], QImage.Format.Format_ARGB32_Premultiplied)
+        painter = QPainter(target)
+        painter.drawPixmap(QRectF(target.rect()), preview, QRectF(preview.rect()))
+        painter.end()
+    t.run("paint (full drawPixmap of preview)", paint)
+
+    bgr = t.run("pixmap_to_bgr (one copy of the rect)",
+                lambda: pixmap_to_bgr(pixmap, rect.x(), rect.y(), rect.width(), rect.height()))
+    return t, bgr
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--preview-scale", type=float, default=0.5)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    img = synthetic_screenshot(args.width, args.height)
+    rect = QRect(args.width // 4, args.height // 3, args.width // 2, args.height // 8)
+    widget_size = (args.width, args.height)
+    print(f"Screenshot {args.width}x{args.height}, selection {rect.width()}x{rect.height()}")
+    print("Qt buffer sizes are computed from the resulting images; tracemalloc only sees Python/numpy memory.")
+
+    # Warm both paths once so library initialisation is not measured
+    legacy_path(img, rect, widget_size)
+    new_path(img, rect, widget_size, args.preview_scale)
+
+    legacy, legacy_bgr = legacy_path(img, rect, widget_size)
+    new, new_bgr = new_path(img, rect, widget_size, args.preview_scale)
+    old_ms, old_bytes = legacy.print("Old path: ImageQt -> QPixmap -> copy(rect) -> ARGB32 -> np.array -> cvtColor")
+    new_ms, new_bytes = new.print("Current path: screen QPixmap, downscaled preview, pixmap_to_bgr of the selection")
+
+    print(f"\nOutputs identical: {np.array_equal(legacy_bgr, new_bgr)}")
+    print(f"Time: {old_ms:.1f} ms -> {new_ms:.1f} ms ({old_ms / new_ms:.1f}x)")
+    print(f"Buffers allocated: {old_bytes / 1e6:.1f} MB -> {new_bytes / 1e6:.1f} MB")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Accuracy and latency of the confidence cascade against the fast and accurate profiles alone.
+
+Renders English lines at several sizes, degrades part of them (blur, downscale, JPEG) so some lines
+come out with low confidence, and runs every image through three configurations: fast only,
+accurate only, and fast with the cascade. Needs PaddleOCR (or onnx_profiles for the ONNX
+backend). Run from the repository root:
+    python -m benchmarks.bench_cascade [--threshold 0.8] [--upscale 1.5] [--repeat 3]
+"""
+import argparse
+import difflib
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synth import english_samples
+from logs import setup_logging
+from utils import settings
+
+CONFIGS = {
+    "fast": {"ocr_profile": "fast", "cascade_threshold": 0},
+    "accurate": {"ocr_profile": "accurate", "cascade_threshold": 0},
+    "cascade": {"ocr_profile": "fast"},
+}
+
+
+def degrade(image, level):
+    # level 0 is the clean render; higher levels lose detail the way small or compressed game text does
+    if level == 0:
+        return image
+    height, width = image.shape[:2]
+    small = cv2.resize(image, (max(1, width // (level + 1)), max(1, height // (level + 1))),
+                       interpolation=cv2.INTER_AREA)
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+    image = cv2.GaussianBlur(image, (3, 3), 0.5 * level)
+    _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, max(10, 60 - 20 * level)])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def build_samples(levels):
+    samples = []
+    for sample in english_samples([14, 20, 28], lines_per_image=3):
+        for level in levels:
+            samples.append({"label": f"{sample['font_size']}px level {level}",
+                            "text": "\n".join(sample["lines"]),
+                            "image": degrade(sample["image"], level)})
+    return samples
+
+
+def run_config(samples, repeat):
+    from ocr import extract_text_details
+    similarities, times, escalated, improved = [], [], 0, 0
+    for sample in samples:
+        extract_text_details(sample["image"])  # warm-up for this shape
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = extract_text_details(sample["image"])
+            times.append((time.perf_counter() - start) * 1000)
+        similarities.append(difflib.SequenceMatcher(None, sample["text"], result["text"]).ratio())
+        escalated += result["timings"].get("escalated", 0)
+        improved += result["timings"].get("improved", 0)
+    return {
+        "similarity": float(np.mean(similarities)),
+        "p50_ms": float(np.median(times)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "escalated": escalated,
+        "improved": improved,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold", type=float, default=settings.get("cascade_threshold", 0.8))
+    parser.add_argument("--upscale", type=float, default=settings.get("cascade_upscale", 1.5))
+    parser.add_argument("--levels", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_logging("WARNING")
+
+    samples = build_samples(args.levels)
+    print(f"{len(samples)} images, cascade threshold {args.threshold}, upscale {args.upscale}")
+    print(f"{'config':<10} {'similarity':>10} {'p50 ms':>9} {'p95 ms':>9} {'escalated':>10} {'improved':>9}")
+    for name, overrides in CONFIGS.items():
+        settings.override({"ocr_cache_mode": "off", "cascade_threshold": args.threshold,
+                           "cascade_upscale": args.upscale, **overrides})
+        stats = run_config(samples, args.repeat)
+        print(f"{name:<10} {stats['similarity']:>10.3f} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['escalated']:>10} {stats['improved']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Latency/accuracy trade-off of the input normaliser on rendered text.
+
+Run from the repository root:
+    python -m benchmarks.bench_normalize                  # full run, needs the OCR models
+    python -m benchmarks.bench_normalize --estimate-only  # text-height estimation and resize only
+"""
+import argparse
+import difflib
+import time
+
+import numpy as np
+
+from benchmarks.synth import english_samples
+from ocr import normalize_for_ocr, estimate_text_height, TARGET_TEXT_HEIGHT
+
+FONT_SIZES = [8, 10, 12, 16, 24, 32, 48, 72, 110, 160]
+
+
+def accuracy(expected, actual):
+    return difflib.SequenceMatcher(None, expected, actual).ratio()
+
+
+def run_estimates(samples):
+    import cv2
+    print(f"{'font px':>8} {'input':>11} {'est. height':>12} {'scale':>7} {'output':>11} {'normalise ms':>13}")
+    for sample in samples:
+        img = sample["image"]
+        start = time.perf_counter()
+        out, info = normalize_for_ocr(img)
+        ms = (time.perf_counter() - start) * 1000
+        gray = cv2.cvtColor(out, cv2.COLOR_BGR2GRAY)
+        height_after, _ = estimate_text_height(gray)
+        print(f"{sample['font_size']:>8} {img.shape[1]:>5}x{img.shape[0]:<5} "
+              f"{info['text_height'] or 0:>12.1f} {info['scale']:>7.2f} {out.shape[1]:>5}x{out.shape[0]:<5} {ms:>13.2f}"
+              f"   (text now ~{height_after or 0:.0f}px, target {TARGET_TEXT_HEIGHT})")
+
+
+def run_ocr(samples, repeat):
+    from ocr import extract_text_details, load_engine
+    load_engine()
+    # Warm-up so model initialisation is not charged to the first sample
+    extract_text_details(samples[0]["image"], normalize=False)
+
+    print(f"{'font px':>8} | {'raw ms':>8} {'raw acc':>8} | {'norm ms':>8} {'norm acc':>9}")
+    totals = {False: [[], []], True: [[], []]}
+    for sample in samples:
+        expected = "\n".join(sample["lines"])
+        row = []
+        for normalize in (False, True):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = extract_text_details(sample["image"], normalize=normalize)
+                times.append((time.perf_counter() - start) * 1000)
+            ms = float(np.median(times))
+            acc = accuracy(expected, result["text"])
+            totals[normalize][0].append(ms)
+            totals[normalize][1].append(acc)
+            row.append((ms, acc))
+        (raw_ms, raw_acc), (norm_ms, norm_acc) = row
+        print(f"{sample['font_size']:>8} | {raw_ms:>8.1f} {raw_acc:>8.3f} | {norm_ms:>8.1f} {norm_acc:>9.3f}")
+
+    for normalize, label in ((False, "raw"), (True, "normalised")):
+        ms, acc = totals[normalize]
+        print(f"{label:>10}: mean latency {np.mean(ms):.1f} ms, mean accuracy {np.mean(acc):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--estimate-only", action="store_true", help="skip OCR, only run the normaliser")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = english_samples(FONT_SIZES)
+    run_estimates(samples)
+    if not args.estimate_only:
+        print()
+        run_ocr(samples, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Compare the compiled script classifier with the original unicodedata/OpenCC functions.
+
+Run from the repository root:  python -m benchmarks.bench_script_classifier
+"""
+import random
+import time
+import unicodedata
+
+from opencc import OpenCC
+
+from script_classifier import load_chinese_index
+
+
+# --- Reference implementations (as they were before the classifier) ---
+
+def legacy_detect_unicode_script(text):
+    has_hiragana = has_katakana = has_cjk = has_hangul = False
+    for ch in text:
+        if not ch.strip():
+            continue
+        try:
+            name = unicodedata.name(ch)
+            if "HIRAGANA" in name:
+                has_hiragana = True
+            elif "KATAKANA" in name:
+                has_katakana = True
+            elif "HANGUL" in name:
+                has_hangul = True
+            elif "CJK UNIFIED" in name:
+                has_cjk = True
+        except ValueError:
+            continue
+
+    if has_hiragana or has_katakana:
+        return "ja"
+    elif has_hangul:
+        return "ko"
+    elif has_cjk:
+        return "zh"
+    return "en"
+
+
+def legacy_is_kanji_only(text):
+    for ch in text:
+        if not ch.strip():
+            continue
+        try:
+            name = unicodedata.name(ch)
+            if any(tok in name for tok in ("HIRAGANA", "KATAKANA", "HANGUL", "LATIN")):
+                return False
+        except ValueError:
+            continue
+    return True
+
+
+def legacy_is_traditional_chinese(text):
+    cc = OpenCC('t2s')
+    return cc.convert(text) != text
+
+
+def legacy_decide(text, prefer_ja):
+    lang = legacy_detect_unicode_script(text)
+    if lang in ("zh", "zh-tw") and prefer_ja:
+        if legacy_is_kanji_only(text):
+            lang = "ja"
+    elif lang == "zh" and legacy_is_traditional_chinese(text):
+        lang = "zh-tw"
+    return lang
+
+
+# --- Inputs ---
+
+SAMPLES = {
+    "en": "The quick brown fox jumps over the lazy dog. Press Start to continue.",
+    "ja": "今日はいい天気ですね。セーブデータを読み込みますか？",
+    "ja-kanji": "東京都港区六本木",
+    "zh": "这是一个简单的中文句子，用于测试语言检测。",
+    "zh-tw": "這是一個簡單的中文句子，用於測試語言檢測。",
+    "ko": "안녕하세요. 게임을 저장하시겠습니까?",
+    "mixed": "Level 5 クリア! 经验值 +120 獲得",
+}
+
+
+def make_corpus(seed=1234, size=2000):
+    rng = random.Random(seed)
+    pools = list(SAMPLES.values())
+    corpus = []
+    for _ in range(size):
+        parts = rng.sample(pools, rng.randint(1, 2))
+        text = "".join(rng.choice(parts) for _ in range(rng.randint(1, 6)))
+        corpus.append(text)
+    return corpus
+
+
+def bench(name, fn, corpus, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    chars = sum(len(t) for t in corpus)
+    print(f"{name:<34} {best * 1000:9.2f} ms  {chars / best / 1e6:7.2f} Mchar/s")
+    return best
+
+
+def main():
+    start = time.perf_counter()
+    classifier = load_chinese_index()
+    print(f"Classifier build (incl. OpenCC index): {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    corpus = make_corpus()
+    # Single-sample agreement, plus the generated corpus
+    mismatches = 0
+    for text in list(SAMPLES.values()) + corpus:
+        for prefer_ja in (False, True):
+            if classifier.classify(text, prefer_ja)["lang"] != legacy_decide(text, prefer_ja):
+                mismatches += 1
+        if classifier.detect_script(text) != legacy_detect_unicode_script(text):
+            mismatches += 1
+    print(f"Decision mismatches against the legacy functions: {mismatches}\n")
+
+    long_corpus = [text * 20 for text in corpus[:200]]
+    for label, texts in (("short captures", corpus), ("long captures", long_corpus)):
+        print(f"-- {label}: {len(texts)} texts, {sum(len(t) for t in texts)} chars")
+        old = bench("legacy detect_unicode_script", legacy_detect_unicode_script, texts)
+        new = bench("classifier.detect_script", classifier.detect_script, texts)
+        print(f"{'speedup':<34} {old / new:9.1f}x")
+        old = bench("legacy is_traditional_chinese", legacy_is_traditional_chinese, texts, repeat=1)
+        new = bench("classifier.is_traditional", classifier.is_traditional, texts)
+        print(f"{'speedup':<34} {old / new:9.1f}x")
+        old = bench("legacy full decision", lambda t: legacy_decide(t, False), texts, repeat=1)
+        new = bench("classifier.classify (with counts)", classifier.classify, texts)
+        print(f"{'speedup':<34} {old / new:9.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
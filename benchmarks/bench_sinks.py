@@ -0,0 +1,159 @@
+"""Output sink pipeline: publish() cost, per-sink latency and clipboard copy cost.
+
+Publishes `--outputs` captures to the clipboard, file and socket sinks plus a deliberately slow
+sink, with a socket client reading the broadcast. Checks that publish() never waits for a sink,
+that every output reaches the file, that the socket client gets what the socket sink delivered in
+order, and that the slow sink only drops its own backlog. Also times one copy through the Qt
+clipboard against pyperclip.copy(), when pyperclip has a working backend. Qt runs offscreen unless
+`--live` is given. Run from the repository root:
+    python -m benchmarks.bench_sinks
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+class SlowSink:
+    # Stands in for a consumer that cannot keep up (network drive, stalled client)
+    name = "slow"
+    main_thread = False
+    queue_size = 4
+
+    def __init__(self, delay_ms):
+        self.delay_ms = delay_ms
+        self.received = 0
+
+    def enabled(self):
+        return True
+
+    def deliver(self, output):
+        time.sleep(self.delay_ms / 1000)
+        self.received += 1
+
+    def close(self):
+        pass
+
+
+def time_copies(copy, runs):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        copy(f"clipboard benchmark {i}")
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def read_lines(client, count, timeout=5):
+    client.settimeout(timeout)
+    data = b""
+    while data.count(b"\n") < count:
+        chunk = client.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--outputs", type=int, default=50)
+    parser.add_argument("--slow-ms", type=float, default=50)
+    parser.add_argument("--port", type=int, default=18766)
+    parser.add_argument("--live", action="store_true", help="use the real clipboard")
+    args = parser.parse_args()
+
+    if not args.live:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from logs import setup_logging
+    from sinks import SinkPipeline, ClipboardSink, FileSink, SocketSink, copy_to_clipboard
+    from tracing import metrics, format_metrics
+
+    app = QApplication(sys.argv[:1])
+    setup_logging("ERROR")
+
+    qt_ms = time_copies(copy_to_clipboard, 20)
+    try:
+        import pyperclip
+        pyperclip_ms = f"{time_copies(pyperclip.copy, 20):.2f} ms"
+    except Exception as e:
+        pyperclip_ms = f"unavailable ({type(e).__name__})"
+    print(f"clipboard copy p50: Qt clipboard {qt_ms:.2f} ms, pyperclip {pyperclip_ms}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "captures.jsonl")
+        config = {"auto_copy": True, "output_file_path": path, "output_socket_port": args.port}
+        pipeline = SinkPipeline()
+        pipeline.add(ClipboardSink(config))
+        pipeline.add(FileSink(config))
+        socket_sink = pipeline.add(SocketSink(config))
+        socket_sink.configure()
+        slow = pipeline.add(SlowSink(args.slow_ms))
+
+        client = socket.create_connection(("127.0.0.1", args.port))
+        deadline = time.perf_counter() + 2
+        while socket_sink.client_count() == 0 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        publish_ms = []
+        for i in range(args.outputs):
+            output = {"text": f"capture {i}", "lang": "en", "confidence": 0.9, "lines": [f"capture {i}"],
+                      "scores": [0.9]}
+            start = time.perf_counter()
+            pipeline.publish(output)
+            publish_ms.append((time.perf_counter() - start) * 1000)
+            app.processEvents()
+
+        deadline = time.perf_counter() + 5
+        while time.perf_counter() < deadline:
+            app.processEvents()
+            stats = pipeline.stats()
+            if sum(stats["slow"].values()) == args.outputs and sum(stats["socket"].values()) == args.outputs \
+                    and stats["clipboard"]["delivered"] == args.outputs:
+                break
+            time.sleep(0.01)
+        # A burst larger than its queue may make the socket sink drop the oldest outputs too
+        received = read_lines(client, pipeline.stats()["socket"]["delivered"])
+        pipeline.close()
+        client.close()
+        with open(path, encoding="utf-8") as f:
+            written = [json.loads(line) for line in f]
+
+    stats = pipeline.stats()
+    print(f"publish() p50 {np.median(publish_ms):.3f} ms, max {max(publish_ms):.3f} ms for {args.outputs} outputs")
+    for name, counts in stats.items():
+        print(f"{name:<10} {counts}")
+    print(format_metrics({k: v for k, v in metrics.snapshot().items() if k.startswith("sink.")}))
+
+    problems = []
+    if max(publish_ms) > args.slow_ms / 2:
+        problems.append(f"publish() took {max(publish_ms):.1f} ms, it waited for a sink")
+    if [r["text"] for r in written] != [f"capture {i}" for i in range(args.outputs)]:
+        problems.append(f"file sink wrote {len(written)}/{args.outputs} outputs in order")
+    indices = [int(r["text"].split()[-1]) for r in received]
+    if len(received) != stats["socket"]["delivered"] or indices != sorted(indices) or \
+            stats["socket"]["delivered"] + stats["socket"]["dropped"] != args.outputs:
+        problems.append(f"socket client received {len(received)} outputs, expected the {stats['socket']} "
+                        f"delivered in order")
+    if stats["clipboard"]["delivered"] != args.outputs:
+        problems.append(f"clipboard sink delivered {stats['clipboard']['delivered']}/{args.outputs}")
+    if stats["slow"]["dropped"] == 0 or stats["slow"]["delivered"] + stats["slow"]["dropped"] != args.outputs:
+        problems.append(f"slow sink should deliver or drop every output, got {stats['slow']}")
+    if slow.received != stats["slow"]["delivered"]:
+        problems.append(f"slow sink received {slow.received} outputs, pipeline counted {stats['slow']['delivered']}")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        return 1
+    print("all invariants hold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
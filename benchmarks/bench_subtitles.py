@@ -0,0 +1,151 @@
+"""Subtitle extraction from a synthetic video with a known subtitle track.
+
+Writes a video (moving background, subtitles on a dark band at the bottom) with cv2, runs
+subtitles.extract_subtitles over it and compares the cues with the track: text must match and
+start/end must be within one sample interval. OCR runs in-process through a backend that reads
+each crop by matching it against the rendered subtitle lines, so no model is needed. Also reports
+decode/sample throughput and RSS growth, which should stay flat however long the video is.
+Run from the repository root:
+    python -m benchmarks.bench_subtitles [--seconds 60]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synth import ENGLISH_LINES
+from memory import process_rss, MB
+from ocr_backends import OCRBackend, register_backend
+from utils import settings
+
+WIDTH, HEIGHT, FPS = 640, 360, 30
+BAND_TOP = int(HEIGHT * 0.75)
+SHOW_MS, GAP_MS = 2000, 500
+MATCH_SIZE = (128, 16)
+
+
+def subtitle_track(seconds):
+    track, t, i = [], 300, 0
+    while t + SHOW_MS <= seconds * 1000:
+        track.append({"start": t, "end": t + SHOW_MS, "text": ENGLISH_LINES[i % len(ENGLISH_LINES)]})
+        t += SHOW_MS + GAP_MS
+        i += 1
+    return track
+
+
+def draw_band(text):
+    band = np.full((HEIGHT - BAND_TOP, WIDTH, 3), 24, dtype=np.uint8)
+    if text:
+        size, _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        x = (WIDTH - size[0]) // 2
+        cv2.putText(band, text, (x, band.shape[0] // 2 + size[1] // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.7,
+                    (235, 235, 235), 2, cv2.LINE_AA)
+    return band
+
+
+def write_video(path, seconds, track):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (WIDTH, HEIGHT))
+    rng = np.random.default_rng(0)
+    texture = rng.integers(0, 256, (HEIGHT, WIDTH * 2, 3), dtype=np.uint8)
+    texture = cv2.GaussianBlur(texture, (0, 0), 6)
+    bands = {}
+    for index in range(int(seconds * FPS)):
+        t = index * 1000 / FPS
+        text = next((cue["text"] for cue in track if cue["start"] <= t < cue["end"]), "")
+        # Scrolling "gameplay" above the subtitle band
+        offset = index * 4 % WIDTH
+        frame = np.ascontiguousarray(texture[:, offset:offset + WIDTH])
+        if text not in bands:
+            bands[text] = draw_band(text)
+        frame[BAND_TOP:] = bands[text]
+        writer.write(frame)
+    writer.release()
+
+
+def _signature(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    return cv2.resize(gray, MATCH_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+class TrackBackend(OCRBackend):
+    # "Reads" a crop by finding the closest rendered subtitle band
+    name = "subtitle_track"
+
+    def __init__(self, lines):
+        self.references = [(text, _signature(draw_band(text))) for text in [""] + list(lines)]
+
+    def predict(self, image):
+        signature = _signature(image)
+        text = min(self.references, key=lambda ref: float(np.abs(ref[1] - signature).mean()))[0]
+        if not text:
+            return [], [], []
+        return [text], [0.95], [[0, 0, image.shape[1], image.shape[0]]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--sample-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    from logs import setup_logging
+    from subtitles import VideoSampler, JsonlWriter, extract_subtitles
+
+    setup_logging("WARNING")
+    register_backend("subtitle_track", lambda settings, options: TrackBackend(ENGLISH_LINES))
+    # The backend matches whole bands, so the crop must reach it unchanged
+    settings.override({"ocr_backend": "subtitle_track", "ocr_cache_mode": "off", "normalize_input": False,
+                       "shape_buckets": [], "cascade_threshold": 0, "ocr_warmup": False})
+
+    track = subtitle_track(args.seconds)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "subs.avi")
+        start = time.perf_counter()
+        write_video(path, args.seconds, track)
+        print(f"wrote {args.seconds:.0f}s {WIDTH}x{HEIGHT}@{FPS} video with {len(track)} subtitles "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        rss_before = process_rss()
+        sampler = VideoSampler(path, (0, BAND_TOP / HEIGHT, 1, 1 - BAND_TOP / HEIGHT), args.sample_ms)
+        out = io.StringIO()
+        start = time.perf_counter()
+        extract_subtitles(sampler, JsonlWriter(out), workers=0)
+        elapsed = time.perf_counter() - start
+        rss_after = process_rss()
+
+    import json
+    cues = [json.loads(line) for line in out.getvalue().splitlines()]
+    print(f"{sampler.frames} frames, {sampler.samples} sampled, {sampler.keyframes} keyframes OCR'd -> "
+          f"{len(cues)} cues in {elapsed:.2f}s ({args.seconds / elapsed:.0f}x realtime)")
+    if rss_before and rss_after:
+        print(f"RSS {rss_before / MB:.0f} MB -> {rss_after / MB:.0f} MB")
+
+    problems = []
+    if len(cues) != len(track):
+        problems.append(f"expected {len(track)} cues, got {len(cues)}")
+    tolerance = args.sample_ms + 1000 / FPS
+    for expected, cue in zip(track, cues):
+        if cue["text"] != expected["text"]:
+            problems.append(f"cue {cue['index']}: {cue['text']!r} != {expected['text']!r}")
+        if abs(cue["start_ms"] - expected["start"]) > tolerance or abs(cue["end_ms"] - expected["end"]) > tolerance:
+            problems.append(f"cue {cue['index']}: {cue['start_ms']}-{cue['end_ms']} ms, "
+                            f"expected {expected['start']}-{expected['end']} ms")
+        if cue["lang"] != "en":
+            problems.append(f"cue {cue['index']}: language {cue['lang']}")
+    if sampler.keyframes > 3 * len(track) + 2:
+        problems.append(f"{sampler.keyframes} keyframes for {len(track)} subtitles, change detection is too eager")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        return 1
+    print("all cues match the track")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
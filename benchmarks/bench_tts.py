@@ -0,0 +1,118 @@
+"""TTS worker latency: time to first audio, interrupt latency and cached replays.
+
+Run from the repository root:
+    python -m benchmarks.bench_tts --driver espeak   # real pyttsx3 driver (needs a WAV player for streaming)
+    python -m benchmarks.bench_tts --simulate        # synthetic engine with fixed synthesis/playback costs
+"""
+import argparse
+import threading
+import time
+import wave
+
+import numpy as np
+
+import tts
+from tts import TTSWorker, SPEAKING
+
+LONG_TEXT = " ".join([
+    "The quick brown fox jumps over the lazy dog.",
+    "Press Start to continue, or hold Select to open the options menu.",
+    "Settings saved successfully!",
+    "Chapter three begins on the road north, where the snow has not melted yet.",
+    "今日は天気がいいですね。散歩に行きましょう！",
+] * 3)
+
+
+class SimulatedEngine:
+    # Synthesis costs SYNTH_MS_PER_CHAR; the written WAV lasts AUDIO_MS_PER_CHAR
+    SYNTH_MS_PER_CHAR = 1.5
+    AUDIO_MS_PER_CHAR = 60
+
+    def __init__(self, driver=None):
+        self._pending = []
+
+    def getProperty(self, name):
+        return {"voices": [], "rate": 200}[name]
+
+    def setProperty(self, name, value):
+        pass
+
+    def save_to_file(self, text, path):
+        self._pending.append((text, path))
+
+    def runAndWait(self):
+        for text, path in self._pending:
+            time.sleep(len(text) * self.SYNTH_MS_PER_CHAR / 1000)
+            frames = int(8000 * len(text) * self.AUDIO_MS_PER_CHAR / 1000)
+            with wave.open(path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(8000)
+                f.writeframes(b"\0\0" * frames)
+        self._pending.clear()
+
+
+class SimulatedPlayer:
+    def play(self, path, stop_event):
+        stop_event.wait(min(0.3, tts.wav_duration(path)))
+
+
+def measure(worker, text, started, repeat):
+    first = []
+    for _ in range(repeat):
+        started.clear()
+        start = time.perf_counter()
+        worker.speak(text, "en")
+        if started.wait(30):
+            first.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.2)
+        worker.stop_speaking()
+        time.sleep(0.1)
+    return first
+
+
+def report(label, times):
+    if times:
+        print(f"{label:>32}: median {np.median(times):.1f} ms, max {max(times):.1f} ms")
+    else:
+        print(f"{label:>32}: no utterances started")
+
+
+def run(worker, repeat):
+    started = threading.Event()
+    worker.subscribe(lambda state: state == SPEAKING and started.set())
+    start = time.perf_counter()
+    worker.wait_ready()
+    print(f"engine start: {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"mode: {'streaming' if worker.player else 'direct'}, voices: {worker.voices}")
+
+    report("first speak -> audio", measure(worker, LONG_TEXT, started, 1))
+    report("replay -> audio", measure(worker, LONG_TEXT, started, repeat))
+    if worker.player:
+        print(f"audio cache: {worker.cache.stats()}")
+    worker.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--driver", default="dummy")
+    parser.add_argument("--simulate", action="store_true", help="use a synthetic engine and player")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not args.simulate:
+        run(TTSWorker(args.driver), args.repeat)
+        return
+
+    print("-- whole text as one chunk --")
+    chunker = tts.split_chunks
+    tts.split_chunks = lambda text: [text]
+    run(TTSWorker(engine_factory=SimulatedEngine, player_factory=SimulatedPlayer), args.repeat)
+    tts.split_chunks = chunker
+
+    print("-- sentence chunks --")
+    run(TTSWorker(engine_factory=SimulatedEngine, player_factory=SimulatedPlayer), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
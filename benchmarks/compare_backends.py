@@ -0,0 +1,67 @@
+"""Run the same images through the paddle and ONNX Runtime backends and compare text and latency.
+
+Needs PaddleOCR plus exported PP-OCRv5 ONNX models configured through the onnx_* settings.
+Run from the repository root:
+    python -m benchmarks.compare_backends [image ...] [--int8] [--repeat 5]
+"""
+import argparse
+import difflib
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synth import english_samples
+from ocr_backends import create_backend
+from utils import settings
+
+MIN_SIMILARITY = 0.9
+
+
+def load_images(paths):
+    if not paths:
+        return [(f"synthetic {s['font_size']}px", s["image"]) for s in english_samples([18, 28, 40])]
+    return [(path, cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)) for path in paths]
+
+
+def timed_predict(backend, image, repeat):
+    backend.predict(image)  # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lines, scores, _ = backend.predict(image)
+        times.append((time.perf_counter() - start) * 1000)
+    return "\n".join(lines), float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--int8", action="store_true", help="quantise the ONNX models to int8 first")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    onnx_settings = {**settings.all(), "onnx_int8": args.int8 or settings.get("onnx_int8", False)}
+    backends = {
+        "paddle": create_backend("paddle", settings.all()),
+        "onnx": create_backend("onnx", onnx_settings),
+    }
+
+    failures = 0
+    for label, image in load_images(args.images):
+        outputs = {name: timed_predict(backend, image, args.repeat) for name, backend in backends.items()}
+        (paddle_text, paddle_ms), (onnx_text, onnx_ms) = outputs["paddle"], outputs["onnx"]
+        similarity = difflib.SequenceMatcher(None, paddle_text, onnx_text).ratio()
+        status = "ok" if similarity >= MIN_SIMILARITY else "MISMATCH"
+        failures += status != "ok"
+        print(f"{label}: paddle {paddle_ms:.1f} ms, onnx{' int8' if args.int8 else ''} {onnx_ms:.1f} ms, "
+              f"text similarity {similarity:.3f} [{status}]")
+        if status != "ok":
+            print(f"  paddle: {paddle_text!r}\n  onnx:   {onnx_text!r}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Hotkey-to-overlay and release-to-ndarray latency of the region selector.
+
+Opens the real RegionSelector, drags a rubber band with synthetic mouse events and releases it,
+`--runs` times. By default the screen grab returns a synthetic screenshot `--width` device pixels
+wide (with the screen's aspect ratio) and Qt runs offscreen, so it works headless; `--live` grabs
+the real monitor under the cursor and shows the overlay. `--preview-scale` overrides
+selector_preview_scale (1 = paint and crop the full-resolution screenshot). Run from the
+repository root:
+    python -m benchmarks.selector_latency [--preview-scale 1]
+    python -m benchmarks.selector_latency --live
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+
+def synthetic_grab(width):
+    from PyQt6.QtCore import QRect
+    from PyQt6.QtGui import QImage, QPixmap
+
+    rng = np.random.default_rng(0)
+    images = {}
+
+    def screenshot(screen):
+        geometry = screen.geometry()
+        scale = width / max(1, geometry.width())
+        height = round(geometry.height() * scale)
+        if height not in images:
+            rgb = np.ascontiguousarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+            # Screen grabs come back as 32-bit RGB
+            images[height] = QImage(rgb.data, width, height, rgb.strides[0],
+                                    QImage.Format.Format_RGB888).convertToFormat(QImage.Format.Format_RGB32)
+        return images[height], scale
+
+    def grab(screen):
+        image, scale = screenshot(screen)
+        pixmap = QPixmap.fromImage(image)
+        # As QScreen.grabWindow() does: device pixels, tagged with how many per logical pixel
+        pixmap.setDevicePixelRatio(scale)
+        return pixmap
+
+    def grab_rect(screen, rect):
+        # Like grabWindow() with a rectangle, only the selected pixels are read
+        image, scale = screenshot(screen)
+        pixmap = QPixmap.fromImage(image.copy(QRect(round(rect.x() * scale), round(rect.y() * scale),
+                                                    round(rect.width() * scale), round(rect.height() * scale))))
+        pixmap.setDevicePixelRatio(scale)
+        return pixmap
+    return grab, grab_rect
+
+
+def mouse(widget, kind, pos, buttons):
+    from PyQt6.QtCore import QEvent, QPointF, Qt
+    from PyQt6.QtGui import QMouseEvent
+    from PyQt6.QtWidgets import QApplication
+
+    event_type = {"press": QEvent.Type.MouseButtonPress, "move": QEvent.Type.MouseMove,
+                  "release": QEvent.Type.MouseButtonRelease}[kind]
+    button = Qt.MouseButton.NoButton if kind == "move" else Qt.MouseButton.LeftButton
+    point = QPointF(pos[0], pos[1])
+    event = QMouseEvent(event_type, point, widget.mapToGlobal(point), button, buttons,
+                        Qt.KeyboardModifier.NoModifier)
+    QApplication.sendEvent(widget, event)
+
+
+def run_once(app, selector, moves):
+    from PyQt6.QtCore import Qt
+
+    results = {}
+    selector.selection_done.connect(lambda img: results.setdefault("img", img))
+    start = time.perf_counter()
+    selector.show()
+    while "overlay" not in selector.trace.stages and time.perf_counter() - start < 5:
+        app.processEvents()
+    trace = selector.trace
+
+    width, height = selector.width(), selector.height()
+    mouse(selector, "press", (width // 4, height // 4), Qt.MouseButton.LeftButton)
+    paint_ms = []
+    for i in range(1, moves + 1):
+        x = width // 4 + (width // 2) * i // moves
+        y = height // 4 + (height // 3) * i // moves
+        mouse(selector, "move", (x, y), Qt.MouseButton.LeftButton)
+        t = time.perf_counter()
+        app.processEvents()
+        paint_ms.append((time.perf_counter() - t) * 1000)
+    mouse(selector, "release", (x, y), Qt.MouseButton.NoButton)
+    # With a preview the selection is grabbed once the overlay has had time to disappear
+    deadline = time.perf_counter() + 5
+    while "img" not in results and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    selector.selection_done.disconnect()
+
+    img = results.get("img")
+    return {
+        "grab": trace.stages.get("grab", 0.0),
+        "preview": trace.stages.get("preview", 0.0),
+        "overlay": trace.stages.get("overlay", 0.0),
+        "move": float(np.median(paint_ms)),
+        "crop": trace.stages.get("crop", 0.0),
+        "shape": None if img is None else img.shape,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--moves", type=int, default=60, help="mouse moves per drag")
+    parser.add_argument("--width", type=int, default=3840, help="synthetic screenshot width in device pixels")
+    parser.add_argument("--live", action="store_true", help="grab and draw on the real screen")
+    parser.add_argument("--preview-scale", type=float, help="override selector_preview_scale")
+    args = parser.parse_args()
+
+    if not args.live:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from logs import setup_logging
+    from selector import RegionSelector
+    from utils import settings
+
+    app = QApplication(sys.argv[:1])
+    setup_logging("WARNING")
+    if args.preview_scale is not None:
+        settings.override({"selector_preview_scale": args.preview_scale})
+    selector = RegionSelector() if args.live else RegionSelector(*synthetic_grab(args.width))
+
+    runs = [run_once(app, selector, args.moves) for _ in range(args.runs)]
+    screen = selector.screen()
+    print(f"screen {screen.geometry().width()}x{screen.geometry().height()} logical, "
+          f"selection {runs[-1]['shape']}, {'live' if args.live else 'synthetic'} grab, "
+          f"preview scale {settings.get('selector_preview_scale')}")
+    print(f"{'stage':<28} {'p50 ms':>9} {'max ms':>9}")
+    for key, label in (("grab", "grab"), ("preview", "downscaled preview"), ("overlay", "hotkey -> overlay painted"),
+                       ("move", "rubber-band move repaint"), ("crop", "release -> ndarray")):
+        values = [r[key] for r in runs]
+        print(f"{label:<28} {np.median(values):>9.2f} {max(values):>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
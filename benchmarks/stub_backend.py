@@ -0,0 +1,32 @@
+"""OCR backend that returns known text instead of running a model.
+
+Lets the pipeline around inference (normalisation, tiling, caching, language detection) be
+benchmarked on machines without PaddleOCR or model files. Set `lines` before each call;
+`ms_per_megapixel` adds a simulated inference cost.
+"""
+import time
+
+from ocr_backends import OCRBackend, register_backend
+
+
+class StubBackend(OCRBackend):
+    name = "stub"
+
+    def __init__(self, ms_per_megapixel=0.0, score=0.95, **_):
+        self.ms_per_megapixel = ms_per_megapixel
+        self.score = score
+        self.lines = []
+        self.calls = 0
+
+    def predict(self, image):
+        self.calls += 1
+        height, width = image.shape[:2]
+        if self.ms_per_megapixel:
+            time.sleep(self.ms_per_megapixel * height * width / 1e6 / 1000)
+        # One box per line, stacked evenly over the image
+        row = height / max(1, len(self.lines))
+        boxes = [[0, int(i * row), width, int((i + 1) * row)] for i in range(len(self.lines))]
+        return list(self.lines), [self.score] * len(self.lines), boxes
+
+
+register_backend("stub", lambda settings, options: StubBackend(**options))
@@ -0,0 +1,180 @@
+"""Reproducible pipeline benchmark on synthetic en/ja/zh-Hans/zh-Hant/ko text images.
+
+OCR runs through the stub backend (benchmarks/stub_backend.py), so no models are needed and the
+numbers cover everything around inference. Run from the repository root:
+    python -m benchmarks.suite                                 # report only
+    python -m benchmarks.suite --save-baseline baseline.json   # record this machine's numbers
+    python -m benchmarks.suite --baseline baseline.json        # exit 1 on a regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import benchmarks.stub_backend  # noqa: F401  registers the "stub" backend
+from benchmarks.synth import multilingual_samples, find_cjk_font
+from capture import pixmap_to_bgr
+from logs import setup_logging
+from utils import settings
+
+FONT_SIZES = [12, 20, 32, 48]
+DENSITIES = [1, 4, 12]
+DEFAULT_THRESHOLD = 0.2
+
+# Inference is stubbed and results must not come from the cache or depend on crop size
+BENCH_SETTINGS = {
+    "ocr_backend": "stub",
+    "ocr_profile": "fast",
+    "ocr_cache_mode": "off",
+    "ocr_cache_path": "",
+    "tile_threshold": 0,
+    "prefer_ja_over_zh": False,
+}
+
+
+def selector_conversion(sample):
+    # What RegionSelector does on release: the selection out of the screen QPixmap -> BGR array
+    height, width = sample["image"].shape[:2]
+    return pixmap_to_bgr(sample["screen"], 0, 0, width, height)
+
+
+def screen_pixmap(img_bgr):
+    from PyQt6.QtGui import QImage, QPixmap
+    height, width = img_bgr.shape[:2]
+    rgb = np.ascontiguousarray(img_bgr[:, :, ::-1])
+    return QPixmap.fromImage(QImage(rgb.data, width, height, rgb.strides[0], QImage.Format.Format_RGB888).copy())
+
+
+def build_stages():
+    from ocr import extract_text_with_lang, detect_unicode_script, is_traditional_chinese, load_engine
+    engine = load_engine()
+
+    def extract(sample):
+        engine.lines = sample["lines"]
+        return extract_text_with_lang(sample["image"])[1]
+
+    return {
+        "selector_conversion": (selector_conversion, lambda s: True),
+        "detect_unicode_script": (lambda s: detect_unicode_script(s["text"]), lambda s: True),
+        "is_traditional_chinese": (lambda s: is_traditional_chinese(s["text"]),
+                                   lambda s: s["lang"] in ("zh", "zh-tw")),
+        "extract_text_with_lang": (extract, lambda s: True),
+    }
+
+
+def run_stage(fn, samples, repeat):
+    for sample in samples:
+        fn(sample)  # warm-up
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sample in samples:
+            t = time.perf_counter()
+            fn(sample)
+            latencies.append((time.perf_counter() - t) * 1000)
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    for sample in samples:
+        fn(sample)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "calls": len(latencies),
+        "throughput": round(len(latencies) / wall, 1),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "peak_mb": round(peak / 1e6, 3),
+    }
+
+
+def language_accuracy(samples, extract):
+    correct = sum(extract(s) == s["lang"] for s in samples)
+    return round(correct / len(samples), 3)
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if previous is None:
+            continue
+        if current["p50_ms"] > previous["p50_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {previous['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms")
+        if current["throughput"] < previous["throughput"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {previous['throughput']} -> {current['throughput']} calls/s")
+    if results["language_accuracy"] < baseline.get("language_accuracy", 0):
+        regressions.append(f"language accuracy {baseline['language_accuracy']} -> {results['language_accuracy']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--font", help="TrueType font with CJK glyphs (auto-detected if omitted)")
+    parser.add_argument("--baseline", help="compare against this baseline and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown before a stage counts as regressed")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    args = parser.parse_args()
+
+    settings.override(BENCH_SETTINGS)
+    # QPixmap needs a GUI application; no window is shown
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])  # noqa: F841
+    # Per-capture INFO lines would dominate both the output and the timings
+    setup_logging("WARNING")
+    font = args.font or find_cjk_font()
+    if font is None:
+        print("note: no CJK font found, CJK samples render as boxes (fine for the stub backend)")
+
+    samples = multilingual_samples(FONT_SIZES, DENSITIES, font_path=font)
+    for sample in samples:
+        sample["text"] = "\n".join(sample["lines"])
+        sample["screen"] = screen_pixmap(sample["image"])
+    print(f"{len(samples)} samples: {len(FONT_SIZES)} sizes x {len(DENSITIES)} densities x 5 languages")
+
+    stages = build_stages()
+    results = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "repeat": args.repeat},
+        "stages": {},
+    }
+    print(f"{'stage':<24} {'calls':>7} {'calls/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+    for name, (fn, include) in stages.items():
+        stats = run_stage(fn, [s for s in samples if include(s)], args.repeat)
+        results["stages"][name] = stats
+        print(f"{name:<24} {stats['calls']:>7} {stats['throughput']:>10.1f} {stats['p50_ms']:>9.3f} "
+              f"{stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['peak_mb']:>8.2f}")
+
+    results["language_accuracy"] = language_accuracy(samples, stages["extract_text_with_lang"][0])
+    print(f"language accuracy (stub OCR): {results['language_accuracy']:.3f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Deterministic synthetic text images for benchmarks."""
+import os
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+ENGLISH_LINES = [
+    "The quick brown fox jumps over the lazy dog",
+    "Press Start to continue",
+    "Settings saved successfully",
+    "Inventory is full, drop an item first",
+    "Chapter 3: The Road North",
+]
+
+# Expected language code (as returned by the classifier) -> sample lines
+MULTILINGUAL_LINES = {
+    "en": ENGLISH_LINES,
+    "ja": [
+        "ゲームを続けるにはスタートを押してください",
+        "設定を保存しました",
+        "持ち物がいっぱいです。先にアイテムを捨ててください",
+        "第三章：北への道",
+        "今日はいい天気ですね",
+    ],
+    "zh": [
+        "按开始键继续游戏",
+        "设置已成功保存",
+        "背包已满，请先丢弃物品",
+        "第三章：向北的道路",
+        "这个问题需要进一步讨论",
+    ],
+    "zh-tw": [
+        "按開始鍵繼續遊戲",
+        "設定已經成功儲存",
+        "背包已滿，請先丟棄物品",
+        "第三章：向北的道路",
+        "這個問題需要進一步討論",
+    ],
+    "ko": [
+        "계속하려면 시작 버튼을 누르세요",
+        "설정이 저장되었습니다",
+        "인벤토리가 가득 찼습니다. 먼저 아이템을 버리세요",
+        "제3장: 북쪽으로 가는 길",
+        "오늘 날씨가 좋네요",
+    ],
+}
+
+# Fonts with CJK and Hangul glyphs on common systems; without one CJK text renders as boxes,
+# which is fine for the stub backend but not for real OCR
+CJK_FONT_CANDIDATES = [
+    "C:/Windows/Fonts/msgothic.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/malgun.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
+    "/System/Library/Fonts/PingFang.ttc",
+]
+
+
+def find_cjk_font():
+    for path in CJK_FONT_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_font(size, font_path=None):
+    if font_path:
+        return ImageFont.truetype(font_path, size)
+    return ImageFont.load_default(size=size)
+
+
+def render_text_image(lines, font_size, font_path=None, padding=None, line_spacing=1.4,
+                      fg=(20, 20, 20), bg=(245, 245, 245)):
+    font = load_font(font_size, font_path)
+    padding = font_size if padding is None else padding
+    line_height = int(font_size * line_spacing)
+    widths = [int(font.getlength(line)) for line in lines]
+    width = max(widths) + 2 * padding
+    height = line_height * len(lines) + 2 * padding
+
+    img = Image.new("RGB", (width, height), bg)
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((padding, padding + i * line_height), line, font=font, fill=fg)
+    # OpenCV / OCR input format
+    return np.ascontiguousarray(np.asarray(img)[:, :, ::-1])
+
+
+def english_samples(font_sizes, lines_per_image=2, seed=42):
+    rng = random.Random(seed)
+    samples = []
+    for size in font_sizes:
+        lines = rng.sample(ENGLISH_LINES, lines_per_image)
+        samples.append({"font_size": size, "lines": lines, "image": render_text_image(lines, size)})
+    return samples
+
+
+def multilingual_samples(font_sizes, densities, font_path=None, seed=42):
+    # One image per (language, font size, line count); densities are lines per image
+    font_path = font_path or find_cjk_font()
+    rng = random.Random(seed)
+    samples = []
+    for lang, pool in MULTILINGUAL_LINES.items():
+        for size in font_sizes:
+            for line_count in densities:
+                lines = [rng.choice(pool) for _ in range(line_count)]
+                samples.append({
+                    "lang": lang,
+                    "font_size": size,
+                    "lines": lines,
+                    "image": render_text_image(lines, size, font_path=font_path),
+                })
+    return samples
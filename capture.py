@@ -0,0 +1,82 @@
+import sys
+
+import numpy as np
+from PIL import ImageGrab
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QImage
+
+
+def grab_screen(bbox=None):
+    # bbox is in virtual-desktop pixels; all_screens lets it lie on a secondary monitor (Windows)
+    img = ImageGrab.grab(bbox=bbox, all_screens=bbox is not None)
+    return image_to_frame(img)
+
+
+def grab_monitor(screen):
+    # Just the one monitor, at device resolution; the QPixmap carries the screen's devicePixelRatio
+    return screen.grabWindow(0)
+
+
+def grab_monitor_rect(screen, rect):
+    # rect is in the screen's logical coordinates; the pixmap comes back at device resolution
+    return screen.grabWindow(0, rect.x(), rect.y(), rect.width(), rect.height())
+
+
+def preview_pixmap(pixmap, scale):
+    # Nearest-neighbour downscale for the selector to paint from; text only has to be recognisable
+    width, height = max(1, round(pixmap.width() * scale)), max(1, round(pixmap.height() * scale))
+    return pixmap.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio,
+                         Qt.TransformationMode.FastTransformation)
+
+
+# Formats whose buffer can be sliced straight into BGR: bytes per pixel and the cv2 conversion, if any.
+# 32-bit 0xAARRGGBB pixels (what screen grabs are) are stored B, G, R, A on little-endian machines
+_BGR_LAYOUTS = {
+    QImage.Format.Format_BGR888: (3, None),
+    QImage.Format.Format_RGB888: (3, "COLOR_RGB2BGR"),
+}
+if sys.byteorder == "little":
+    for _format in (QImage.Format.Format_RGB32, QImage.Format.Format_ARGB32,
+                    QImage.Format.Format_ARGB32_Premultiplied):
+        _BGR_LAYOUTS[_format] = (4, "COLOR_BGRA2BGR")
+
+
+def pixmap_to_bgr(pixmap, x, y, width, height):
+    # Only the selected rectangle (in device pixels) is converted; the rest never leaves the QPixmap
+    rect = QRect(x, y, width, height).intersected(pixmap.rect())
+    if rect.isEmpty():
+        return None
+    # For a raster pixmap toImage() shares the pixmap's buffer, so the conversion below writes the only copy
+    image = pixmap.toImage()
+    if image.format() not in _BGR_LAYOUTS:
+        image = image.copy(rect).convertToFormat(QImage.Format.Format_BGR888)
+        rect = image.rect()
+    channels, conversion = _BGR_LAYOUTS[image.format()]
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    pixels = rows[rect.top():rect.bottom() + 1, rect.left() * channels:(rect.right() + 1) * channels]
+    pixels = pixels.reshape(rect.height(), rect.width(), channels)
+    if conversion is None:
+        # Copied out of the QImage, which frees its buffer when it goes away
+        return pixels.copy()
+    import cv2  # warmed up by the startup loader, kept out of the selector's import cost
+    return cv2.cvtColor(pixels, getattr(cv2, conversion))
+
+
+def image_to_frame(img):
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    # The only full-size copy: PIL's internal buffer -> one contiguous (h, w, 3) RGB array
+    return np.asarray(img)
+
+
+def crop_to_bgr(frame, x, y, width, height):
+    height_px, width_px = frame.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width_px, x + width), min(height_px, y + height)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    import cv2  # warmed up by the startup loader, kept out of the selector's import cost
+    # The slice is a view; cvtColor writes the only copy, of just the selected rectangle
+    return cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_RGB2BGR)
@@ -1,16 +1,18 @@
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QCheckBox, QListWidget, QListWidgetItem,
-    QPushButton, QApplication, QMessageBox, QHBoxLayout
+    QPushButton, QMessageBox, QHBoxLayout, QLineEdit
 )
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon
-import json
 import os
-import pyperclip
+from sinks import copy_to_clipboard
 from tts import speak_text
+from utils import settings
+
+SEARCH_DELAY_MS = 250
 
 class ConfigUI(QWidget):
-    def __init__(self, history=None):
+    def __init__(self, history_store=None):
         super().__init__()
         self.initial_config = {}
         self.setWindowTitle("MultiLangOCR")
@@ -19,7 +21,13 @@ class ConfigUI(QWidget):
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
 
-        self.history = history or []
+        self.history_store = history_store
+        # Smallest id loaded so far; the next page continues below it
+        self._oldest_id = None
+        self._has_more = False
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.load_history)
         self.status_timer = QTimer(self)
         self.status_timer.setSingleShot(True)
         self.status_timer.timeout.connect(self.clear_status)
@@ -31,8 +39,14 @@ class ConfigUI(QWidget):
         self.connect_signals()
 
     def init_ui(self):
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search history...")
+        self.search_box.textChanged.connect(lambda: self.search_timer.start(SEARCH_DELAY_MS))
+
         self.list_widget = QListWidget()
+        self.list_widget.setUniformItemSizes(True)
         self.list_widget.itemClicked.connect(self.handle_item_click)
+        self.list_widget.verticalScrollBar().valueChanged.connect(self.handle_scroll)
 
         self.auto_copy_checkbox = QCheckBox("Copy to Clipboard on capture")
         self.auto_tts_checkbox = QCheckBox("Automatic TTS Playback for every capture")
@@ -55,6 +69,7 @@ class ConfigUI(QWidget):
 
         layout = QVBoxLayout()
         layout.addWidget(QLabel("Recent Scans:"))
+        layout.addWidget(self.search_box)
         layout.addWidget(self.list_widget)
         layout.addWidget(self.auto_copy_checkbox)
         layout.addWidget(self.auto_tts_checkbox)
@@ -84,21 +99,19 @@ class ConfigUI(QWidget):
         self.status_label.setText("")
 
     def load_config(self):
-        if os.path.exists("config.json"):
-            with open("config.json", "r") as f:
-                data = json.load(f)
+        data = settings.all()
 
-            self.auto_copy_checkbox.blockSignals(True)
-            self.auto_tts_checkbox.blockSignals(True)
-            self.prefer_ja_checkbox.blockSignals(True)
+        self.auto_copy_checkbox.blockSignals(True)
+        self.auto_tts_checkbox.blockSignals(True)
+        self.prefer_ja_checkbox.blockSignals(True)
 
-            self.auto_copy_checkbox.setChecked(data.get("auto_copy", True))
-            self.auto_tts_checkbox.setChecked(data.get("auto_tts", False))
-            self.prefer_ja_checkbox.setChecked(data.get("prefer_ja_over_zh", False))
+        self.auto_copy_checkbox.setChecked(data.get("auto_copy", True))
+        self.auto_tts_checkbox.setChecked(data.get("auto_tts", False))
+        self.prefer_ja_checkbox.setChecked(data.get("prefer_ja_over_zh", False))
 
-            self.auto_copy_checkbox.blockSignals(False)
-            self.auto_tts_checkbox.blockSignals(False)
-            self.prefer_ja_checkbox.blockSignals(False)
+        self.auto_copy_checkbox.blockSignals(False)
+        self.auto_tts_checkbox.blockSignals(False)
+        self.prefer_ja_checkbox.blockSignals(False)
 
     def save_config(self):
         data = {
@@ -106,8 +119,11 @@ class ConfigUI(QWidget):
             "auto_tts": self.auto_tts_checkbox.isChecked(),
             "prefer_ja_over_zh": self.prefer_ja_checkbox.isChecked()
         }
-        with open("config.json", "w") as f:
-            json.dump(data, f, indent=4)
+        try:
+            settings.update(data)
+        except OSError as e:
+            self.show_status(f"Failed to save preferences: {e}", color="red")
+            return
 
         self.record_initial_state()
         self.show_status("Preferences saved.", color="green")
@@ -124,20 +140,45 @@ class ConfigUI(QWidget):
         else:
             self.clear_status()
 
+    def _make_item(self, entry):
+        text = entry.get("text", "")[:60].replace("\n", " ")
+        lang = entry.get("lang", "")
+        list_item = QListWidgetItem(f"[{lang}] {text}")
+        list_item.setData(Qt.ItemDataRole.UserRole, entry)
+        return list_item
+
     def load_history(self):
         self.list_widget.clear()
-        for item in self.history[:20]:
-            text = item.get("text", "")[:60].replace("\n", " ")
-            lang = item.get("lang", "")
-            list_item = QListWidgetItem(f"[{lang}] {text}")
-            list_item.setData(Qt.ItemDataRole.UserRole, item)
-            self.list_widget.addItem(list_item)
+        self._oldest_id = None
+        self._has_more = self.history_store is not None
+        self.load_more_history()
+
+    def load_more_history(self):
+        if not self._has_more:
+            return
+        page = self.history_store.page(self.search_box.text(), before_id=self._oldest_id)
+        self._has_more = bool(page)
+        for entry in page:
+            self.list_widget.addItem(self._make_item(entry))
+        if page:
+            self._oldest_id = page[-1]["id"]
+
+    def handle_scroll(self, value):
+        if value >= self.list_widget.verticalScrollBar().maximum():
+            self.load_more_history()
+
+    def add_entry(self, entry):
+        # New captures go on top without reloading; during a search only matching ones are shown
+        query = self.search_box.text().strip().lower()
+        if query and query not in entry.get("text", "").lower():
+            return
+        self.list_widget.insertItem(0, self._make_item(entry))
 
     def handle_item_click(self, item):
         entry = item.data(Qt.ItemDataRole.UserRole)
         speak_text(entry["text"], entry["lang"])
         if self.auto_copy_checkbox.isChecked():
-            pyperclip.copy(entry["text"])
+            copy_to_clipboard(entry["text"])
             self.show_status("Copied to clipboard.")
 
     def confirm_restore_defaults(self):
@@ -166,9 +207,8 @@ class ConfigUI(QWidget):
             box.stateChanged.connect(self.check_unsaved_changes)
 
 
-def launch_config_ui(history=[]):
-    app = QApplication.instance()
-    win = ConfigUI(history=history)
+def launch_config_ui(history_store=None):
+    win = ConfigUI(history_store=history_store)
     win.show()
     win.raise_()
     win.activateWindow()
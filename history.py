@@ -0,0 +1,169 @@
+import queue
+import sqlite3
+import threading
+import time
+
+from logs import get_logger
+
+log = get_logger("HISTORY")
+
+PAGE_SIZE = 100
+# Captures queued by add() are written in one transaction per batch
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 0.5
+# The trigram tokenizer needs at least this many characters to use the index
+MIN_INDEXED_QUERY = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    lang TEXT NOT NULL,
+    confidence REAL,
+    text TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS captures_ai AFTER INSERT ON captures BEGIN
+    INSERT INTO captures_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS captures_ad AFTER DELETE ON captures BEGIN
+    INSERT INTO captures_fts(captures_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def _row_to_entry(row):
+    return {"id": row[0], "created": row[1], "lang": row[2], "confidence": row[3], "text": row[4]}
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class HistoryStore:
+    """Capture history in SQLite with an FTS5 index over the text.
+
+    add() only queues the entry; a writer thread commits queued captures in batches so the
+    GUI thread never waits on disk. Reads use their own connection (WAL mode) and page by
+    id, newest first, so they stay cheap however large the table grows.
+    """
+
+    def __init__(self, path="history.db"):
+        self.path = path
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._create_schema(self._reader)
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self, conn):
+        try:
+            # Trigram tokens match substrings, which also covers CJK text without word breaks
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS captures_fts USING fts5("
+                         "text, content='captures', content_rowid='id', tokenize='trigram')")
+        except sqlite3.OperationalError:
+            log.warning("SQLite has no trigram tokenizer, falling back to unicode61")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS captures_fts USING fts5("
+                         "text, content='captures', content_rowid='id')")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    # --- Writes ---
+
+    def add(self, text, lang, confidence=None, created=None):
+        entry = {"created": created or time.time(), "lang": lang, "confidence": confidence, "text": text}
+        self._queue.put(entry)
+        return entry
+
+    def flush(self, timeout=5):
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._reader.close()
+
+    def _write_loop(self):
+        conn = self._connect()
+        running = True
+        while running:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while True:
+                if item is None:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO captures (created, lang, confidence, text) "
+                            "VALUES (:created, :lang, :confidence, :text)", batch)
+                except sqlite3.Error as e:
+                    log.error("Failed to save captures", count=len(batch), error=str(e))
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    # --- Reads ---
+
+    def page(self, query="", before_id=None, limit=PAGE_SIZE):
+        # Newest first; pass the smallest id of the previous page to continue
+        before_id = before_id if before_id is not None else 2 ** 63 - 1
+        query = query.strip()
+        with self._read_lock:
+            if not query:
+                rows = self._reader.execute(
+                    "SELECT id, created, lang, confidence, text FROM captures "
+                    "WHERE id < ? ORDER BY id DESC LIMIT ?", (before_id, limit)).fetchall()
+            elif len(query) >= MIN_INDEXED_QUERY:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self._reader.execute(
+                    "SELECT c.id, c.created, c.lang, c.confidence, c.text FROM captures_fts f "
+                    "JOIN captures c ON c.id = f.rowid "
+                    "WHERE captures_fts MATCH ? AND f.rowid < ? ORDER BY f.rowid DESC LIMIT ?",
+                    (phrase, before_id, limit)).fetchall()
+            else:
+                rows = self._reader.execute(
+                    "SELECT id, created, lang, confidence, text FROM captures "
+                    "WHERE text LIKE ? ESCAPE '\\' AND id < ? ORDER BY id DESC LIMIT ?",
+                    (f"%{_escape_like(query)}%", before_id, limit)).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def count(self):
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store(path=None):
+    global _store
+    with _store_lock:
+        if _store is None:
+            from utils import settings
+            _store = HistoryStore(path or settings.get("history_path", "history.db"))
+    return _store
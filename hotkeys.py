@@ -1,21 +1,44 @@
 import keyboard
-import threading
 import re
+from logs import get_logger
+from scheduler import HotkeyDispatcher
+
+log = get_logger("Hotkeys")
 
 HOTKEY_PATTERN = r'^(?:(?:ctrl|alt|shift)\+)*(?:[a-z0-9])$'
 
+_registered = []
+# Key presses are handed to one dispatcher thread instead of a new thread each
+dispatcher = HotkeyDispatcher()
+
 def is_valid_hotkey(hotkey: str) -> bool:
     return re.match(HOTKEY_PATTERN, hotkey.lower()) is not None
 
-def setup_hotkeys(ocr_hotkey, ocr_callback, tts_hotkey, tts_callback):
-    if not is_valid_hotkey(ocr_hotkey) or not is_valid_hotkey(tts_hotkey):
-        print(
-            "[Hotkeys] Invalid hotkey format. Use combinations like ctrl+q, alt+f, ctrl+alt+shift+k"
-        )
+def _bind(hotkey, callback):
+    return keyboard.add_hotkey(hotkey, lambda: dispatcher.fire(hotkey, callback))
+
+def setup_hotkeys(ocr_hotkey, ocr_callback, tts_hotkey, tts_callback, watch_hotkey=None, watch_callback=None,
+                  debounce_ms=None):
+    if not is_valid_hotkey(ocr_hotkey) or not is_valid_hotkey(tts_hotkey) or \
+            (watch_hotkey and not is_valid_hotkey(watch_hotkey)):
+        log.warning("Invalid hotkey format. Use combinations like ctrl+q, alt+f, ctrl+alt+shift+k")
         return
 
-    print(f"[Hotkeys] Registering OCR hotkey: {ocr_hotkey}")
-    print(f"[Hotkeys] Registering TTS hotkey: {tts_hotkey}")
+    clear_hotkeys()
+    if debounce_ms is not None:
+        dispatcher.debounce_ms = debounce_ms
+    log.info("Registering OCR hotkey", hotkey=ocr_hotkey)
+    log.info("Registering TTS hotkey", hotkey=tts_hotkey)
+
+    _registered.append(_bind(ocr_hotkey, ocr_callback))
+    _registered.append(_bind(tts_hotkey, tts_callback))
+    if watch_hotkey and watch_callback:
+        log.info("Registering watch hotkey", hotkey=watch_hotkey)
+        _registered.append(_bind(watch_hotkey, watch_callback))
 
-    keyboard.add_hotkey(ocr_hotkey, lambda: threading.Thread(target=ocr_callback).start())
-    keyboard.add_hotkey(tts_hotkey, lambda: threading.Thread(target=tts_callback).start())
+def clear_hotkeys():
+    while _registered:
+        try:
+            keyboard.remove_hotkey(_registered.pop())
+        except (KeyError, ValueError):
+            pass
@@ -0,0 +1,86 @@
+import json
+import logging
+import sys
+import threading
+
+ROOT_LOGGER = "multilangocr"
+_LOGGING_KWARGS = {"exc_info", "stack_info", "stacklevel", "extra"}
+
+_configured = False
+_config_lock = threading.Lock()
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 10 else f"{value:.1f}"
+    if isinstance(value, str) and (not value or any(c.isspace() for c in value)):
+        return repr(value)
+    return str(value)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Keyword arguments become structured fields:
+
+    log.info("Detected text", lang="ja", conf=0.91)  ->  [OCR] Detected text lang=ja conf=0.910
+    """
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _LOGGING_KWARGS}
+        kwargs["extra"] = {"tag": self.extra["tag"], "fields": fields}
+        return msg, kwargs
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"[{getattr(record, 'tag', record.name)}] "
+        if record.levelno >= logging.WARNING:
+            line += f"{record.levelname}: "
+        line += record.getMessage()
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={_format_value(v)}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "tag": getattr(record, "tag", record.name),
+            "msg": record.getMessage(),
+            "process": record.process,
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level=None, json_path=None):
+    # Safe to call again (e.g. from worker processes or after a settings change); replaces handlers
+    global _configured
+    with _config_lock:
+        logger = logging.getLogger(ROOT_LOGGER)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        logger.setLevel((level or "INFO").upper())
+        logger.propagate = False
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(TextFormatter())
+        logger.addHandler(console)
+        if json_path:
+            file_handler = logging.FileHandler(json_path, encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            logger.addHandler(file_handler)
+        _configured = True
+
+
+def get_logger(tag):
+    if not _configured:
+        setup_logging()
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{tag.lower()}"), {"tag": tag})
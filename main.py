@@ -1,105 +1,240 @@
 import sys
 import os
-import json
-import threading
-import pyperclip
 import ctypes
-from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QStyle, QWidget
-from PyQt6.QtCore import QTimer, pyqtSignal, QObject
-from PyQt6.QtGui import QIcon, QAction
-
-from selector import RegionSelector
-from ocr import extract_text_with_lang
-from tts import speak_text
-from ui import FlashOverlay
-from hotkeys import setup_hotkeys
-from configui import launch_config_ui
-
-recent_history = []
-MAX_HISTORY = 20
-
-temp_last_text = ""
-temp_last_lang = "en"
-
-overlay = tray = selector = main_invoker = config_window = None
+import multiprocessing
+import threading
+import time
+from startup import startup_timer, loader, timed_import, LOADING, READY, FAILED
+from logs import get_logger, setup_logging
+from tracing import start_trace, trace_writer, metrics
+
+with startup_timer.measure("PyQt6"):
+    from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QStyle, QWidget
+    from PyQt6.QtCore import QTimer, pyqtSignal, QObject
+    from PyQt6.QtGui import QIcon, QAction
+
+with startup_timer.measure("selector"):
+    from selector import RegionSelector
+with startup_timer.measure("ocr_worker"):
+    from ocr_worker import OCRWorkerPool, RemoteOCRPool
+with startup_timer.measure("tts"):
+    from tts import speak_text, load_tts, tts_worker
+with startup_timer.measure("ui"):
+    from ui import FlashOverlay, MetricsWindow
+with startup_timer.measure("hotkeys"):
+    from hotkeys import setup_hotkeys
+with startup_timer.measure("configui"):
+    from configui import launch_config_ui
+with startup_timer.measure("watch"):
+    from watch import RegionWatcher
+from scheduler import JobScheduler, CAPTURE, WATCH
+from memory import MemoryManager, format_memory
+from sinks import SinkPipeline, ClipboardSink, OverlaySink, TTSSink, HistorySink, FileSink, SocketSink
+from utils import settings
+from history import get_history_store
+
+log = get_logger("OCR")
+
+# Text and language of the last capture, read by the TTS hotkey on the dispatcher thread
+last_capture = ("", "en")
+last_capture_lock = threading.Lock()
+
+overlay = tray = selector = main_invoker = config_window = ocr_pool = watcher = history_store = None
+scheduler = metrics_window = memory_manager = sinks = socket_sink = None
+# "capture" for a one-off OCR, "watch" when the selection pins the region for watch mode
+selector_mode = "capture"
 
 class MainThreadInvoker(QObject):
     show_selector_signal = pyqtSignal()
+    toggle_watch_signal = pyqtSignal()
 
-def load_hotkeys():
-    default_keys = {
-        "ocr_hotkey": "alt+q",
-        "tts_hotkey": "alt+w"
-    }
-    try:
-        if os.path.exists("config.json"):
-            with open("config.json", "r") as f:
-                config = json.load(f)
-                return {
-                    "ocr_hotkey": config.get("ocr_hotkey", default_keys["ocr_hotkey"]),
-                    "tts_hotkey": config.get("tts_hotkey", default_keys["tts_hotkey"])
-                }
-    except Exception as e:
-        print(f"[CONFIG] Failed to load hotkeys: {e}")
-    return default_keys
-
-def _show_selector_on_main_thread():
-    global selector
+def _show_selector_on_main_thread(mode="capture"):
+    global selector, selector_mode
     if selector is None:
         selector = RegionSelector()
+        selector.region_selected.connect(_on_region_selected)
         selector.selection_done.connect(handle_region)
+    if selector.isVisible():
+        # Already waiting for a selection; a second press must not start another
+        return
+    # Unloaded after an idle period: start loading now so the model is ready by the mouse release
+    ocr_pool.wake()
+    selector_mode = mode
     QTimer.singleShot(100, lambda: selector.show())
 
 def ocr_scan_callback():
     main_invoker.show_selector_signal.emit()
 
+def watch_callback():
+    main_invoker.toggle_watch_signal.emit()
+
+def _toggle_watch_on_main_thread():
+    if watcher.running:
+        watcher.stop()
+        if overlay:
+            overlay.display_text("Watch mode off")
+    else:
+        _show_selector_on_main_thread("watch")
+
+def _on_region_selected(bbox):
+    if selector_mode == "watch":
+        watcher.start(bbox)
+        if overlay:
+            overlay.display_text("Watching region, press the watch hotkey again to stop")
+
 def tts_callback():
-    if temp_last_text:
-        speak_text(temp_last_text, temp_last_lang)
-
-def load_app_settings():
-    defaults = {
-        "auto_copy": True,
-        "auto_tts": False
-    }
-    try:
-        if os.path.exists("config.json"):
-            with open("config.json", "r") as f:
-                data = json.load(f)
-                return {**defaults, **data}
-    except Exception as e:
-        print(f"[CONFIG] Failed to load app settings: {e}")
-    return defaults
+    with last_capture_lock:
+        text, lang = last_capture
+    if text:
+        speak_text(text, lang)
+
+def register_hotkeys():
+    setup_hotkeys(settings.get("ocr_hotkey"), ocr_scan_callback, settings.get("tts_hotkey"), tts_callback,
+                  settings.get("watch_hotkey"), watch_callback, settings.get("hotkey_debounce_ms", 300))
+
+def _configure_watcher():
+    watcher.interval_ms = settings.get("watch_interval_ms", 500)
+    watcher.max_interval_ms = settings.get("watch_max_interval_ms", 4000)
+    watcher.change_ratio = settings.get("watch_change_ratio", 0.01)
+
+def _on_settings_changed(changed, _):
+    if {"ocr_hotkey", "tts_hotkey", "watch_hotkey", "hotkey_debounce_ms"} & changed:
+        register_hotkeys()
+    if "job_limits" in changed:
+        scheduler.set_limits(settings.get("job_limits"))
+    if any(key.startswith("watch_") for key in changed):
+        _configure_watcher()
+    for key in sorted({"ocr_workers", "ocr_server_url"} & changed):
+        get_logger("CONFIG").info(f"{key} changed; applies after a restart")
+    if {"log_level", "log_json_path"} & changed:
+        configure_logging()
+    if "trace_path" in changed:
+        trace_writer.configure(settings.get("trace_path"))
+    if "output_socket_port" in changed:
+        socket_sink.configure()
+
+def configure_logging():
+    setup_logging(settings.get("log_level", "INFO"), settings.get("log_json_path"))
+
+def start_background_loading():
+    loader.register("cv2", lambda: timed_import("cv2"))
+    loader.register("tts", load_tts)
+    loader.start()
+
+def _on_engine_state(state):
+    if state == READY:
+        log.info("Engine ready")
+    elif state == FAILED:
+        log.error("Engine failed to load in every worker")
+        if overlay:
+            overlay.display_text("OCR engine failed to load")
 
 def handle_region(img_array):
-    global temp_last_text, temp_last_lang
+    global selector_mode
+    if selector_mode == "watch":
+        # The region was already handed to the watcher, which runs its own OCR
+        selector_mode = "capture"
+        return
 
     if img_array is None:
-        print("[OCR] No valid image selected.")
+        log.info("No valid image selected")
+        return
+
+    if ocr_pool.state == FAILED:
+        log.warning("Engine unavailable, capture dropped")
         return
 
-    text, lang = extract_text_with_lang(img_array)
+    # Jobs submitted before a worker is ready wait in the task queue
+    job_id = submit_capture(img_array, selector.trace)
+    if ocr_pool.state == LOADING:
+        log.info("Engine still loading, queued capture", job=job_id)
+        if overlay:
+            overlay.display_text("Loading OCR engine...")
+
+def submit_capture(img_array, trace=None, kind=CAPTURE):
+    # Also called from the watch thread; a new capture supersedes older ones still pending
+    return scheduler.submit(kind, img_array, (trace, time.perf_counter()))
+
+def submit_watch_capture(img_array, trace=None):
+    return submit_capture(img_array, trace, WATCH)
+
+def _on_ocr_failed(job_id, reason, context):
+    watcher.finish(job_id)
+    trace = context[0]
+    if trace is not None:
+        trace.set(error=reason)
+        trace.finish()
+    log.error("Capture failed", job=job_id, reason=reason)
+
+def _on_job_cancelled(job_id, context):
+    trace = context[0]
+    if trace is not None:
+        trace.set(superseded=True)
+        trace.finish()
+
+def _trace_ocr(trace, submitted, result):
+    trace.add("ocr_roundtrip", (time.perf_counter() - submitted) * 1000)
+    for name, value in result.get("timings", {}).items():
+        if name.endswith("_ms"):
+            trace.add(f"ocr_{name[:-3]}", value)
+    timings = result.get("timings", {})
+    trace.set(lang=result.get("lang"), chars=len(result.get("text", "")),
+              cache=timings.get("cache"), profile=timings.get("profile"), bucket=timings.get("bucket"),
+              escalated=timings.get("escalated"), improved=timings.get("improved"))
+    if timings.get("bucket") and "predict_ms" in timings:
+        # Inference runs in the worker processes; their per-bucket stats are mirrored here
+        metrics.observe(f"ocr.bucket.{timings['bucket']}", timings["predict_ms"])
+
+def _on_ocr_result(job_id, result, context):
+    global last_capture
+
+    trace, submitted = context
+    if trace is not None:
+        _trace_ocr(trace, submitted, result)
+
+    if watcher.owns(job_id):
+        # Unchanged text from watch mode is dropped before it reaches the clipboard or TTS
+        result = watcher.finish(job_id, result)
+        if result is None:
+            if trace is not None:
+                trace.set(dropped=True)
+                trace.finish()
+            return
+
+    text, lang = result["text"], result["lang"]
     if not text:
+        if trace is not None:
+            trace.finish()
         return
 
-    temp_last_text = text
-    temp_last_lang = lang
+    with last_capture_lock:
+        last_capture = (text, lang)
 
-    settings = load_app_settings()
-    if settings.get("auto_copy", True):
-        pyperclip.copy(text)
-    if overlay:
-        overlay.display_text(text)
-    if settings.get("auto_tts", False):
-        threading.Thread(target=speak_text, args=(text, lang), daemon=True).start()
+    # Clipboard, overlay, TTS, history and the optional file/socket outputs run asynchronously;
+    # the trace is finished once the last of them is done
+    sinks.publish({
+        "text": text,
+        "lang": lang,
+        "confidence": result.get("confidence"),
+        "lines": result.get("lines", []),
+        "scores": result.get("scores", []),
+    }, trace or start_trace("capture"))
 
-    recent_history.insert(0, {"text": text, "lang": lang})
+def _on_history_added(entry):
     if config_window and config_window.isVisible():
-        config_window.history = recent_history
-        config_window.load_history()
-
-    if len(recent_history) > MAX_HISTORY:
-        recent_history.pop()
+        config_window.add_entry(entry)
+
+def build_sinks():
+    global socket_sink
+    pipeline = SinkPipeline()
+    pipeline.add(ClipboardSink(settings))
+    pipeline.add(OverlaySink(overlay))
+    pipeline.add(TTSSink(settings, speak_text))
+    pipeline.add(HistorySink(history_store, _on_history_added))
+    pipeline.add(FileSink(settings))
+    socket_sink = pipeline.add(SocketSink(settings))
+    socket_sink.configure()
+    return pipeline
 
 class TrayApp:
     def __init__(self, app):
@@ -117,6 +252,10 @@ class TrayApp:
         self.open_action.triggered.connect(self.open_main_window)
         self.menu.addAction(self.open_action)
 
+        self.metrics_action = QAction("Latency Stats")
+        self.metrics_action.triggered.connect(self.open_metrics_window)
+        self.menu.addAction(self.metrics_action)
+
         self.menu.addSeparator()
 
         self.exit_action = QAction("Exit")
@@ -129,12 +268,20 @@ class TrayApp:
     def open_main_window(self):
         global config_window
         if config_window is None or not config_window.isVisible():
-            config_window = launch_config_ui(history=recent_history)
+            config_window = launch_config_ui(history_store=history_store)
             config_window.show()
         else:
             config_window.raise_()
             config_window.activateWindow()
 
+    def open_metrics_window(self):
+        global metrics_window
+        if metrics_window is None:
+            metrics_window = MetricsWindow(lambda: format_memory(memory_manager.report()))
+        metrics_window.show()
+        metrics_window.raise_()
+        metrics_window.activateWindow()
+
     def cleanup(self):
         self.tray_icon.hide()
         self.tray_icon.deleteLater()
@@ -151,30 +298,69 @@ def refresh_tray_area():
         ctypes.windll.user32.InvalidateRect(hwnd, None, True)
 
 def main():
-    global overlay, tray, selector, main_invoker
-    print("Starting MultiLangOCR...")
+    global overlay, tray, selector, main_invoker, ocr_pool, watcher, history_store, scheduler, memory_manager, sinks
+    configure_logging()
+    trace_writer.configure(settings.get("trace_path"))
+    get_logger("MAIN").info("Starting MultiLangOCR...")
 
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
 
     main_invoker = MainThreadInvoker()
     main_invoker.show_selector_signal.connect(_show_selector_on_main_thread)
+    main_invoker.toggle_watch_signal.connect(_toggle_watch_on_main_thread)
+
+    if settings.get("ocr_server_url"):
+        # Share the model loaded by ocr_server.py instead of starting local workers
+        ocr_pool = RemoteOCRPool(settings.get("ocr_server_url"))
+    else:
+        ocr_pool = OCRWorkerPool(settings.get("ocr_workers", 1))
+    scheduler = JobScheduler(ocr_pool.submit, ocr_pool.cancel, settings.get("job_limits"),
+                             on_result=_on_ocr_result, on_failed=_on_ocr_failed, on_cancelled=_on_job_cancelled)
+    ocr_pool.result_ready.connect(scheduler.job_done)
+    ocr_pool.job_failed.connect(scheduler.job_failed)
+    ocr_pool.state_changed.connect(_on_engine_state)
+
+    history_store = get_history_store()
+
+    memory_manager = MemoryManager(ocr_pool, settings)
+    memory_manager.register("selector screenshot", lambda: selector.frame_bytes() if selector else 0,
+                            lambda: selector.release_frame() if selector and not selector.isVisible() else None)
+    if isinstance(ocr_pool, OCRWorkerPool):
+        memory_manager.register("queued captures", ocr_pool.pending_bytes)
+
+    watcher = RegionWatcher(submit_watch_capture)
+    _configure_watcher()
 
     overlay = FlashOverlay()
     overlay.hide()
+    sinks = build_sinks()
 
     tray_controller = TrayApp(app)
     overlay.display_text("MultiLangOCR is running")
 
-    keys = load_hotkeys()
-    QTimer.singleShot(0, lambda: setup_hotkeys(keys["ocr_hotkey"], ocr_scan_callback, keys["tts_hotkey"], tts_callback))
+    QTimer.singleShot(0, register_hotkeys)
+    settings.subscribe(_on_settings_changed)
+    settings.start_watching()
+    QTimer.singleShot(0, lambda: startup_timer.mark("tray and hotkeys ready"))
+    QTimer.singleShot(0, start_background_loading)
+    QTimer.singleShot(0, ocr_pool.start)
+    QTimer.singleShot(0, memory_manager.start)
 
     keep_alive = QTimer()
     keep_alive.start(10000)
     keep_alive.timeout.connect(lambda: None)
 
     app.aboutToQuit.connect(tray_controller.cleanup)
+    app.aboutToQuit.connect(watcher.stop)
+    app.aboutToQuit.connect(memory_manager.stop)
+    app.aboutToQuit.connect(ocr_pool.stop)
+    app.aboutToQuit.connect(sinks.close)
+    app.aboutToQuit.connect(tts_worker.shutdown)
+    app.aboutToQuit.connect(history_store.close)
+    app.aboutToQuit.connect(trace_writer.close)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
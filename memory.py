@@ -0,0 +1,153 @@
+import gc
+import os
+import sys
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+from logs import get_logger
+from startup import READY
+
+log = get_logger("MEMORY")
+
+CHECK_INTERVAL_MS = 30_000
+MB = 1024 * 1024
+
+
+def _windows_rss(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    handle = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+    finally:
+        ctypes.windll.kernel32.CloseHandle(handle)
+
+
+def process_rss(pid=None):
+    # Resident set size in bytes (working set on Windows), or None when it cannot be read
+    pid = pid or os.getpid()
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if sys.platform == "win32":
+        return _windows_rss(pid)
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def format_memory(report):
+    lines = [f"{'process':<24} {'RSS MB':>9}"]
+    for name, rss in report["processes"].items():
+        lines.append(f"{name:<24} {rss / MB if rss is not None else float('nan'):>9.1f}")
+    lines.append(f"{'total':<24} {report['total'] / MB:>9.1f}")
+    if report["components"]:
+        lines.append("")
+        lines.append(f"{'component':<24} {'MB':>9}")
+        for name, size in report["components"].items():
+            lines.append(f"{name:<24} {size / MB:>9.1f}")
+    return "\n".join(lines)
+
+
+class MemoryManager(QObject):
+    """Keeps the always-running tray process small between captures.
+
+    Every CHECK_INTERVAL_MS the OCR workers are unloaded once they have been idle for
+    ocr_idle_unload_s; the next capture (or the selector opening) loads them again. When
+    memory_limit_mb is set and the tray process plus its workers use more than that, every
+    registered component is released and idle workers are unloaded straight away.
+    """
+
+    def __init__(self, pool, settings):
+        super().__init__()
+        self.pool = pool
+        self.settings = settings
+        # name -> (size_fn() -> bytes, release_fn or None)
+        self._components = {}
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+
+    def register(self, name, size_fn, release_fn=None):
+        self._components[name] = (size_fn, release_fn)
+
+    def start(self):
+        self.timer.start(CHECK_INTERVAL_MS)
+
+    def stop(self):
+        self.timer.stop()
+
+    def report(self):
+        processes = {"tray": process_rss()}
+        worker_pids = getattr(self.pool, "worker_pids", None)
+        for worker_id, pid in (worker_pids() if worker_pids else {}).items():
+            processes[f"ocr worker {worker_id}"] = process_rss(pid)
+        components = {}
+        for name, (size_fn, _) in self._components.items():
+            try:
+                components[name] = size_fn() or 0
+            except Exception as e:
+                log.warning("Could not measure component", component=name, error=str(e))
+        return {
+            "processes": processes,
+            "components": components,
+            "total": sum(rss for rss in processes.values() if rss),
+        }
+
+    def check(self):
+        idle_s = self.settings.get("ocr_idle_unload_s", 600)
+        unload = getattr(self.pool, "unload", None)
+        if unload and idle_s and self.pool.state == READY and time.monotonic() - self.pool.last_active > idle_s:
+            unload()
+
+        limit_mb = self.settings.get("memory_limit_mb", 0)
+        if not limit_mb:
+            return
+        report = self.report()
+        if report["total"] <= limit_mb * MB:
+            return
+        log.warning("Over the memory limit, releasing caches and idle models",
+                    rss_mb=round(report["total"] / MB), limit_mb=limit_mb)
+        self.release()
+        log.info("After release", rss_mb=round(self.report()["total"] / MB))
+
+    def release(self):
+        for name, (_, release_fn) in self._components.items():
+            if release_fn is None:
+                continue
+            try:
+                release_fn()
+            except Exception as e:
+                log.warning("Could not release component", component=name, error=str(e))
+        unload = getattr(self.pool, "unload", None)
+        if unload:
+            unload()
+        gc.collect()
@@ -1,124 +1,626 @@
 import logging
+import threading
+import time
 import numpy as np
-import unicodedata
-from paddleocr import PaddleOCR
-import paddle
-import paddleocr
-from utils import load_app_settings
-from opencc import OpenCC
-
-print("[DEBUG] PaddleOCR version:", paddleocr.__version__)
+from multiprocessing.util import Finalize
+from utils import settings
+from ocr_cache import OCRCache, EXACT, PERCEPTUAL
+from script_classifier import get_classifier, load_chinese_index
+from tiling import plan_tiles, merge_tile_lines
+from profiles import ProfileManager, ACCURATE
+from logs import get_logger
+from tracing import metrics
+
 logging.getLogger('ppocr').setLevel(logging.ERROR)
+log = get_logger("OCR")
+cache_log = get_logger("CACHE")
+
+# Backends for each model profile and the OpenCC character index are built on first use
+# (or by the startup loader)
+profiles = ProfileManager(settings)
+_result_cache = None
+_cache_lock = threading.Lock()
+
+def load_engine(profile=None):
+    return profiles.get_backend(profile or profiles.default_profile())
 
-# Initialize PaddleOCR
-if not paddle.device.get_device().startswith("gpu"):
-    print("[WARNING] Running on CPU. For better performance, install the GPU version of PaddlePaddle.")
-ocr = PaddleOCR(
-    use_doc_orientation_classify=False,
-    use_doc_unwarping=False,
-    use_textline_orientation=False,
-    ocr_version="PP-OCRv5",
-)
+def load_recognizer(profile):
+    return profiles.get_recognizer(profile)
+
+def load_engines():
+    # Everything a capture can reach: each profile choose() may pick, plus the cascade recogniser
+    for profile in profiles.candidates():
+        load_engine(profile)
+    second = _cascade_profile()
+    if second:
+        load_recognizer(second)
+
+def load_classifier():
+    return load_chinese_index()
 
 # --- Script-level language detection ---
 
 def detect_unicode_script(text):
-    has_hiragana = has_katakana = has_cjk = has_hangul = has_latin = False
-    for ch in text:
-        if not ch.strip():
-            continue
-        try:
-            name = unicodedata.name(ch)
-            if "HIRAGANA" in name:
-                has_hiragana = True
-            elif "KATAKANA" in name:
-                has_katakana = True
-            elif "HANGUL" in name:
-                has_hangul = True
-            elif "CJK UNIFIED" in name:
-                has_cjk = True
-            elif "LATIN" in name:
-                has_latin = True
-        except ValueError:
-            continue
-
-    if has_hiragana or has_katakana:
-        return "ja"
-    elif has_hangul:
-        return "ko"
-    elif has_cjk:
-        return "zh"
-    elif has_latin:
-        return "en"
-    return "en"
+    return get_classifier().detect_script(text)
 
 def is_kanji_only(text):
-    for ch in text:
-        if not ch.strip():
-            continue
-        try:
-            name = unicodedata.name(ch)
-            if any(tok in name for tok in ("HIRAGANA", "KATAKANA", "HANGUL", "LATIN")):
-                return False
-        except ValueError:
-            continue
-    return True
+    return get_classifier().is_kanji_only(text)
 
 def is_traditional_chinese(text):
-    cc = OpenCC('t2s')  # Traditional → Simplified
-    return cc.convert(text) != text
+    return load_classifier().is_traditional(text)
 
 # --- OCR + Language Wrapper ---
 
-def extract_text_with_lang(img_bgr):
+def classify_language(full_text):
+    prefer_ja = settings.get("prefer_ja_over_zh", False)
+    result = load_classifier().classify(full_text, prefer_ja)
+    counts = result["counts"]
+
+    if counts["han"] and not (counts["hiragana"] or counts["katakana"] or counts["hangul"]):
+        if result["lang"] == "ja":
+            log.debug("Kanji-only text detected — overriding zh/zh-tw → ja due to user preference")
+        elif result["lang"] == "zh-tw":
+            log.debug("Chinese text appears Traditional → using zh-tw")
+        elif not prefer_ja:
+            log.debug("Chinese text appears Simplified → using zh")
+
+    return result
+
+def detect_language(full_text):
+    return classify_language(full_text)["lang"]
+
+def _empty_result(timings=None):
+    return {
+        "text": "",
+        "lang": "en",
+        "confidence": 0.0,
+        "lines": [],
+        "scores": [],
+        "boxes": [],
+        "timings": timings or {}
+    }
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def get_result_cache():
+    global _result_cache
+    with _cache_lock:
+        if _result_cache is None:
+            mode = settings.get("ocr_cache_mode", "exact")
+            if mode not in (EXACT, PERCEPTUAL):
+                return None
+            _result_cache = OCRCache(
+                max_bytes=int(settings.get("ocr_cache_max_mb", 64) * 1024 * 1024),
+                mode=mode,
+                path=settings.get("ocr_cache_path") or None
+            )
+            if _result_cache.path:
+                # Finalizers also run when a multiprocessing worker exits, unlike atexit hooks
+                Finalize(_result_cache, _result_cache.save, exitpriority=10)
+    return _result_cache
+
+def _on_settings_changed(changed, _):
+    global _result_cache
+    if any(key in ("ocr_backend", "custom_profile") or key.startswith("onnx_") for key in changed):
+        profiles.reset()
+        log.info("Backend settings changed, models will be reloaded on next use")
+    # Cached results depend on how the input was preprocessed as well as on the cache options
+    if any(key.startswith(("ocr_cache_", "tile_", "onnx_", "cascade_")) for key in changed) or \
+            {"normalize_input", "ocr_backend", "ocr_profile", "custom_profile", "onnx_profiles"} & changed:
+        with _cache_lock:
+            if _result_cache is not None:
+                _result_cache.save()
+            _result_cache = None
+        cache_log.info("Cache settings changed, cache will be rebuilt")
+
+settings.subscribe(_on_settings_changed)
+
+def cache_stats():
+    cache = get_result_cache()
+    return cache.stats() if cache else None
+
+def _should_tile(img_bgr):
+    threshold = settings.get("tile_threshold", 2560)
+    return bool(threshold) and max(img_bgr.shape[:2]) > threshold
+
+def profile_stats():
+    return profiles.stats()
+
+def _estimate_line_count(img_bgr):
+    import cv2
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY) if img_bgr.ndim == 3 else img_bgr
+    return estimate_text_height(gray)[1]
+
+def _predict(img_bgr, timings, line_count=None):
+    if line_count is None:
+        line_count = _estimate_line_count(img_bgr)
+    profile = profiles.choose(img_bgr.shape, line_count)
+    timings["profile"] = profile
+
+    if _should_tile(img_bgr):
+        texts, scores, boxes = _predict_tiled(img_bgr, timings, profile)
+    else:
+        padded, bucket = pad_to_bucket(img_bgr)
+        # Loaded outside the timer, so a model load never counts as inference latency
+        engine = load_engine(profile)
+        start = time.perf_counter()
+        texts, scores, boxes = engine.predict(padded)
+        timings["predict_ms"] = _elapsed_ms(start)
+        if bucket:
+            timings["bucket"] = bucket
+            metrics.observe(f"ocr.bucket.{bucket}", timings["predict_ms"])
+        if padded is not img_bgr:
+            boxes = _clip_boxes(boxes, img_bgr.shape[1], img_bgr.shape[0])
+
+    profiles.record(profile, img_bgr.shape, max(line_count, len(texts)), timings["predict_ms"])
+    texts, scores = _cascade(img_bgr, texts, scores, boxes, timings, profile)
+    return texts, scores, boxes
+
+def _predict_tiled(img_bgr, timings, profile):
+    height, width = img_bgr.shape[:2]
+    tile_size = int(settings.get("tile_size", 1280))
+    overlap = int(settings.get("tile_overlap", 192))
+    tiles = plan_tiles(width, height, tile_size, overlap)
+
+    engine = load_engine(profile)
+    # Edge tiles are padded to a bucket like any other input (padding is bottom/right only)
+    crops = [pad_to_bucket(img_bgr[y:y + h, x:x + w])[0] for x, y, w, h in tiles]
+    start = time.perf_counter()
+    # One batched call lets the engine run detection/recognition over all tiles together
+    tile_results = engine.predict_batch(crops)
+    timings["predict_ms"] = _elapsed_ms(start)
+    timings["tiles"] = len(tiles)
+
+    lines = []
+    for index, ((x, y, _, _), (texts, scores, boxes)) in enumerate(zip(tiles, tile_results)):
+        for text, score, box in zip(texts, scores, boxes):
+            if box is None or not text.strip():
+                continue
+            lines.append({
+                "text": text.strip(),
+                "score": score,
+                "box": [box[0] + x, box[1] + y, box[2] + x, box[3] + y],
+                "tile": index
+            })
+
+    start = time.perf_counter()
+    merged = merge_tile_lines(lines)
+    timings["merge_ms"] = _elapsed_ms(start)
+    log.info("Tiled crop", size=f"{width}x{height}", tiles=len(tiles), lines=len(lines), merged=len(merged))
+    return [l["text"] for l in merged], [l["score"] for l in merged], [l["box"] for l in merged]
+
+# --- Confidence cascade ---
+
+def _line_crop(img_bgr, box, upscale):
+    import cv2
+    height, width = img_bgr.shape[:2]
+    x_min, y_min, x_max, y_max = box
+    # Some context around the detected box; tight crops clip ascenders and descenders
+    margin = max(2, (y_max - y_min) // 6)
+    x_min, y_min = max(0, x_min - margin), max(0, y_min - margin)
+    x_max, y_max = min(width, x_max + margin), min(height, y_max + margin)
+    if x_max <= x_min or y_max <= y_min:
+        return None
+    crop = img_bgr[y_min:y_max, x_min:x_max]
+    if upscale > 1:
+        crop = cv2.resize(crop, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_CUBIC)
+    return crop
+
+def _cascade(img_bgr, texts, scores, boxes, timings, profile):
+    """Re-recognises the lines that scored below cascade_threshold.
+
+    Only those line crops go through the second pass: the cascade_profile recogniser, on crops
+    upscaled by cascade_upscale. Each line keeps whichever reading scored higher, so most
+    captures cost one fast pass. timings["escalated"] counts the lines sent to the second
+    pass and timings["improved"] those whose text was replaced.
+    """
+    threshold = settings.get("cascade_threshold", 0.8)
+    if not threshold or not texts or len(scores) != len(texts):
+        return texts, scores
+    second = settings.get("cascade_profile", ACCURATE)
+    upscale = float(settings.get("cascade_upscale", 1.5))
+    if second == profile and upscale <= 1:
+        # The same model on the same pixels would only repeat the first reading
+        return texts, scores
+
+    weak, crops = [], []
+    for index, (score, box) in enumerate(zip(scores, boxes)):
+        if score >= threshold or box is None:
+            continue
+        crop = _line_crop(img_bgr, box, upscale)
+        if crop is not None:
+            weak.append(index)
+            crops.append(crop)
+    timings["escalated"] = len(weak)
+    if not weak:
+        return texts, scores
+
+    try:
+        # Loaded by the worker at start-up; if it was not, loading stays out of cascade_ms
+        recognizer = load_recognizer(second)
+        start = time.perf_counter()
+        readings = recognizer.recognize(crops)
+    except Exception:
+        log.exception("Cascade pass failed, keeping first-pass lines", profile=second, lines=len(crops))
+        return texts, scores
+    timings["cascade_ms"] = _elapsed_ms(start)
+
+    texts, scores = list(texts), list(scores)
+    improved = 0
+    for index, (text, score) in zip(weak, readings):
+        if text.strip() and score > scores[index]:
+            texts[index], scores[index] = text, score
+            improved += 1
+    timings["improved"] = improved
+    log.info("Cascade", profile=second, escalated=len(weak), improved=improved, ms=timings["cascade_ms"])
+    return texts, scores
+
+def _cascade_profile():
+    # The profile whose recogniser the cascade uses, or None when the cascade is off
+    if not settings.get("cascade_threshold", 0.8):
+        return None
+    return settings.get("cascade_profile", ACCURATE)
+
+# --- Shape buckets and warm-up ---
+
+# Synthetic text drawn for warm-up; Latin only, since the Hershey fonts have no CJK glyphs
+WARMUP_TEXT = ["MultiLangOCR warm-up 0123456789", "The quick brown fox jumps over the lazy dog"]
+
+# Padding to a bucket that more than doubles the area costs more inference than the shape reuse saves
+MAX_PAD_RATIO = 2
+
+def bucket_shape(height, width, sides):
+    def round32(n):
+        # The detector rounds each side to a multiple of 32 anyway
+        return -(-n // 32) * 32
+
+    def fit(n):
+        # Up to the first bucket (single lines, short text) sides step by 32
+        if not sides or n <= sides[0]:
+            return round32(n)
+        for side in sides:
+            if n <= side:
+                return side
+        return round32(n)
+
+    shape = fit(height), fit(width)
+    if shape[0] * shape[1] > MAX_PAD_RATIO * round32(height) * round32(width):
+        return round32(height), round32(width)
+    return shape
+
+def pad_to_bucket(img_bgr):
+    """Pads the bottom/right edges up to the shape bucket of each side.
+
+    Paddle (MKLDNN on CPU, cuDNN on GPU) prepares kernels and memory per input shape, so a few
+    recurring shapes are much faster than a new shape per capture. Box coordinates are unchanged
+    by bottom/right padding, and the flat border colour is never detected as text.
+    """
+    sides = sorted(settings.get("shape_buckets") or [])
+    if not sides:
+        return img_bgr, None
+    import cv2
+    height, width = img_bgr.shape[:2]
+    bucket_h, bucket_w = bucket_shape(height, width, sides)
+    bucket = f"{bucket_h}x{bucket_w}"
+    if (bucket_h, bucket_w) == (height, width):
+        return img_bgr, bucket
+    border = np.concatenate([img_bgr[0], img_bgr[-1], img_bgr[:, 0], img_bgr[:, -1]])
+    colour = np.median(border, axis=0)
+    padded = cv2.copyMakeBorder(img_bgr, 0, bucket_h - height, 0, bucket_w - width, cv2.BORDER_CONSTANT,
+                                value=np.atleast_1d(colour).tolist())
+    return padded, bucket
+
+def _clip_boxes(boxes, width, height):
+    return [None if box is None else [min(box[0], width), min(box[1], height), min(box[2], width), min(box[3], height)]
+            for box in boxes]
+
+def _warmup_image(height, width):
+    import cv2
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    line_height = max(16, min(48, height // (len(WARMUP_TEXT) + 1)))
+    scale = line_height / 30
+    for i, line in enumerate(WARMUP_TEXT):
+        y = (i + 1) * line_height + i * line_height // 2
+        if y >= height:
+            break
+        cv2.putText(img, line, (8, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), max(1, int(scale * 2)), cv2.LINE_AA)
+    return img
+
+def warm_up(profile=None):
+    """Runs synthetic text through detection and recognition once per warmup_shapes bucket.
+
+    The first predict() pays for predictor set-up and memory pool allocation, and every new
+    input shape for kernel selection; doing both here keeps that off the first real capture.
+    Without a profile, every profile choose() can pick is warmed, and the cascade recogniser
+    reads one synthetic line.
+    """
+    sides = sorted(settings.get("shape_buckets") or [])
+    shapes = []
+    for height, width in settings.get("warmup_shapes") or []:
+        shape = bucket_shape(height, width, sides) if sides else (height, width)
+        if shape not in shapes:
+            shapes.append(shape)
+
+    for name in [profile] if profile else profiles.candidates():
+        engine = load_engine(name)
+        total = time.perf_counter()
+        for height, width in shapes:
+            start = time.perf_counter()
+            texts, _, _ = engine.predict(_warmup_image(height, width))
+            log.info("Warm-up", profile=name, shape=f"{height}x{width}", ms=_elapsed_ms(start), lines=len(texts))
+        # Its next call is a real capture, and its latency counts towards the profile's estimate
+        profiles.mark_warm(name)
+        log.info("Warm-up done", profile=name, shapes=len(shapes), ms=_elapsed_ms(total))
+
+    second = None if profile else _cascade_profile()
+    if second:
+        start = time.perf_counter()
+        load_recognizer(second).recognize([_warmup_image(32, 640)])
+        log.info("Warm-up done", profile=second, cascade=True, ms=_elapsed_ms(start))
+
+# --- Input normalisation ---
+
+# PP-OCRv5 recognises best when text lines are roughly this tall (its rec input height is 48)
+TARGET_TEXT_HEIGHT = 32
+MIN_TEXT_HEIGHT = 20
+MAX_TEXT_HEIGHT = 56
+MAX_NORMALISED_SIDE = 4000
+BORDER_MARGIN = 8
+
+def _ink_mask(gray):
+    import cv2
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Text is the minority class whichever way round the colours are
+    return binary == 0 if binary.mean() > 0.5 else binary == 1
+
+def estimate_text_height(gray):
+    mask = _ink_mask(gray)
+    rows = mask.mean(axis=1) > 0.005
+    heights = []
+    run = 0
+    for has_ink in rows:
+        if has_ink:
+            run += 1
+        elif run:
+            heights.append(run)
+            run = 0
+    if run:
+        heights.append(run)
+
+    heights = [h for h in heights if h >= 3]
+    if not heights:
+        return None, 0
+    return float(np.median(heights)), len(heights)
+
+def find_content_bounds(gray, threshold=24):
+    border = np.concatenate([gray[0], gray[-1], gray[:, 0], gray[:, -1]])
+    background = np.median(border)
+    mask = np.abs(gray.astype(np.int16) - background) > threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    height, width = gray.shape
+    if rows.size == 0 or cols.size == 0:
+        return 0, 0, width, height
+    x0 = max(0, cols[0] - BORDER_MARGIN)
+    y0 = max(0, rows[0] - BORDER_MARGIN)
+    x1 = min(width, cols[-1] + 1 + BORDER_MARGIN)
+    y1 = min(height, rows[-1] + 1 + BORDER_MARGIN)
+    return int(x0), int(y0), int(x1), int(y1)
+
+def normalize_for_ocr(img_bgr):
+    import cv2
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY) if img_bgr.ndim == 3 else img_bgr
+    x0, y0, x1, y1 = find_content_bounds(gray)
+    img = img_bgr[y0:y1, x0:x1]
+    text_height, line_count = estimate_text_height(gray[y0:y1, x0:x1])
+
+    scale = 1.0
+    if text_height and not (MIN_TEXT_HEIGHT <= text_height <= MAX_TEXT_HEIGHT):
+        scale = TARGET_TEXT_HEIGHT / text_height
+        longest = max(img.shape[:2])
+        scale = min(scale, MAX_NORMALISED_SIDE / longest)
+
+    if abs(scale - 1.0) > 0.05:
+        interpolation = cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=interpolation)
+    else:
+        scale = 1.0
+
+    info = {"scale": round(scale, 4), "offset": (x0, y0), "text_height": text_height, "line_count": line_count}
+    return img, info
+
+def map_boxes_to_original(boxes, info):
+    scale = info["scale"]
+    ox, oy = info["offset"]
+    mapped = []
+    for box in boxes:
+        if box is None:
+            mapped.append(None)
+            continue
+        x_min, y_min, x_max, y_max = box
+        mapped.append([
+            int(round(x_min / scale)) + ox, int(round(y_min / scale)) + oy,
+            int(round(x_max / scale)) + ox, int(round(y_max / scale)) + oy
+        ])
+    return mapped
+
+def _normalized_predict(img_bgr, timings, normalize):
+    if not normalize:
+        return _predict(img_bgr, timings)
+
+    start = time.perf_counter()
+    img, info = normalize_for_ocr(img_bgr)
+    timings["normalize_ms"] = _elapsed_ms(start)
+    timings["scale"] = info["scale"]
+    texts, scores, boxes = _predict(img, timings, info["line_count"])
+    return texts, scores, map_boxes_to_original(boxes, info)
+
+def _cached_predict(img_bgr, timings, normalize):
+    cache = get_result_cache()
+    if cache is None:
+        return _normalized_predict(img_bgr, timings, normalize)
+
+    start = time.perf_counter()
+    key = cache.key_for(img_bgr)
+    cached = cache.get(key)
+    timings["cache_ms"] = _elapsed_ms(start)
+    if cached is not None:
+        timings["cache"] = "hit"
+        stats = cache.stats()
+        cache_log.info("Hit", hits=stats["hits"], misses=stats["misses"], saved_ms=round(stats["saved_ms"]))
+        return cached["texts"], cached["scores"], cached["boxes"]
+
+    timings["cache"] = "miss"
+    texts, scores, boxes = _normalized_predict(img_bgr, timings, normalize)
+    if texts:
+        cache.put(key, {
+            "texts": texts,
+            "scores": scores,
+            "boxes": boxes,
+            "predict_ms": timings["predict_ms"]
+        })
+    return texts, scores, boxes
+
+def extract_text_details(img_bgr, normalize=None):
+    timings = {}
+    if normalize is None:
+        normalize = settings.get("normalize_input", True)
     if not isinstance(img_bgr, np.ndarray) or img_bgr.size == 0:
-        print("[OCR] Invalid image input.")
-        return "", "en"
+        log.warning("Invalid image input")
+        return _empty_result(timings)
 
     try:
-        result_list = ocr.predict(img_bgr)
-
-        if not result_list or not isinstance(result_list[0], dict):
-            print("[OCR] Invalid result format:", result_list)
-            return "", "en"
-
-        ocr_result = result_list[0]
-        texts = ocr_result.get("rec_texts", [])
-        scores = ocr_result.get("rec_scores", [])
-
-        if not texts or not scores or len(texts) != len(scores):
-            print("[OCR] Empty or mismatched rec_texts/scores")
-            return "", "en"
-
-        filtered = [(t.strip(), s) for t, s in zip(texts, scores) if t.strip()]
-        if not filtered:
-            return "", "en"
-
-        lines, confs = zip(*filtered)
-        full_text = "\n".join(lines)
-        avg_conf = sum(confs) / len(confs)
-
-        detected_lang = detect_unicode_script(full_text)
-
-        settings = load_app_settings()
-        # First: allow override for both zh and zh-tw
-        if detected_lang in ("zh", "zh-tw") and settings.get("prefer_ja_over_zh", False):
-            if is_kanji_only(full_text):
-                print("[OCR] Kanji-only text detected — overriding zh/zh-tw → ja due to user preference")
-                detected_lang = "ja"
-
-        # Only now check for Traditional Chinese, if not overridden
-        elif detected_lang == "zh":
-            if is_traditional_chinese(full_text):
-                print("[OCR] Chinese text appears Traditional → using zh-tw")
-                detected_lang = "zh-tw"
+        texts, scores, boxes = _cached_predict(img_bgr, timings, normalize)
+        return _build_result(texts, scores, boxes, timings)
+    except Exception:
+        log.exception("Unexpected error")
+        return _empty_result(timings)
+
+def _build_result(texts, scores, boxes, timings):
+    if not texts or not scores or len(texts) != len(scores):
+        log.info("Empty or mismatched rec_texts/scores")
+        return _empty_result(timings)
+    filtered = [(t.strip(), s, b) for t, s, b in zip(texts, scores, boxes) if t.strip()]
+    if not filtered:
+        return _empty_result(timings)
+
+    lines, confs, line_boxes = zip(*filtered)
+    full_text = "\n".join(lines)
+    avg_conf = sum(confs) / len(confs)
+
+    start = time.perf_counter()
+    classified = classify_language(full_text)
+    detected_lang = classified["lang"]
+    timings["lang_ms"] = _elapsed_ms(start)
+
+    log.info("Detected text", text=full_text[:30], lang=detected_lang, conf=avg_conf)
+    return {
+        "text": full_text,
+        "lang": detected_lang,
+        "confidence": round(avg_conf, 4),
+        "lines": list(lines),
+        "scores": list(confs),
+        "boxes": list(line_boxes),
+        "scripts": classified["counts"],
+        "timings": timings
+    }
+
+def extract_text_details_batch(images, normalize=None):
+    """extract_text_details() for several crops at once.
+
+    Cache hits and oversized (tiled) crops are handled one by one; the remaining crops are
+    grouped by model profile and each group goes through one predict_batch() call.
+    timings["predict_ms"] is the wall time of the shared call and timings["batch"] its size.
+    """
+    if normalize is None:
+        normalize = settings.get("normalize_input", True)
+    cache = get_result_cache()
+    results = [None] * len(images)
+    # profile -> [(index, image fed to the engine, normalisation info, cache key, timings)]
+    groups = {}
+
+    for index, img_bgr in enumerate(images):
+        timings = {}
+        if not isinstance(img_bgr, np.ndarray) or img_bgr.size == 0:
+            log.warning("Invalid image input")
+            results[index] = _empty_result(timings)
+            continue
+        try:
+            key = None
+            if cache is not None:
+                start = time.perf_counter()
+                key = cache.key_for(img_bgr)
+                cached = cache.get(key)
+                timings["cache_ms"] = _elapsed_ms(start)
+                timings["cache"] = "hit" if cached is not None else "miss"
+                if cached is not None:
+                    results[index] = _build_result(cached["texts"], cached["scores"], cached["boxes"], timings)
+                    continue
+
+            info = None
+            img = img_bgr
+            if normalize:
+                start = time.perf_counter()
+                img, info = normalize_for_ocr(img_bgr)
+                timings["normalize_ms"] = _elapsed_ms(start)
+                timings["scale"] = info["scale"]
+                line_count = info["line_count"]
             else:
-                print("[OCR] Chinese text appears Simplified → using zh")
+                line_count = _estimate_line_count(img_bgr)
 
+            if _should_tile(img):
+                texts, scores, boxes = _predict(img, timings, line_count)
+                results[index] = _finish_batch_item(texts, scores, boxes, info, cache, key, timings)
+                continue
 
-        print(f"[OCR] Detected text: '{full_text[:30]}' (lang={detected_lang}, conf={avg_conf:.3f})")
-        return full_text, detected_lang
+            profile = profiles.choose(img.shape, line_count)
+            timings["profile"] = profile
+            groups.setdefault(profile, []).append((index, img, info, key, timings, line_count))
+        except Exception:
+            log.exception("Unexpected error")
+            results[index] = _empty_result(timings)
 
-    except Exception as e:
-        print("[OCR] Unexpected error:", e)
-        return "", "en"
+    for profile, items in groups.items():
+        try:
+            padded = [pad_to_bucket(item[1]) for item in items]
+            engine = load_engine(profile)
+            start = time.perf_counter()
+            predictions = engine.predict_batch([img for img, _ in padded])
+            elapsed = _elapsed_ms(start)
+        except Exception:
+            log.exception("Batch inference failed", profile=profile, size=len(items))
+            for index, _, _, _, timings, _ in items:
+                results[index] = _empty_result(timings)
+            continue
+
+        log.info("Batch", profile=profile, size=len(items), predict_ms=elapsed)
+        for (index, img, info, key, timings, line_count), (texts, scores, boxes), (padded_img, bucket) in zip(
+                items, predictions, padded):
+            timings["predict_ms"] = elapsed
+            timings["batch"] = len(items)
+            if bucket:
+                timings["bucket"] = bucket
+                metrics.observe(f"ocr.bucket.{bucket}", elapsed / len(items))
+            if padded_img is not img:
+                boxes = _clip_boxes(boxes, img.shape[1], img.shape[0])
+            # The latency model predicts single-crop cost, so it learns from the per-crop share
+            profiles.record(profile, img.shape, max(line_count, len(texts)), elapsed / len(items))
+            try:
+                texts, scores = _cascade(img, texts, scores, boxes, timings, profile)
+                results[index] = _finish_batch_item(texts, scores, boxes, info, cache, key, timings)
+            except Exception:
+                log.exception("Unexpected error")
+                results[index] = _empty_result(timings)
+    return results
+
+def _finish_batch_item(texts, scores, boxes, info, cache, key, timings):
+    if info is not None:
+        boxes = map_boxes_to_original(boxes, info)
+    if cache is not None and texts:
+        cache.put(key, {"texts": texts, "scores": scores, "boxes": boxes, "predict_ms": timings["predict_ms"]})
+    return _build_result(texts, scores, boxes, timings)
+
+def extract_text_with_lang(img_bgr):
+    result = extract_text_details(img_bgr)
+    return result["text"], result["lang"]
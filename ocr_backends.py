@@ -0,0 +1,369 @@
+import os
+import threading
+
+import numpy as np
+
+from startup import startup_timer
+from logs import get_logger
+
+log = get_logger("OCR")
+
+
+class OCRBackend:
+    # predict(image) -> (lines, scores, boxes); boxes are [x_min, y_min, x_max, y_max] or None
+    name = "base"
+
+    def predict(self, image):
+        raise NotImplementedError
+
+    def predict_batch(self, images):
+        return [self.predict(image) for image in images]
+
+    def recognize(self, crops):
+        # recognize(crops) -> [(text, score)] for single-line crops. Backends without a
+        # recognition-only model run the whole pipeline on each crop
+        results = []
+        for lines, scores, _ in self.predict_batch(crops):
+            results.append((" ".join(lines), sum(scores) / len(scores) if scores else 0.0))
+        return results
+
+
+def _parse_paddle_result(ocr_result):
+    if not isinstance(ocr_result, dict):
+        return [], [], []
+    texts = list(ocr_result.get("rec_texts", []))
+    scores = [float(s) for s in ocr_result.get("rec_scores", [])]
+    boxes = ocr_result.get("rec_boxes", [])
+    if len(boxes) == len(texts):
+        boxes = [[int(v) for v in b] for b in boxes]
+    else:
+        boxes = [None] * len(texts)
+    return texts, scores, boxes
+
+
+class PaddleBackend(OCRBackend):
+    name = "paddle"
+
+    def __init__(self, **options):
+        with startup_timer.measure("paddle"):
+            import paddle
+        with startup_timer.measure("paddleocr"):
+            import paddleocr
+            from paddleocr import PaddleOCR
+
+        log.debug("PaddleOCR loaded", version=paddleocr.__version__)
+        if not paddle.device.get_device().startswith("gpu"):
+            log.warning("Running on CPU. For better performance, install the GPU version of PaddlePaddle.")
+
+        with startup_timer.measure("PaddleOCR()", kind="init"):
+            self.engine = PaddleOCR(
+                use_doc_orientation_classify=False,
+                use_doc_unwarping=False,
+                use_textline_orientation=False,
+                ocr_version="PP-OCRv5",
+                **options
+            )
+        # The pipeline's own recognition stage, so the cascade can share it instead of loading the
+        # same model again (None if this PaddleOCR version keeps it elsewhere)
+        model = _pipeline_rec_model(self.engine)
+        self.recognizer = PaddleRecognizer.wrap(model) if model is not None else None
+
+    def predict(self, image):
+        result_list = self.engine.predict(image)
+        if not result_list:
+            log.warning("Invalid result format", result=result_list)
+            return [], [], []
+        return _parse_paddle_result(result_list[0])
+
+    def predict_batch(self, images):
+        return [_parse_paddle_result(r) for r in self.engine.predict(list(images))]
+
+
+def _pipeline_rec_model(engine):
+    # PaddleOCR keeps its stages on the PaddleX pipeline; some versions wrap that once more
+    pipeline = getattr(engine, "paddlex_pipeline", None)
+    for candidate in (pipeline, getattr(pipeline, "_pipeline", None)):
+        model = getattr(candidate, "text_rec_model", None)
+        if model is not None:
+            return model
+    return None
+
+
+class PaddleRecognizer:
+    """Only the text recognition model, for re-reading line crops (the cascade).
+
+    A PaddleOCR pipeline would also load a detector the crops do not need.
+    """
+    name = "paddle"
+
+    def __init__(self, model_name=None, device=None):
+        from paddleocr import TextRecognition
+        options = {}
+        if model_name:
+            options["model_name"] = model_name
+        if device:
+            options["device"] = device
+        with startup_timer.measure("TextRecognition()", kind="init"):
+            self.model = TextRecognition(**options)
+
+    @classmethod
+    def wrap(cls, model):
+        # A recognition model that is already loaded, e.g. a pipeline's text_rec_model
+        recognizer = cls.__new__(cls)
+        recognizer.model = model
+        return recognizer
+
+    def recognize(self, crops):
+        return [(str(r["rec_text"]), float(r["rec_score"])) for r in self.model.predict(list(crops))]
+
+
+# --- ONNX Runtime backend ---
+
+DET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+DET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+REC_HEIGHT = 48
+REC_MAX_WIDTH = 3200
+
+
+def quantize_model(model_path):
+    # Dynamic int8 quantisation, cached next to the fp32 model
+    quantized_path = os.path.splitext(model_path)[0] + ".int8.onnx"
+    if os.path.exists(quantized_path) and os.path.getmtime(quantized_path) >= os.path.getmtime(model_path):
+        return quantized_path
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    log.info("Quantising model to int8", model=model_path)
+    quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def load_rec_dict(dict_path):
+    with open(dict_path, "r", encoding="utf-8") as f:
+        chars = [line.rstrip("\r\n") for line in f]
+    # Index 0 is the CTC blank; PP-OCR dictionaries also append a space character
+    return ["blank"] + chars + [" "]
+
+
+def _check_files(*paths):
+    for path in paths:
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"ONNX backend file not found: {path!r}")
+
+
+def _onnx_session(model_path, int8, threads):
+    import onnxruntime as ort
+    if int8:
+        model_path = quantize_model(model_path)
+    options = ort.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+
+class OnnxRecognizer:
+    # CTC text recognition on single-line crops; the ONNX backend's second stage, and on its own the cascade's
+    name = "onnx"
+
+    def __init__(self, rec_model, rec_dict, int8=False, threads=0):
+        with startup_timer.measure("onnxruntime"):
+            import onnxruntime  # noqa: F401
+        _check_files(rec_model, rec_dict)
+        with startup_timer.measure("onnxruntime rec session", kind="init"):
+            self.rec = _onnx_session(rec_model, int8, threads)
+        self.rec_input = self.rec.get_inputs()[0].name
+        self.charset = load_rec_dict(rec_dict)
+
+    def recognize(self, crops):
+        import cv2
+        results = []
+        for crop in crops:
+            h, w = crop.shape[:2]
+            new_w = min(REC_MAX_WIDTH, max(8, int(np.ceil(REC_HEIGHT * w / max(1, h)))))
+            resized = cv2.resize(np.ascontiguousarray(crop), (new_w, REC_HEIGHT)).astype(np.float32)
+            blob = ((resized / 255.0 - 0.5) / 0.5).transpose(2, 0, 1)[None]
+            probs = self.rec.run(None, {self.rec_input: blob})[0][0]
+            results.append(self._ctc_decode(probs))
+        return results
+
+    def _ctc_decode(self, probs):
+        indices = probs.argmax(axis=1)
+        confidences = probs.max(axis=1)
+        chars, scores = [], []
+        previous = -1
+        for index, conf in zip(indices, confidences):
+            if index != previous and index != 0 and index < len(self.charset):
+                chars.append(self.charset[index])
+                scores.append(float(conf))
+            previous = index
+        return "".join(chars), (sum(scores) / len(scores) if scores else 0.0)
+
+
+class OnnxBackend(OCRBackend):
+    name = "onnx"
+
+    def __init__(self, det_model, rec_model, rec_dict, int8=False, threads=0,
+                 det_limit_side=960, det_thresh=0.3, box_thresh=0.6, unclip_ratio=1.5):
+        with startup_timer.measure("onnxruntime"):
+            import onnxruntime  # noqa: F401
+
+        _check_files(det_model, rec_model, rec_dict)
+        with startup_timer.measure("onnxruntime sessions", kind="init"):
+            self.det = _onnx_session(det_model, int8, threads)
+        self.det_input = self.det.get_inputs()[0].name
+        self.recognizer = OnnxRecognizer(rec_model, rec_dict, int8, threads)
+        self.det_limit_side = det_limit_side
+        self.det_thresh = det_thresh
+        self.box_thresh = box_thresh
+        self.unclip_ratio = unclip_ratio
+
+    # --- Detection (DB) ---
+
+    def _det_preprocess(self, image):
+        import cv2
+        height, width = image.shape[:2]
+        ratio = min(1.0, self.det_limit_side / max(height, width))
+        new_h = max(32, int(round(height * ratio / 32)) * 32)
+        new_w = max(32, int(round(width * ratio / 32)) * 32)
+        resized = cv2.resize(image, (new_w, new_h))
+        blob = (resized.astype(np.float32) / 255.0 - DET_MEAN) / DET_STD
+        return blob.transpose(2, 0, 1)[None], (height / new_h, width / new_w)
+
+    def _unclip(self, rect):
+        (cx, cy), (w, h), angle = rect
+        # Same offset distance as pyclipper's polygon expansion, applied to the rectangle
+        distance = (w * h) * self.unclip_ratio / max(1e-6, 2 * (w + h))
+        return (cx, cy), (w + 2 * distance, h + 2 * distance), angle
+
+    def _detect(self, image):
+        import cv2
+        blob, (ratio_h, ratio_w) = self._det_preprocess(image)
+        prob = self.det.run(None, {self.det_input: blob})[0][0, 0]
+        bitmap = (prob > self.det_thresh).astype(np.uint8)
+        contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+        height, width = image.shape[:2]
+        boxes = []
+        for contour in contours:
+            rect = cv2.minAreaRect(contour)
+            if min(rect[1]) < 3:
+                continue
+            mask = np.zeros_like(bitmap)
+            cv2.fillPoly(mask, [contour], 1)
+            score = float(cv2.mean(prob, mask=mask)[0])
+            if score < self.box_thresh:
+                continue
+            points = cv2.boxPoints(self._unclip(rect))
+            points[:, 0] = np.clip(points[:, 0] * ratio_w, 0, width - 1)
+            points[:, 1] = np.clip(points[:, 1] * ratio_h, 0, height - 1)
+            boxes.append(self._order_points(points))
+
+        # Top-to-bottom, then left-to-right for boxes on the same line
+        boxes.sort(key=lambda b: (round(b[0][1] / 10), b[0][0]))
+        return boxes
+
+    @staticmethod
+    def _order_points(points):
+        s = points.sum(axis=1)
+        d = np.diff(points, axis=1).ravel()
+        return np.array([points[np.argmin(s)], points[np.argmin(d)], points[np.argmax(s)], points[np.argmax(d)]],
+                        dtype=np.float32)
+
+    @staticmethod
+    def _crop(image, points):
+        import cv2
+        width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+        height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+        target = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(points, target)
+        crop = cv2.warpPerspective(image, matrix, (max(1, width), max(1, height)),
+                                   borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+        if crop.shape[0] / max(1, crop.shape[1]) >= 1.5:
+            crop = np.rot90(crop)
+        return crop
+
+    def recognize(self, crops):
+        return self.recognizer.recognize(crops)
+
+    def predict(self, image):
+        polys = self._detect(image)
+        recognized = self.recognize([self._crop(image, p) for p in polys])
+        lines, scores, boxes = [], [], []
+        for points, (text, score) in zip(polys, recognized):
+            if not text:
+                continue
+            lines.append(text)
+            scores.append(score)
+            boxes.append([int(points[:, 0].min()), int(points[:, 1].min()),
+                          int(points[:, 0].max()), int(points[:, 1].max())])
+        return lines, scores, boxes
+
+
+_factories = {}
+_factory_lock = threading.Lock()
+
+
+def register_backend(name, factory):
+    with _factory_lock:
+        _factories[name] = factory
+
+
+def create_backend(name, settings, options=None):
+    # factory(settings, options): options are per-profile overrides (see profiles.py)
+    with _factory_lock:
+        factory = _factories.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown OCR backend: {name!r} (available: {', '.join(sorted(_factories))})")
+    return factory(settings, options or {})
+
+
+_recognizers = {}
+
+
+def register_recognizer(name, factory, options_for):
+    # factory(**rec_options) builds a recognition-only model for backend `name`;
+    # options_for(settings, options) picks the options it depends on out of a profile's options
+    with _factory_lock:
+        _recognizers[name] = (factory, options_for)
+
+
+def recognizer_options(name, settings, options=None):
+    # None when the backend has no recognition-only model; it then re-reads crops with its full pipeline
+    with _factory_lock:
+        entry = _recognizers.get(name)
+    return None if entry is None else entry[1](settings, options or {})
+
+
+def create_recognizer(name, rec_options):
+    with _factory_lock:
+        factory, _ = _recognizers[name]
+    return factory(**rec_options)
+
+
+def _onnx_options(settings, options):
+    return {**settings.all(), **options} if hasattr(settings, "all") else {**settings, **options}
+
+
+def _create_onnx_backend(settings, options):
+    merged = _onnx_options(settings, options)
+    return OnnxBackend(
+        merged.get("onnx_det_model"),
+        merged.get("onnx_rec_model"),
+        merged.get("onnx_rec_dict"),
+        int8=merged.get("onnx_int8", False),
+        threads=merged.get("onnx_threads", 0)
+    )
+
+
+def _onnx_recognizer_options(settings, options):
+    merged = _onnx_options(settings, options)
+    return {"rec_model": merged.get("onnx_rec_model"), "rec_dict": merged.get("onnx_rec_dict"),
+            "int8": merged.get("onnx_int8", False), "threads": merged.get("onnx_threads", 0)}
+
+
+def _paddle_recognizer_options(settings, options):
+    return {"model_name": options.get("text_recognition_model_name"), "device": options.get("device")}
+
+
+register_backend("paddle", lambda settings, options: PaddleBackend(**options))
+register_backend("onnx", _create_onnx_backend)
+register_recognizer("paddle", PaddleRecognizer, _paddle_recognizer_options)
+register_recognizer("onnx", OnnxRecognizer, _onnx_recognizer_options)
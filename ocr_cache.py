@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from logs import get_logger
+
+log = get_logger("CACHE")
+
+EXACT = "exact"
+PERCEPTUAL = "perceptual"
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class OCRCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, mode=EXACT, path=None, hash_size=16, max_distance=8):
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.path = path or None
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path:
+            self.load()
+
+    # --- Keys ---
+
+    def key_for(self, img):
+        if self.mode == PERCEPTUAL:
+            return self._perceptual_key(img)
+        img = np.ascontiguousarray(img)
+        digest = hashlib.blake2b(memoryview(img).cast("B"), digest_size=16).hexdigest()
+        return f"x:{img.shape}:{img.dtype.str}:{digest}"
+
+    def _perceptual_key(self, img):
+        import cv2
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        small = cv2.resize(gray, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA)
+        bits = np.packbits(small[:, 1:] > small[:, :-1])
+        # Crops of noticeably different size never share an entry
+        bucket = f"{img.shape[0] // 16}x{img.shape[1] // 16}"
+        return f"p:{bucket}:{bits.tobytes().hex()}"
+
+    def _find_near(self, key):
+        _, bucket, digest = key.split(":")
+        target = int(digest, 16)
+        for candidate in reversed(self._entries):
+            if not candidate.startswith(f"p:{bucket}:"):
+                continue
+            if _hamming(target, int(candidate.rsplit(":", 1)[1], 16)) <= self.max_distance:
+                return candidate
+        return None
+
+    # --- Lookup ---
+
+    def get(self, key):
+        with self._lock:
+            found = key if key in self._entries else None
+            if found is None and self.mode == PERCEPTUAL:
+                found = self._find_near(key)
+            if found is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(found)
+            value, _ = self._entries[found]
+            self.hits += 1
+            self.saved_ms += value.get("predict_ms", 0.0)
+            return value
+
+    def put(self, key, value):
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_ms": round(self.saved_ms, 1)
+            }
+
+    # --- Persistence ---
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.put(entry["key"], entry["value"])
+            log.info("Loaded cached OCR results", count=len(self._entries), path=self.path)
+        except Exception as e:
+            log.warning("Failed to load cache", path=self.path, error=str(e))
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = [(key, value) for key, (value, _) in self._entries.items()]
+        # Each process writes its own temp file, so concurrent workers never interleave lines
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for key, value in entries:
+                    f.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            log.warning("Failed to save cache", path=self.path, error=str(e))
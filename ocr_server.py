@@ -0,0 +1,367 @@
+"""Local OCR server: one loaded model shared by every tool on this machine.
+
+    python ocr_server.py [--port 8765]
+
+    POST /ocr      body is an encoded image (PNG, JPEG, ...) or raw BGR pixels sent as
+                   Content-Type application/x-bgr with an X-Image-Shape: <height>,<width>[,3] header.
+                   Returns the extract_text_details() result as JSON.
+    GET  /health   {"status": "loading" | "ready" | "failed", "queue": ...}
+    GET  /metrics  request/batch counters, latency histograms, cache and profile stats
+
+Requests that arrive within ocr_server_batch_window_ms of each other are run as one batch.
+When ocr_server_queue_size requests are already waiting, new ones get 503 with Retry-After.
+The server only listens on the loopback interface.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from logs import get_logger, setup_logging
+from startup import LOADING, READY, FAILED
+from tracing import metrics
+from utils import settings
+
+log = get_logger("SERVER")
+
+RAW_CONTENT_TYPE = "application/x-bgr"
+MAX_BODY_BYTES = 64 * 1024 * 1024
+REQUEST_TIMEOUT = 60
+RETRY_AFTER_S = 1
+
+
+class OCRBatcher:
+    """Gathers queued images into batches for extract_batch(images) -> results.
+
+    The first request of a batch waits at most window_ms for company; a full batch is run
+    immediately. submit() raises queue.Full when queue_size requests are already waiting.
+    """
+
+    def __init__(self, extract_batch, max_batch=8, window_ms=10, queue_size=32):
+        self.extract_batch = extract_batch
+        self.max_batch = max(1, int(max_batch))
+        self.window_ms = max(0, window_ms)
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            # Blocking put: the sentinel must get in even when the queue is full
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def submit(self, img_bgr):
+        future = Future()
+        self._queue.put_nowait((img_bgr, future, time.perf_counter()))
+        return future
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "queue": self.depth(),
+            "queue_size": self._queue.maxsize,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "avg_batch": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.perf_counter() + self.window_ms / 1000
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch first, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            # Requests whose client already gave up are dropped before inference
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, queued in batch:
+                metrics.observe("server.queue_wait", (started - queued) * 1000)
+            try:
+                results = self.extract_batch([img for img, _, _ in batch])
+            except Exception as e:
+                log.exception("Batch failed", size=len(batch))
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            metrics.observe("server.batch", (time.perf_counter() - started) * 1000)
+
+            self.batches += 1
+            self.batched_requests += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future, queued), result in zip(batch, results):
+                result.setdefault("timings", {})["queue_ms"] = round((started - queued) * 1000, 2)
+                future.set_result(result)
+
+
+def decode_image(body, content_type, shape_header):
+    if content_type == RAW_CONTENT_TYPE:
+        try:
+            shape = tuple(int(v) for v in (shape_header or "").split(","))
+        except ValueError:
+            raise ValueError("X-Image-Shape must be <height>,<width>[,channels]")
+        if len(shape) not in (2, 3) or np.prod(shape) != len(body):
+            raise ValueError("X-Image-Shape does not match the body size")
+        return np.frombuffer(body, dtype=np.uint8).reshape(shape)
+
+    import cv2
+    img = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("body is not a decodable image")
+    return img
+
+
+def _json_default(value):
+    # numpy scalars and arrays that slip through from a backend
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class OCRRequestHandler(BaseHTTPRequestHandler):
+    server_version = "MultiLangOCR"
+
+    def log_message(self, format, *args):
+        log.debug(format % args, client=self.client_address[0])
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        ocr_server = self.server.ocr_server
+        if self.path == "/health":
+            self._send_json(200, ocr_server.health())
+        elif self.path == "/metrics":
+            self._send_json(200, ocr_server.metrics())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        ocr_server = self.server.ocr_server
+        if self.path != "/ocr":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_json(400, {"error": "empty body"})
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+            return
+        body = self.rfile.read(length)
+
+        status, payload = ocr_server.handle(
+            body, self.headers.get_content_type(), self.headers.get("X-Image-Shape"))
+        headers = {"Retry-After": str(RETRY_AFTER_S)} if status == 503 else None
+        self._send_json(status, payload, headers)
+
+
+class OCRServer:
+    def __init__(self, host="127.0.0.1", port=8765, max_batch=8, window_ms=10, queue_size=32):
+        from ocr import extract_text_details_batch
+        self.batcher = OCRBatcher(extract_text_details_batch, max_batch, window_ms, queue_size)
+        self.httpd = ThreadingHTTPServer((host, port), OCRRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.ocr_server = self
+        self.state = LOADING
+        self.error = None
+        self.started = time.time()
+        self.requests = 0
+        self.rejected = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def load(self):
+        from ocr import load_engines, load_classifier, warm_up
+        try:
+            load_engines()
+            load_classifier()
+        except Exception as e:
+            log.error("Failed to load the OCR engine", error=str(e))
+            self.error = str(e)
+            self.state = FAILED
+            return
+        if settings.get("ocr_warmup", True):
+            try:
+                warm_up()
+            except Exception as e:
+                log.warning("Warm-up failed", error=str(e))
+        self.state = READY
+        # Requests queued while loading are picked up from here on
+        self.batcher.start()
+        log.info("Engine ready", url=self.address)
+
+    def serve_forever(self):
+        threading.Thread(target=self.load, name="ocr-server-load", daemon=True).start()
+        log.info("Listening", url=self.address, max_batch=self.batcher.max_batch,
+                 window_ms=self.batcher.window_ms, queue_size=self.batcher._queue.maxsize)
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.stop()
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def handle(self, body, content_type, shape_header):
+        self._count("requests")
+        if self.state == FAILED:
+            return 503, {"error": f"OCR engine failed to load: {self.error}"}
+        try:
+            img = decode_image(body, content_type, shape_header)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+        start = time.perf_counter()
+        try:
+            future = self.batcher.submit(img)
+        except queue.Full:
+            self._count("rejected")
+            return 503, {"error": "server busy, queue is full"}
+        try:
+            result = future.result(timeout=REQUEST_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count("failed")
+            return 504, {"error": "timed out waiting for OCR"}
+        except Exception as e:
+            self._count("failed")
+            return 500, {"error": str(e)}
+        metrics.observe("server.request", (time.perf_counter() - start) * 1000)
+        return 200, result
+
+    def health(self):
+        payload = {
+            "status": self.state,
+            "queue": self.batcher.depth(),
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+        if self.error:
+            payload["error"] = self.error
+        return payload
+
+    def metrics(self):
+        from ocr import cache_stats, profile_stats
+        with self._lock:
+            counters = {"requests": self.requests, "rejected": self.rejected, "failed": self.failed}
+        return {
+            "server": {**counters, **self.batcher.stats()},
+            "latency_ms": metrics.snapshot(),
+            "cache": cache_stats(),
+            "profiles": profile_stats(),
+        }
+
+
+class OCRClient:
+    """Minimal client for scripts and the tray app; raises RuntimeError on non-200 replies."""
+
+    def __init__(self, url="http://127.0.0.1:8765", timeout=REQUEST_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, body=None, headers=None):
+        request = urllib.request.Request(self.url + path, data=body, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                reason = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                reason = e.reason
+            raise RuntimeError(f"OCR server returned {e.code}: {reason}") from None
+
+    def extract(self, img_bgr):
+        img = np.ascontiguousarray(img_bgr, dtype=np.uint8)
+        headers = {"Content-Type": RAW_CONTENT_TYPE, "X-Image-Shape": ",".join(map(str, img.shape))}
+        return self._request("/ocr", img.tobytes(), headers)
+
+    def extract_text_with_lang(self, img_bgr):
+        result = self.extract(img_bgr)
+        return result["text"], result["lang"]
+
+    def health(self):
+        return self._request("/health")
+
+    def metrics(self):
+        return self._request("/metrics")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve OCR to local clients over HTTP.")
+    parser.add_argument("--host", default=settings.get("ocr_server_host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=settings.get("ocr_server_port", 8765))
+    parser.add_argument("--max-batch", type=int, default=settings.get("ocr_server_max_batch", 8))
+    parser.add_argument("--batch-window-ms", type=float, default=settings.get("ocr_server_batch_window_ms", 10))
+    parser.add_argument("--queue-size", type=int, default=settings.get("ocr_server_queue_size", 32))
+    args = parser.parse_args(argv)
+
+    settings.start_watching()
+    setup_logging(settings.get("log_level", "INFO"), settings.get("log_json_path"))
+    server = OCRServer(args.host, args.port, args.max_batch, args.batch_window_ms, args.queue_size)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,444 @@
+import gc
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from logs import get_logger, setup_logging
+from startup import loader, startup_timer, LOADING, READY, FAILED, UNLOADED
+
+log = get_logger("OCR")
+
+MAX_RESTARTS = 5
+RESTART_DELAY = 1.0
+
+
+def _attach_shared_memory(name):
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        # The parent owns the segment; stop the child's resource tracker from unlinking it
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _worker_main(worker_id, task_queue, result_queue):
+    from ocr import load_engines, load_classifier, extract_text_details, warm_up
+    from utils import settings
+    settings.start_watching()
+    setup_logging(settings.get("log_level", "INFO"))
+
+    try:
+        load_engines()
+        load_classifier()
+    except Exception as e:
+        result_queue.put(("failed", worker_id, str(e)))
+        return
+    if settings.get("ocr_warmup", True):
+        try:
+            with startup_timer.measure("ocr warm-up", kind="init"):
+                warm_up()
+        except Exception as e:
+            # A slow first capture is better than no worker
+            log.warning("Warm-up failed", worker=worker_id, error=str(e))
+    startup_timer.mark(f"ocr worker {worker_id} ready")
+    log.info(startup_timer.report())
+    result_queue.put(("ready", worker_id))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        job_id, shm_name, shape, dtype = task
+        result_queue.put(("started", worker_id, job_id))
+        try:
+            shm = _attach_shared_memory(shm_name)
+        except FileNotFoundError:
+            result_queue.put(("error", worker_id, job_id, "shared memory segment is gone"))
+            continue
+
+        try:
+            img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            result = extract_text_details(img)
+            del img
+        except Exception as e:
+            result_queue.put(("error", worker_id, job_id, str(e)))
+            continue
+        finally:
+            try:
+                shm.close()
+            except BufferError:
+                gc.collect()
+                shm.close()
+
+        result_queue.put(("done", worker_id, job_id, result))
+
+
+class OCRWorkerPool(QObject):
+    result_ready = pyqtSignal(int, object)
+    job_failed = pyqtSignal(int, str)
+    state_changed = pyqtSignal(str)
+
+    def __init__(self, worker_count=1):
+        super().__init__()
+        self.worker_count = max(1, int(worker_count))
+        self._ctx = mp.get_context("spawn")
+        # Each worker has its own task queue, so the pool always knows which worker holds a job
+        self._task_queues = {}
+        self._result_queue = None
+        self._workers = {}
+        self._restarts = {}
+        self._ready_workers = set()
+        self._failed_workers = set()
+        # job id -> worker it was handed to, until the job has an outcome
+        self._assigned = {}
+        # Jobs a worker has reported starting; they can no longer be cancelled
+        self._started = set()
+        self._segments = {}
+        self._cancelled = set()
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Serialises start/stop/unload against submit, which may run on the watch thread
+        self._lifecycle = threading.RLock()
+        self._listener = None
+        self._listener_stop = threading.Event()
+        self._running = False
+        self.state = LOADING
+        self.last_active = time.monotonic()
+
+    def start(self):
+        with self._lifecycle:
+            if self._running:
+                return
+            self._running = True
+            # Fresh queues: sentinels left over from a previous stop() must not reach new workers
+            self._result_queue = self._ctx.Queue()
+            self._restarts.clear()
+            self._ready_workers.clear()
+            self._failed_workers.clear()
+            with self._lock:
+                self._assigned.clear()
+                self._started.clear()
+            self.last_active = time.monotonic()
+            self._set_state(LOADING)
+            for worker_id in range(self.worker_count):
+                self._spawn(worker_id, self._ctx.Queue())
+            # Each listener drains only its own queue, so one still winding down after an unload
+            # never competes with the listener of the restarted workers
+            self._listener_stop = threading.Event()
+            self._listener = threading.Thread(target=self._listen, args=(self._result_queue, self._listener_stop),
+                                              name="ocr-results", daemon=True)
+            self._listener.start()
+            log.info("Started OCR worker processes", count=self.worker_count)
+
+    def stop(self, wait=True):
+        # With wait=False the processes are sent their sentinels and reaped on a helper thread,
+        # so the caller (the GUI thread for an idle unload) never blocks on process exit
+        with self._lifecycle:
+            if not self._running:
+                return
+            self._running = False
+            self._listener_stop.set()
+            workers, listener = list(self._workers.values()), self._listener
+            for task_queue in self._task_queues.values():
+                task_queue.put(None)
+            self._workers.clear()
+            self._task_queues.clear()
+            self._listener = None
+            with self._lock:
+                job_ids = list(self._segments)
+        if wait:
+            self._reap(workers, listener, job_ids)
+        else:
+            threading.Thread(target=self._reap, args=(workers, listener, job_ids), name="ocr-reaper",
+                             daemon=True).start()
+
+    def _reap(self, workers, listener, job_ids):
+        for proc in workers:
+            proc.join(timeout=2)
+            if proc.is_alive():
+                proc.terminate()
+        if listener is not None and listener is not threading.current_thread():
+            listener.join(timeout=2)
+        for job_id in job_ids:
+            self._release(job_id)
+
+    def busy(self):
+        with self._lock:
+            return bool(self._segments)
+
+    def unload(self):
+        # Ends the worker processes, which is the only way to give their model memory back to
+        # the OS; the next submit() or wake() starts them again
+        with self._lifecycle:
+            if not self._running or self.busy():
+                return False
+            self.stop(wait=False)
+            self._set_state(UNLOADED)
+            log.info("Unloaded OCR workers", idle_s=round(time.monotonic() - self.last_active))
+            return True
+
+    def wake(self):
+        # Starts loading ahead of a capture, e.g. while the user is still dragging the selection
+        with self._lifecycle:
+            if self.state == UNLOADED:
+                log.info("Reloading OCR workers")
+                self.start()
+
+    def pending_bytes(self):
+        # Shared-memory segments of captures waiting for or in OCR
+        with self._lock:
+            return sum(shm.size for shm in self._segments.values())
+
+    def worker_pids(self):
+        return {worker_id: proc.pid for worker_id, proc in list(self._workers.items()) if proc.is_alive()}
+
+    def submit(self, img_bgr):
+        img = np.ascontiguousarray(img_bgr)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, img.nbytes))
+        np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[:] = img
+
+        job_id = next(self._job_ids)
+        with self._lifecycle:
+            self.wake()
+            with self._lock:
+                # Queued under the lock, so a crash handler swapping the worker's queue sees it either
+                # failed with the old queue or waiting in the new one
+                worker_id = self._pick_worker()
+                self._segments[job_id] = shm
+                self._assigned[job_id] = worker_id
+                self._task_queues[worker_id].put((job_id, shm.name, img.shape, img.dtype.str))
+            self.last_active = time.monotonic()
+        return job_id
+
+    def _pick_worker(self):
+        # The usable worker with the fewest jobs; called with _lock held
+        usable = [w for w in self._workers if w not in self._failed_workers] or list(self._workers)
+        load = {worker_id: 0 for worker_id in usable}
+        for worker_id in self._assigned.values():
+            if worker_id in load:
+                load[worker_id] += 1
+        return min(usable, key=lambda w: (load[w], w))
+
+    def cancel(self, job_id):
+        # Only for jobs no worker has started: releasing the segment makes the worker skip them.
+        # The job still ends with job_failed (or result_ready if a worker won the race).
+        with self._lock:
+            if job_id not in self._segments or job_id in self._started:
+                return False
+            self._cancelled.add(job_id)
+        self._release(job_id)
+        return True
+
+    def _spawn(self, worker_id, task_queue):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, task_queue, self._result_queue),
+            name=f"ocr-worker-{worker_id}",
+            daemon=True
+        )
+        proc.start()
+        with self._lock:
+            self._task_queues[worker_id] = task_queue
+            self._workers[worker_id] = proc
+
+    def _release(self, job_id):
+        with self._lock:
+            shm = self._segments.pop(job_id, None)
+        self.last_active = time.monotonic()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    def _set_state(self, state):
+        self.state = state
+        loader.set_state("ocr", state)
+        self.state_changed.emit(state)
+
+    def _listen(self, result_queue, stop):
+        while not stop.is_set():
+            try:
+                msg = result_queue.get(timeout=0.5)
+            except queue.Empty:
+                msg = None
+            if stop.is_set():
+                return
+            if msg is not None:
+                self._handle_message(msg)
+            self._check_workers()
+
+    def _handle_message(self, msg):
+        kind, worker_id = msg[0], msg[1]
+        if kind == "ready":
+            self._ready_workers.add(worker_id)
+            self._restarts[worker_id] = 0
+            if self.state != READY:
+                self._set_state(READY)
+        elif kind == "failed":
+            log.error("Worker failed to load the engine", worker=worker_id, error=msg[2])
+            self._failed_workers.add(worker_id)
+            with self._lock:
+                jobs = self._take_jobs(worker_id)
+            self._fail_jobs(jobs, f"OCR worker failed to load: {msg[2]}")
+            if len(self._failed_workers) == self.worker_count:
+                self._set_state(FAILED)
+        elif kind == "started":
+            with self._lock:
+                # A message from a worker that has since crashed is stale: its jobs are already failed
+                if self._assigned.get(msg[2]) == worker_id:
+                    self._started.add(msg[2])
+        elif kind in ("done", "error"):
+            job_id = msg[2]
+            with self._lock:
+                owner = self._assigned.pop(job_id, None)
+                self._started.discard(job_id)
+                cancelled = job_id in self._cancelled
+                self._cancelled.discard(job_id)
+            if owner is None:
+                return
+            self._release(job_id)
+            if kind == "done":
+                self.result_ready.emit(job_id, msg[3])
+            elif cancelled:
+                self.job_failed.emit(job_id, "cancelled")
+            else:
+                log.error("Job failed", job=job_id, worker=worker_id, error=msg[3])
+                self.job_failed.emit(job_id, msg[3])
+
+    def _take_jobs(self, worker_id):
+        # Every job handed to worker_id without an outcome yet, whether or not its "started" arrived,
+        # as (job_id, cancelled); called with _lock held
+        jobs = [(job_id, job_id in self._cancelled) for job_id, owner in self._assigned.items() if owner == worker_id]
+        for job_id, _ in jobs:
+            del self._assigned[job_id]
+            self._started.discard(job_id)
+            self._cancelled.discard(job_id)
+        return jobs
+
+    def _fail_jobs(self, jobs, reason):
+        for job_id, cancelled in jobs:
+            self._release(job_id)
+            self.job_failed.emit(job_id, "cancelled" if cancelled else reason)
+
+    def _check_workers(self):
+        for worker_id, proc in list(self._workers.items()):
+            if proc.is_alive() or worker_id in self._failed_workers or not self._running:
+                continue
+
+            log.warning("Worker exited unexpectedly", worker=worker_id, code=proc.exitcode)
+            self._ready_workers.discard(worker_id)
+            task_queue = self._ctx.Queue()
+            with self._lock:
+                # Jobs handed out from here on wait in a fresh queue for the restarted worker
+                self._task_queues[worker_id] = task_queue
+                jobs = self._take_jobs(worker_id)
+            self._fail_jobs(jobs, "OCR worker crashed")
+
+            restarts = self._restarts.get(worker_id, 0) + 1
+            self._restarts[worker_id] = restarts
+            if restarts > MAX_RESTARTS:
+                log.error("Worker crashed too many times in a row, giving up", worker=worker_id, restarts=MAX_RESTARTS)
+                self._failed_workers.add(worker_id)
+                if len(self._failed_workers) == self.worker_count:
+                    self._set_state(FAILED)
+                continue
+
+            time.sleep(RESTART_DELAY)
+            log.info("Restarting worker", worker=worker_id, attempt=restarts)
+            self._spawn(worker_id, task_queue)
+            if not self._ready_workers and self.state == READY:
+                self._set_state(LOADING)
+
+
+class RemoteOCRPool(QObject):
+    """Same interface as OCRWorkerPool, but jobs go to a running ocr_server.py.
+
+    Lets the tray app share one loaded model with other local tools instead of starting
+    its own workers.
+    """
+    result_ready = pyqtSignal(int, object)
+    job_failed = pyqtSignal(int, str)
+    state_changed = pyqtSignal(str)
+
+    HEALTH_INTERVAL = 1.0
+
+    def __init__(self, url, concurrency=4):
+        super().__init__()
+        from ocr_server import OCRClient
+        self.client = OCRClient(url)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ocr-client")
+        self._job_ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self.state = LOADING
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._set_state(LOADING)
+        threading.Thread(target=self._wait_ready, name="ocr-server-health", daemon=True).start()
+        log.info("Using OCR server", url=self.client.url)
+
+    def stop(self):
+        self._running = False
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, img_bgr):
+        job_id = next(self._job_ids)
+        future = self._executor.submit(self._run, job_id, np.ascontiguousarray(img_bgr))
+        with self._lock:
+            self._pending[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def wake(self):
+        # The model lives in the server process, nothing to load here
+        pass
+
+    def cancel(self, job_id):
+        with self._lock:
+            future = self._pending.get(job_id)
+        if future is None or not future.cancel():
+            return False
+        self.job_failed.emit(job_id, "cancelled")
+        return True
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._pending.pop(job_id, None)
+
+    def _set_state(self, state):
+        self.state = state
+        loader.set_state("ocr", state)
+        self.state_changed.emit(state)
+
+    def _wait_ready(self):
+        # The server may still be starting or loading its model; jobs submitted meanwhile queue there
+        while self._running:
+            try:
+                status = self.client.health()["status"]
+            except Exception:
+                status = LOADING
+            if status in (READY, FAILED):
+                self._set_state(status)
+                return
+            time.sleep(self.HEALTH_INTERVAL)
+
+    def _run(self, job_id, img):
+        try:
+            result = self.client.extract(img)
+        except Exception as e:
+            log.error("Job failed", job=job_id, error=str(e))
+            self.job_failed.emit(job_id, str(e))
+            return
+        self.result_ready.emit(job_id, result)
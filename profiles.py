@@ -0,0 +1,174 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+from logs import get_logger
+from ocr_backends import create_backend, create_recognizer, recognizer_options
+
+log = get_logger("OCR")
+
+FAST = "fast"
+ACCURATE = "accurate"
+CUSTOM = "custom"
+AUTO = "auto"
+
+# Backend options per built-in profile; the custom profile comes from the custom_profile setting
+PROFILE_OPTIONS = {
+    FAST: {
+        "paddle": {
+            "text_detection_model_name": "PP-OCRv5_mobile_det",
+            "text_recognition_model_name": "PP-OCRv5_mobile_rec",
+        },
+    },
+    ACCURATE: {
+        "paddle": {
+            "text_detection_model_name": "PP-OCRv5_server_det",
+            "text_recognition_model_name": "PP-OCRv5_server_rec",
+        },
+    },
+}
+
+# Starting latency model, ms = base + per_mp * megapixels + per_line * lines (rough CPU figures)
+PRIORS = {
+    FAST: (40.0, 60.0, 8.0),
+    ACCURATE: (150.0, 400.0, 30.0),
+    CUSTOM: (150.0, 400.0, 30.0),
+}
+MIN_SAMPLES_FOR_FIT = 5
+# In auto mode the accurate profile is re-tried after this many captures in a row went to the fast
+# one, so an estimate that came out too high (a slow spell, a busy machine) can still come down
+EXPLORE_INTERVAL = 20
+
+
+class LatencyStats:
+    def __init__(self, prior, window=100):
+        self.prior = prior
+        self.samples = deque(maxlen=window)
+        self.coefficients = prior
+
+    def record(self, megapixels, lines, ms):
+        self.samples.append((megapixels, lines, ms))
+        if len(self.samples) >= MIN_SAMPLES_FOR_FIT:
+            data = np.array(self.samples, dtype=np.float64)
+            design = np.column_stack([np.ones(len(data)), data[:, 0], data[:, 1]])
+            fitted, *_ = np.linalg.lstsq(design, data[:, 2], rcond=None)
+            # A negative term would make bigger crops look cheaper; fall back to the prior for it
+            self.coefficients = tuple(f if f >= 0 else p for f, p in zip(fitted, self.prior))
+
+    def predict(self, megapixels, lines):
+        base, per_mp, per_line = self.coefficients
+        return base + per_mp * megapixels + per_line * lines
+
+    def summary(self):
+        times = [ms for _, _, ms in self.samples]
+        return {
+            "count": len(times),
+            "p50_ms": round(float(np.percentile(times, 50)), 1) if times else None,
+            "p95_ms": round(float(np.percentile(times, 95)), 1) if times else None,
+            "model": [round(float(c), 2) for c in self.coefficients],
+        }
+
+
+class ProfileManager:
+    def __init__(self, settings):
+        self.settings = settings
+        self._backends = {}
+        # Recognition-only models for the cascade, one per distinct model whichever profiles share it
+        self._recognizers = {}
+        self._stats = {name: LatencyStats(prior) for name, prior in PRIORS.items()}
+        # Profiles whose first (cold) inference has happened; that one is left out of the stats
+        self._warm = set()
+        self._passed_over = 0
+        self._lock = threading.Lock()
+
+    def options_for(self, profile):
+        backend_name = self.settings.get("ocr_backend", "paddle")
+        if profile == CUSTOM:
+            return dict(self.settings.get("custom_profile") or {})
+        if backend_name == "onnx":
+            # ONNX profiles are onnx_* overrides pointing at different exported models
+            return dict((self.settings.get("onnx_profiles") or {}).get(profile, {}))
+        return dict(PROFILE_OPTIONS.get(profile, {}).get(backend_name, {}))
+
+    def get_backend(self, profile):
+        # Profiles are loaded on first use and then kept side by side
+        with self._lock:
+            backend = self._backends.get(profile)
+            if backend is None:
+                backend_name = self.settings.get("ocr_backend", "paddle")
+                backend = create_backend(backend_name, self.settings, self.options_for(profile))
+                self._backends[profile] = backend
+                log.info("Loaded model profile", profile=profile, backend=backend_name)
+        return backend
+
+    def get_recognizer(self, profile):
+        # recognize(crops) for a profile without loading its detector, when the backend allows it
+        backend_name = self.settings.get("ocr_backend", "paddle")
+        rec_options = recognizer_options(backend_name, self.settings, self.options_for(profile))
+        if rec_options is None:
+            return self.get_backend(profile)
+        key = (backend_name, tuple(sorted(rec_options.items())))
+        with self._lock:
+            recognizer = self._recognizers.get(key)
+            if recognizer is None:
+                # A loaded pipeline shares its recognition stage (its model is the same one)
+                recognizer = getattr(self._backends.get(profile), "recognizer", None) or \
+                    create_recognizer(backend_name, rec_options)
+                self._recognizers[key] = recognizer
+                log.info("Loaded recogniser", profile=profile, backend=backend_name)
+        return recognizer
+
+    def loaded(self):
+        with self._lock:
+            return list(self._backends)
+
+    def reset(self):
+        with self._lock:
+            self._backends.clear()
+            self._recognizers.clear()
+            self._warm.clear()
+
+    def default_profile(self):
+        profile = self.settings.get("ocr_profile", AUTO)
+        return FAST if profile == AUTO else profile
+
+    def candidates(self):
+        # Every profile choose() can return with the current settings
+        profile = self.settings.get("ocr_profile", AUTO)
+        return [FAST, ACCURATE] if profile == AUTO else [profile]
+
+    def choose(self, shape, line_count):
+        profile = self.settings.get("ocr_profile", AUTO)
+        if profile != AUTO:
+            return profile
+
+        megapixels = shape[0] * shape[1] / 1e6
+        target = self.settings.get("latency_target_ms", 800)
+        with self._lock:
+            if self._stats[ACCURATE].predict(megapixels, line_count) <= target:
+                self._passed_over = 0
+                return ACCURATE
+            self._passed_over += 1
+            if self._passed_over < EXPLORE_INTERVAL:
+                return FAST
+            self._passed_over = 0
+        log.debug("Re-trying the accurate profile to refresh its latency estimate")
+        return ACCURATE
+
+    def mark_warm(self, profile):
+        with self._lock:
+            self._warm.add(profile)
+
+    def record(self, profile, shape, line_count, ms):
+        with self._lock:
+            if profile not in self._warm:
+                # The first call pays for memory pools and kernel selection, not for the crop
+                self._warm.add(profile)
+                return
+        stats = self._stats.get(profile)
+        if stats is not None:
+            stats.record(shape[0] * shape[1] / 1e6, line_count, ms)
+
+    def stats(self):
+        return {name: stats.summary() for name, stats in self._stats.items() if stats.samples}
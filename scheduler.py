@@ -0,0 +1,211 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+from logs import get_logger
+
+log = get_logger("SCHED")
+
+CAPTURE = "capture"
+WATCH = "watch"
+DEFAULT_LIMITS = {CAPTURE: 1, WATCH: 1}
+
+
+class JobScheduler:
+    """Sits between the capture sources (selector, watch mode) and the OCR pool.
+
+    - At most limits[kind] jobs of each kind are with the pool at a time; the rest wait here.
+    - Kinds in `supersede` only keep the newest job: a new one cancels older jobs of that kind
+      that are still waiting, and the results of older ones the pool is already running are
+      dropped (the pool is asked to cancel them if no worker has picked them up yet).
+    - Callbacks get the scheduler's job id and the context passed to submit(), never pool ids:
+      on_result(job_id, result, context), on_failed(job_id, reason, context) and
+      on_cancelled(job_id, context).
+
+    submit() may be called from any thread. job_done()/job_failed() are connected to the pool's
+    signals; callbacks run on the thread that reports the outcome and outside the lock.
+    """
+
+    def __init__(self, pool_submit, pool_cancel=None, limits=None, supersede=(CAPTURE,),
+                 on_result=None, on_failed=None, on_cancelled=None):
+        self.pool_submit = pool_submit
+        self.pool_cancel = pool_cancel
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.supersede = set(supersede)
+        self.on_result = on_result
+        self.on_failed = on_failed
+        self.on_cancelled = on_cancelled
+        self.counts = {"submitted": 0, "completed": 0, "failed": 0, "superseded": 0}
+        self._ids = itertools.count(1)
+        # Held across pool_submit so an outcome cannot be reported before the job is mapped
+        self._lock = threading.RLock()
+        # kind -> deque of (job_id, image, context) not yet handed to the pool
+        self._waiting = {}
+        # pool job id -> (job_id, kind, context)
+        self._running = {}
+        # job ids whose outcome is dropped because a newer job superseded them
+        self._stale = set()
+
+    def submit(self, kind, img_bgr, context=None):
+        with self._lock:
+            job_id = next(self._ids)
+            self.counts["submitted"] += 1
+            cancelled = self._supersede(kind) if kind in self.supersede else []
+            self._waiting.setdefault(kind, deque()).append((job_id, img_bgr, context))
+            failed = self._dispatch(kind)
+        self._notify_cancelled(cancelled)
+        self._notify_failed(failed)
+        return job_id
+
+    def set_limits(self, limits):
+        with self._lock:
+            self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+            failed = [f for kind in list(self._waiting) for f in self._dispatch(kind)]
+        self._notify_failed(failed)
+
+    def running(self, kind=None):
+        with self._lock:
+            return sum(1 for _, k, _ in self._running.values() if kind is None or k == kind)
+
+    def waiting(self, kind=None):
+        with self._lock:
+            return sum(len(q) for k, q in self._waiting.items() if kind is None or k == kind)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counts, "running": len(self._running), "waiting": self.waiting()}
+
+    def job_done(self, pool_id, result):
+        entry, failed = self._finish(pool_id)
+        self._notify_failed(failed)
+        if entry is None:
+            return
+        job_id, kind, context = entry
+        with self._lock:
+            self.counts["completed"] += 1
+        if self.on_result:
+            self.on_result(job_id, result, context)
+
+    def job_failed(self, pool_id, reason):
+        entry, failed = self._finish(pool_id)
+        self._notify_failed(failed)
+        if entry is None:
+            return
+        job_id, kind, context = entry
+        with self._lock:
+            self.counts["failed"] += 1
+        if self.on_failed:
+            self.on_failed(job_id, reason, context)
+
+    def _finish(self, pool_id):
+        # Frees the slot and starts the next waiting job; returns (entry, dispatch failures), with
+        # entry None for stale or unknown jobs
+        with self._lock:
+            entry = self._running.pop(pool_id, None)
+            if entry is None:
+                return None, []
+            job_id, kind, _ = entry
+            failed = self._dispatch(kind)
+            if job_id in self._stale:
+                self._stale.discard(job_id)
+                log.debug("Dropped superseded result", job=job_id, kind=kind)
+                return None, failed
+        return entry, failed
+
+    def _supersede(self, kind):
+        # Returns (job_id, context) of the jobs that are now cancelled; caller notifies outside the lock
+        cancelled = []
+        waiting = self._waiting.get(kind)
+        while waiting:
+            job_id, _, context = waiting.popleft()
+            cancelled.append((job_id, context))
+        for pool_id, (job_id, running_kind, context) in list(self._running.items()):
+            if running_kind != kind or job_id in self._stale:
+                continue
+            self._stale.add(job_id)
+            cancelled.append((job_id, context))
+            if self.pool_cancel is not None:
+                self.pool_cancel(pool_id)
+        self.counts["superseded"] += len(cancelled)
+        if cancelled:
+            log.info("Superseded older jobs", kind=kind, count=len(cancelled))
+        return cancelled
+
+    def _dispatch(self, kind):
+        # Returns (job_id, reason, context) of the jobs the pool refused; caller notifies outside the lock
+        failed = []
+        waiting = self._waiting.get(kind)
+        limit = max(1, int(self.limits.get(kind, 1)))
+        while waiting and sum(1 for _, k, _ in self._running.values() if k == kind) < limit:
+            job_id, img_bgr, context = waiting.popleft()
+            try:
+                pool_id = self.pool_submit(img_bgr)
+            except Exception as e:
+                log.error("Submitting to the OCR pool failed", job=job_id, error=str(e))
+                self.counts["failed"] += 1
+                failed.append((job_id, str(e), context))
+                continue
+            self._running[pool_id] = (job_id, kind, context)
+        return failed
+
+    def _notify_cancelled(self, cancelled):
+        if self.on_cancelled:
+            for job_id, context in cancelled:
+                self.on_cancelled(job_id, context)
+
+    def _notify_failed(self, failed):
+        if self.on_failed:
+            for job_id, reason, context in failed:
+                self.on_failed(job_id, reason, context)
+
+
+class HotkeyDispatcher:
+    """Runs hotkey callbacks one at a time on a single thread.
+
+    A press is dropped while the same hotkey's callback is still queued or running, and when it
+    comes within debounce_ms of the last accepted press (key repeat, mashing).
+    """
+
+    def __init__(self, debounce_ms=300, clock=time.monotonic):
+        self.debounce_ms = debounce_ms
+        self.clock = clock
+        self.accepted = 0
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._last = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def fire(self, name, callback):
+        now = self.clock()
+        with self._lock:
+            last = self._last.get(name)
+            if name in self._pending or (last is not None and (now - last) * 1000 < self.debounce_ms):
+                self.dropped += 1
+                return False
+            self._pending.add(name)
+            self._last[name] = now
+            self.accepted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="hotkeys", daemon=True)
+                self._thread.start()
+        self._queue.put((name, callback))
+        return True
+
+    def wait_idle(self):
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            name, callback = self._queue.get()
+            try:
+                callback()
+            except Exception:
+                log.exception("Hotkey callback failed", hotkey=name)
+            finally:
+                with self._lock:
+                    self._pending.discard(name)
+                self._queue.task_done()
@@ -0,0 +1,193 @@
+import bisect
+import threading
+
+from logs import get_logger
+from startup import startup_timer
+
+log = get_logger("OCR")
+
+# Script ids, in the priority order the name-based checks used
+OTHER, HIRAGANA, KATAKANA, HANGUL, HAN, LATIN = range(6)
+SCRIPT_NAMES = ("other", "hiragana", "katakana", "hangul", "han", "latin")
+
+# Codepoints whose Unicode name contains HIRAGANA, KATAKANA, HANGUL, "CJK UNIFIED" or LATIN,
+# generated from unicodedata (Unicode 14.0) with the same first-match priority as above
+SCRIPT_RANGES = {
+    HIRAGANA: (
+        (0x3041, 0x3096), (0x3099, 0x30A0), (0x30FC, 0x30FC), (0xFF70, 0xFF70),
+        (0x1B001, 0x1B001), (0x1B11F, 0x1B11F), (0x1B150, 0x1B152), (0x1F200, 0x1F200),
+    ),
+    KATAKANA: (
+        (0x30A1, 0x30FB), (0x30FD, 0x30FF), (0x31F0, 0x31FF), (0x32D0, 0x32FE),
+        (0xFF65, 0xFF6F), (0xFF71, 0xFF9F), (0x1AFF0, 0x1AFF3), (0x1AFF5, 0x1AFFB),
+        (0x1AFFD, 0x1AFFE), (0x1B000, 0x1B000), (0x1B120, 0x1B122), (0x1B164, 0x1B167),
+        (0x1F201, 0x1F202), (0x1F213, 0x1F213),
+    ),
+    HANGUL: (
+        (0x1100, 0x11FF), (0x302E, 0x302F), (0x3131, 0x318E), (0x3200, 0x321C),
+        (0x3260, 0x327B), (0x327E, 0x327E), (0xA960, 0xA97C), (0xAC00, 0xD7A3),
+        (0xD7B0, 0xD7C6), (0xD7CB, 0xD7FB), (0xFFA0, 0xFFBE), (0xFFC2, 0xFFC7),
+        (0xFFCA, 0xFFCF), (0xFFD2, 0xFFD7), (0xFFDA, 0xFFDC),
+    ),
+    HAN: (
+        (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0x1F210, 0x1F212), (0x1F214, 0x1F23B),
+        (0x1F240, 0x1F248), (0x20000, 0x2A6DF), (0x2A700, 0x2B738), (0x2B740, 0x2B81D),
+        (0x2B820, 0x2CEA1), (0x2CEB0, 0x2EBE0), (0x30000, 0x3134A),
+    ),
+    LATIN: (
+        (0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x00D6), (0x00D8, 0x00F6),
+        (0x00F8, 0x02AF), (0x0363, 0x036F), (0x1ABF, 0x1AC0), (0x1ACC, 0x1ACE),
+        (0x1D00, 0x1D25), (0x1D62, 0x1D65), (0x1D6B, 0x1D77), (0x1D79, 0x1D9A),
+        (0x1DCA, 0x1DCA), (0x1DD3, 0x1DF4), (0x1E00, 0x1EFF), (0x2071, 0x2071),
+        (0x207F, 0x207F), (0x2090, 0x209C), (0x2184, 0x2184), (0x249C, 0x24E9),
+        (0x271D, 0x271F), (0x2C2E, 0x2C2E), (0x2C5E, 0x2C5E), (0x2C60, 0x2C7C),
+        (0x2C7E, 0x2C7F), (0xA722, 0xA76F), (0xA771, 0xA787), (0xA78B, 0xA7CA),
+        (0xA7D0, 0xA7D1), (0xA7D3, 0xA7D3), (0xA7D5, 0xA7D9), (0xA7F5, 0xA7F7),
+        (0xA7FA, 0xA7FF), (0xAB30, 0xAB5A), (0xAB60, 0xAB64), (0xAB66, 0xAB68),
+        (0xFB00, 0xFB06), (0xFF21, 0xFF3A), (0xFF41, 0xFF5A), (0x1DF00, 0x1DF1E),
+        (0x1F110, 0x1F12C), (0x1F130, 0x1F149), (0x1F150, 0x1F169), (0x1F170, 0x1F18A),
+        (0x1F1A5, 0x1F1A5), (0x1F520, 0x1F521), (0x1F524, 0x1F524), (0x1F546, 0x1F547),
+        (0xE0041, 0xE005A), (0xE0061, 0xE007A),
+    ),
+}
+
+# Ideographs OpenCC may rewrite; CJK compatibility ideographs are included on top of HAN
+_CONVERTIBLE_RANGES = SCRIPT_RANGES[HAN] + ((0xF900, 0xFAFF),)
+
+
+def _convert_each(converter, chars):
+    # Newline-separated so phrase rules can never match across two characters
+    return converter.convert("\n".join(chars)).split("\n")
+
+
+def build_chinese_index():
+    from opencc import OpenCC
+
+    chars = [chr(cp) for start, end in _CONVERTIBLE_RANGES for cp in range(start, end + 1)]
+    t2s = _convert_each(OpenCC('t2s'), chars)
+    s2t = _convert_each(OpenCC('s2t'), chars)
+    if len(t2s) != len(chars) or len(s2t) != len(chars):
+        raise RuntimeError("OpenCC changed the number of characters while building the index")
+
+    traditional = frozenset(ch for ch, out in zip(chars, t2s) if ch != out)
+    simplified = frozenset(ch for ch, out in zip(chars, s2t) if ch != out) - traditional
+    return traditional, simplified
+
+
+class ScriptClassifier:
+    def __init__(self, traditional_chars=frozenset(), simplified_chars=frozenset()):
+        self._bmp = bytearray(0x10000)
+        astral = []
+        for script, ranges in SCRIPT_RANGES.items():
+            for start, end in ranges:
+                if end < 0x10000:
+                    self._bmp[start:end + 1] = bytes([script]) * (end - start + 1)
+                else:
+                    astral.append((start, end, script))
+        astral.sort()
+        self._astral = astral
+        self._astral_starts = [start for start, _, _ in astral]
+        # Characters that t2s rewrites (the old is_traditional_chinese test) and ones only s2t rewrites
+        self.traditional_chars = traditional_chars
+        self.simplified_chars = simplified_chars
+
+    def script_of(self, ch):
+        cp = ord(ch)
+        if cp < 0x10000:
+            return self._bmp[cp]
+        i = bisect.bisect_right(self._astral_starts, cp) - 1
+        if i >= 0 and cp <= self._astral[i][1]:
+            return self._astral[i][2]
+        return OTHER
+
+    def detect_script(self, text):
+        bmp = self._bmp
+        has_hangul = has_han = False
+        for ch in text:
+            cp = ord(ch)
+            script = bmp[cp] if cp < 0x10000 else self.script_of(ch)
+            if script == HIRAGANA or script == KATAKANA:
+                return "ja"  # kana outranks everything else, no need to look further
+            elif script == HANGUL:
+                has_hangul = True
+            elif script == HAN:
+                has_han = True
+
+        if has_hangul:
+            return "ko"
+        elif has_han:
+            return "zh"
+        return "en"
+
+    def is_kanji_only(self, text):
+        bmp = self._bmp
+        for ch in text:
+            cp = ord(ch)
+            script = bmp[cp] if cp < 0x10000 else self.script_of(ch)
+            if script != OTHER and script != HAN:
+                return False
+        return True
+
+    def is_traditional(self, text):
+        return not self.traditional_chars.isdisjoint(text)
+
+    def script_counts(self, text):
+        bmp = self._bmp
+        traditional_chars = self.traditional_chars
+        simplified_chars = self.simplified_chars
+        counts = [0] * len(SCRIPT_NAMES)
+        traditional = simplified = 0
+        for ch in text:
+            cp = ord(ch)
+            script = bmp[cp] if cp < 0x10000 else self.script_of(ch)
+            counts[script] += 1
+            if script == HAN or script == OTHER:
+                if ch in traditional_chars:
+                    traditional += 1
+                elif ch in simplified_chars:
+                    simplified += 1
+
+        result = dict(zip(SCRIPT_NAMES, counts))
+        result["traditional"] = traditional
+        result["simplified"] = simplified
+        return result
+
+    def classify(self, text, prefer_ja=False):
+        counts = self.script_counts(text)
+        if counts["hiragana"] or counts["katakana"]:
+            lang = "ja"
+        elif counts["hangul"]:
+            lang = "ko"
+        elif counts["han"]:
+            # Same precedence as before: with prefer_ja the Traditional check is skipped entirely
+            if prefer_ja:
+                lang = "zh" if counts["latin"] else "ja"
+            else:
+                lang = "zh-tw" if counts["traditional"] else "zh"
+        else:
+            lang = "en"
+        return {"lang": lang, "counts": counts}
+
+
+_classifier = ScriptClassifier()
+_index_lock = threading.Lock()
+_index_attempted = False
+
+
+def get_classifier():
+    return _classifier
+
+
+def load_chinese_index():
+    global _classifier, _index_attempted
+    with _index_lock:
+        if not _index_attempted:
+            _index_attempted = True
+            try:
+                with startup_timer.measure("OpenCC character index", kind="init"):
+                    traditional, simplified = build_chinese_index()
+            except Exception as e:
+                log.warning("Could not build the Traditional Chinese index, zh-tw detection disabled", error=str(e))
+            else:
+                _classifier = ScriptClassifier(traditional, simplified)
+    return _classifier
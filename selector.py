@@ -1,89 +1,200 @@
-from PyQt6.QtWidgets import QWidget, QRubberBand, QApplication
-from PyQt6.QtCore import Qt, QRect, QPoint, QSize, pyqtSignal
-from PyQt6.QtGui import QPainter, QColor, QPixmap, QImage
-from PIL import ImageGrab
-from PIL.ImageQt import ImageQt
-import numpy as np
-import cv2
+import time
+
+from PyQt6.QtWidgets import QWidget, QApplication
+from PyQt6.QtCore import Qt, QRect, QRectF, QPoint, QTimer, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor, QCursor, QPen, QRegion
+
+from capture import grab_monitor, grab_monitor_rect, preview_pixmap, pixmap_to_bgr
+from tracing import start_trace
+from utils import settings
+
+DIM_COLOR = QColor(0, 0, 0, 50)
+BAND_COLOR = QColor(0, 120, 215)
+BAND_WIDTH = 1
+# Time for the window system to take the hidden overlay off the screen before the selection is grabbed
+HIDE_SETTLE_MS = 40
 
 class RegionSelector(QWidget):
     selection_done = pyqtSignal(object)
+    # (left, top, right, bottom) of the selection in screen pixels, emitted before selection_done
+    region_selected = pyqtSignal(tuple)
 
-    def __init__(self):
+    def __init__(self, grab=grab_monitor, grab_rect=grab_monitor_rect):
         super().__init__()
         self.setWindowFlags(
             Qt.WindowType.WindowStaysOnTopHint |
             Qt.WindowType.FramelessWindowHint |
             Qt.WindowType.Tool
         )
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        # Every pixel is painted from the screenshot, so the window can be opaque; a translucent
+        # (layered) window would be flushed in full on every rubber-band move
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
         self.setCursor(Qt.CursorShape.CrossCursor)
         self.setWindowOpacity(1.0)
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
+        # grab(screen) -> QPixmap of that screen at device resolution; grab_rect(screen, rect) the
+        # same for a logical rectangle of it
+        self.grab = grab
+        self.grab_rect = grab_rect
         self.origin = QPoint()
-        self.rubber_band = QRubberBand(QRubberBand.Shape.Rectangle, self)
-        self._background_pixmap = None
+        self.selection = QRect()
+        self._screen = None
+        # What the overlay paints: the monitor under the cursor, downscaled by selector_preview_scale
+        self._pixmap = None
+        # Whether _pixmap is the full-resolution screenshot the selection can be cropped from
+        self._full_resolution = False
+        # Device pixels per logical pixel of the screen
+        self._device_scale = (1.0, 1.0)
+        self._shown_at = None
+        # Trace of the current capture; main.handle_region carries it on through OCR
+        self.trace = None
 
     def adjust_geometry_to_screen(self):
-        screen = QApplication.primaryScreen()
-        if screen:
-            self.setGeometry(screen.geometry())
+        # The overlay covers only the monitor under the cursor, not the whole virtual desktop
+        self._screen = QApplication.screenAt(QCursor.pos()) or QApplication.primaryScreen()
+        if self._screen:
+            self.setGeometry(self._screen.geometry())
 
     def showEvent(self, event):
+        self._shown_at = time.perf_counter()
+        self.trace = start_trace("capture")
         self.adjust_geometry_to_screen()
-        img = ImageGrab.grab()
-        qimage = ImageQt(img).copy()
-        self._background_pixmap = QPixmap.fromImage(qimage)
+        with self.trace.stage("grab"):
+            pixmap = self.grab(self._screen) if self._screen else None
+        self._pixmap = pixmap
+        self._full_resolution = True
+        if pixmap is not None:
+            self._device_scale = (pixmap.width() / max(1, self.width()), pixmap.height() / max(1, self.height()))
+            scale = float(settings.get("selector_preview_scale", 0.5))
+            if 0 < scale < 1:
+                # The full-resolution screenshot is dropped here; on release only the selection is grabbed again
+                with self.trace.stage("preview"):
+                    self._pixmap = preview_pixmap(pixmap, scale)
+                self._full_resolution = False
+        self.selection = QRect()
         self.activateWindow()
         self.setFocus()
         super().showEvent(event)
 
+    def hideEvent(self, event):
+        # The screenshot is only needed while selecting; a 4K monitor is ~33 MB
+        self.release_frame()
+        super().hideEvent(event)
+
+    def release_frame(self):
+        self._pixmap = None
+
+    def frame_bytes(self):
+        pixmap = self._pixmap
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8 if pixmap is not None else 0
+
+    def _frame_scale(self):
+        # Painted pixmap pixels per widget (logical) pixel; differs from 1.0 on hi-DPI screens or with a preview
+        return self._pixmap.width() / max(1, self.width()), self._pixmap.height() / max(1, self.height())
+
     def paintEvent(self, event):
+        # Qt clips the painter to the update region, which is only what the band move changed
         painter = QPainter(self)
-        if self._background_pixmap:
-            painter.drawPixmap(self.rect(), self._background_pixmap)
-        painter.fillRect(self.rect(), QColor(0, 0, 0, 50))
+        target = event.rect()
+        if self._pixmap is not None:
+            sx, sy = self._frame_scale()
+            # Without a preview this is a 1:1 copy of device pixels; the preview is stretched (nearest
+            # neighbour) over just the updated area
+            source = QRectF(target.x() * sx, target.y() * sy, target.width() * sx, target.height() * sy)
+            painter.drawPixmap(QRectF(target), self._pixmap, source)
+
+        painter.setClipRegion(event.region().subtracted(QRegion(self.selection)))
+        painter.fillRect(target, DIM_COLOR)
+        painter.setClipping(False)
+        if not self.selection.isEmpty():
+            painter.setPen(QPen(BAND_COLOR, BAND_WIDTH))
+            painter.drawRect(self.selection.adjusted(0, 0, -1, -1))
+        painter.end()
+
+        if self._shown_at is not None and self.trace is not None:
+            # Hotkey handler to a painted overlay: the grab plus the first full paint
+            self.trace.add("overlay", (time.perf_counter() - self._shown_at) * 1000)
+            self._shown_at = None
+
+    def _band_region(self, rect):
+        # What changes on screen when the band moves: its border plus the area it covers or uncovers
+        if rect.isEmpty():
+            return QRegion()
+        margin = BAND_WIDTH + 1
+        outer = QRegion(rect.adjusted(-margin, -margin, margin, margin))
+        return outer.subtracted(QRegion(rect.adjusted(margin, margin, -margin, -margin)))
+
+    def _set_selection(self, rect):
+        previous = self.selection
+        self.selection = rect
+        changed = QRegion(previous).xored(QRegion(rect))
+        changed = changed.united(self._band_region(previous)).united(self._band_region(rect))
+        if not changed.isEmpty():
+            self.update(changed)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.origin = event.position().toPoint()
-            self.rubber_band.setGeometry(QRect(self.origin, QSize()))
-            self.rubber_band.show()
+            self._set_selection(QRect())
 
     def mouseMoveEvent(self, event):
         if not self.origin.isNull():
-            rect = QRect(self.origin, event.position().toPoint()).normalized()
-            self.rubber_band.setGeometry(rect)
+            self._set_selection(QRect(self.origin, event.position().toPoint()).normalized())
 
     def mouseReleaseEvent(self, event):
         if event.button() != Qt.MouseButton.LeftButton or self.origin.isNull():
             return
 
-        rect = self.rubber_band.geometry()
+        rect = self.selection
         if rect.width() <= 0 or rect.height() <= 0:
             self.selection_done.emit(None)
             self.close()
             return
 
-        if self._background_pixmap:
-            cropped = self._background_pixmap.copy(rect.translated(self.pos())).toImage()
-            if cropped.format() != QImage.Format.Format_ARGB32:
-                cropped = cropped.convertToFormat(QImage.Format.Format_ARGB32)
-
-            ptr = cropped.constBits()
-            ptr.setsize(cropped.bytesPerLine() * cropped.height())
-            img_array = np.array(ptr).reshape(cropped.height(), cropped.width(), 4)
-            img_bgr = cv2.cvtColor(img_array, cv2.COLOR_BGRA2BGR)
-
-            self.selection_done.emit(img_bgr)
-        else:
+        # End-to-end latency is measured from the mouse release, not from the screen grab
+        self.trace.restart()
+        released_at = time.perf_counter()
+        screen, trace = self._screen, self.trace
+        if self._pixmap is None:
             self.selection_done.emit(None)
+        elif self._full_resolution:
+            device_rect = self._device_rect(rect)
+            img_bgr = pixmap_to_bgr(self._pixmap, device_rect.x(), device_rect.y(),
+                                    device_rect.width(), device_rect.height())
+            self._emit_selection(screen, device_rect, img_bgr, trace, released_at)
+        else:
+            # Grabbed once the overlay is off the screen, so it does not end up in the capture
+            QTimer.singleShot(HIDE_SETTLE_MS, lambda: self._grab_selection(screen, rect, trace, released_at))
 
-        self.rubber_band.hide()
         self.origin = QPoint()
+        self.selection = QRect()
         self.close()
 
+    def _device_rect(self, rect):
+        sx, sy = self._device_scale
+        return QRect(round(rect.x() * sx), round(rect.y() * sy), round(rect.width() * sx), round(rect.height() * sy))
+
+    def _grab_selection(self, screen, rect, trace, released_at):
+        pixmap = self.grab_rect(screen, rect)
+        if pixmap is None or pixmap.isNull():
+            self.selection_done.emit(None)
+            return
+        device_rect = self._device_rect(rect)
+        device_rect.setSize(pixmap.size())
+        img_bgr = pixmap_to_bgr(pixmap, 0, 0, pixmap.width(), pixmap.height())
+        self._emit_selection(screen, device_rect, img_bgr, trace, released_at)
+
+    def _emit_selection(self, screen, device_rect, img_bgr, trace, released_at):
+        # Qt keeps each screen's top-left at its native position and scales only the size,
+        # so device-pixel offsets add straight onto it
+        origin = screen.geometry().topLeft()
+        self.region_selected.emit((origin.x() + device_rect.x(), origin.y() + device_rect.y(),
+                                   origin.x() + device_rect.x() + device_rect.width(),
+                                   origin.y() + device_rect.y() + device_rect.height()))
+        trace.add("crop", (time.perf_counter() - released_at) * 1000)
+        self.selection_done.emit(img_bgr)
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Escape:
             self.selection_done.emit(None)
@@ -0,0 +1,383 @@
+import json
+import queue
+import socket
+import threading
+import time
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+from logs import get_logger
+from tracing import metrics
+
+log = get_logger("SINK")
+
+DEFAULT_QUEUE_SIZE = 32
+SOCKET_SEND_TIMEOUT = 0.5
+
+
+def copy_to_clipboard(text):
+    """Copies through Qt's clipboard, which the tray process owns for as long as it runs.
+
+    pyperclip starts an xclip/xsel process per call on Linux; the Qt clipboard is only a
+    handful of window-system calls. Must run on the GUI thread; falls back to pyperclip when
+    there is no QApplication.
+    """
+    app = QApplication.instance()
+    if app is None:
+        import pyperclip
+        pyperclip.copy(text)
+        return
+    app.clipboard().setText(text)
+
+
+class Sink:
+    """One consumer of OCR output. deliver(output) gets a dict with text, lang, confidence,
+    lines, scores and created; exceptions are logged and counted by the pipeline.
+
+    Sinks with main_thread set run on the GUI thread (widgets, the clipboard); the others run
+    on their own thread with a queue of queue_size outputs (0 = unbounded), dropping the oldest
+    when a new one arrives while it is full.
+    """
+    name = "sink"
+    main_thread = False
+    queue_size = DEFAULT_QUEUE_SIZE
+
+    def enabled(self):
+        return True
+
+    def deliver(self, output):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ClipboardSink(Sink):
+    name = "clipboard"
+    main_thread = True
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def enabled(self):
+        return self.settings.get("auto_copy", True)
+
+    def deliver(self, output):
+        copy_to_clipboard(output["text"])
+
+
+class OverlaySink(Sink):
+    name = "overlay"
+    main_thread = True
+
+    def __init__(self, overlay):
+        self.overlay = overlay
+
+    def deliver(self, output):
+        self.overlay.display_text(output["text"])
+
+
+class TTSSink(Sink):
+    name = "tts"
+    # Only the latest capture is worth reading out
+    queue_size = 1
+
+    def __init__(self, settings, speak):
+        self.settings = settings
+        self.speak = speak
+
+    def enabled(self):
+        return self.settings.get("auto_tts", False)
+
+    def deliver(self, output):
+        # Only the hand-off; time to first audio is tracked by the TTS worker as tts.first_audio
+        self.speak(output["text"], output["lang"])
+
+
+class HistorySink(Sink):
+    name = "history"
+    # The history list is a widget; the store itself only queues the entry for its writer thread
+    main_thread = True
+
+    def __init__(self, store, on_added=None):
+        self.store = store
+        self.on_added = on_added
+
+    def deliver(self, output):
+        entry = self.store.add(output["text"], output["lang"], output.get("confidence"), output.get("created"))
+        if self.on_added:
+            self.on_added(entry)
+
+
+class FileSink(Sink):
+    """Appends every capture to output_file_path: one JSON object per line for *.jsonl, plain
+    text followed by a blank line otherwise."""
+    name = "file"
+    queue_size = 0
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.path = None
+        self._file = None
+
+    def enabled(self):
+        return bool(self.settings.get("output_file_path"))
+
+    def deliver(self, output):
+        path = self.settings.get("output_file_path")
+        if path != self.path:
+            self.close()
+            self._file = open(path, "a", encoding="utf-8", buffering=1)
+            self.path = path
+        if path.lower().endswith(".jsonl"):
+            self._file.write(json.dumps(_public(output), ensure_ascii=False) + "\n")
+        else:
+            self._file.write(output["text"] + "\n\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self.path = None
+
+
+class SocketSink(Sink):
+    """Broadcasts every capture as a JSON line to clients connected to 127.0.0.1:output_socket_port.
+
+    For companion tools (translators, overlays in other processes) that want the text as it
+    arrives; a client that cannot keep up within SOCKET_SEND_TIMEOUT is disconnected.
+    """
+    name = "socket"
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.port = None
+        self._server = None
+        self._clients = []
+        self._lock = threading.Lock()
+        # configure() runs on the settings watcher and deliver() on the sink thread; both may
+        # (re)start the listener
+        self._lifecycle = threading.RLock()
+
+    def enabled(self):
+        return bool(self.settings.get("output_socket_port"))
+
+    def configure(self):
+        # Starts (or moves) the listener so clients can connect before the first capture
+        port = int(self.settings.get("output_socket_port") or 0)
+        with self._lifecycle:
+            if port == self.port:
+                return
+            if not port:
+                self.close()
+                return
+            try:
+                self._listen(port)
+            except OSError as e:
+                log.error("Could not listen for socket clients", port=port, error=str(e))
+
+    def _listen(self, port):
+        # Called with _lifecycle held
+        self.close()
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("127.0.0.1", port))
+        server.listen()
+        self._server, self.port = server, port
+        threading.Thread(target=self._accept_loop, args=(server,), name="sink-socket", daemon=True).start()
+        log.info("Broadcasting captures", port=port)
+
+    def _accept_loop(self, server):
+        while True:
+            try:
+                client, address = server.accept()
+            except OSError:
+                return
+            client.settimeout(SOCKET_SEND_TIMEOUT)
+            with self._lock:
+                self._clients.append(client)
+            log.info("Socket client connected", address=f"{address[0]}:{address[1]}")
+
+    def deliver(self, output):
+        port = int(self.settings.get("output_socket_port"))
+        with self._lifecycle:
+            if port != self.port:
+                self._listen(port)
+        data = (json.dumps(_public(output), ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.sendall(data)
+            except OSError:
+                with self._lock:
+                    if client in self._clients:
+                        self._clients.remove(client)
+                client.close()
+
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def close(self):
+        with self._lifecycle:
+            with self._lock:
+                clients, self._clients = self._clients, []
+            for client in clients:
+                client.close()
+            if self._server is not None:
+                try:
+                    # Wakes the accept() call on the listener thread
+                    self._server.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                self._server.close()
+            self._server = None
+            self.port = None
+
+
+def _public(output):
+    return {key: output.get(key) for key in ("created", "text", "lang", "confidence", "lines", "scores")}
+
+
+class _Delivery:
+    # One published output on its way to every enabled sink; the last one to finish closes the trace
+    def __init__(self, output, trace, sinks):
+        self.output = output
+        self.trace = trace
+        self.published = time.perf_counter()
+        self._remaining = sinks
+        self._lock = threading.Lock()
+
+    def done(self, sink):
+        ms = (time.perf_counter() - self.published) * 1000
+        if self.trace is not None:
+            self.trace.add(f"sink_{sink.name}", ms)
+        else:
+            metrics.observe(f"sink.{sink.name}", ms)
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last and self.trace is not None:
+            self.trace.finish()
+
+
+class _SinkThread:
+    def __init__(self, pipeline, sink):
+        self.pipeline = pipeline
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=sink.queue_size)
+        self.thread = threading.Thread(target=self._run, name=f"sink-{sink.name}", daemon=True)
+        self.thread.start()
+
+    def put(self, delivery):
+        while True:
+            try:
+                self.queue.put_nowait(delivery)
+                return
+            except queue.Full:
+                pass
+            try:
+                dropped = self.queue.get_nowait()
+            except queue.Empty:
+                continue
+            self.pipeline._count(self.sink, "dropped")
+            log.warning("Sink is falling behind, dropped an output", sink=self.sink.name)
+            # The dropped output still counts as handled so its trace is closed
+            dropped.done(self.sink)
+
+    def stop(self):
+        # Whatever is still queued is delivered first
+        while True:
+            try:
+                self.queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                if not self.thread.is_alive():
+                    return
+        self.thread.join(timeout=2)
+
+    def _run(self):
+        while True:
+            delivery = self.queue.get()
+            if delivery is None:
+                return
+            self.pipeline._deliver(self.sink, delivery)
+
+
+class SinkPipeline(QObject):
+    """Fans every OCR result out to its sinks without waiting for any of them.
+
+    publish() returns straight away. Threaded sinks each have their own queue and thread, so a
+    slow consumer (a file on a network drive, a stalled socket client) only delays itself; main
+    thread sinks are queued onto the GUI event loop. A sink that raises is logged and counted
+    and keeps receiving later outputs. Time from publish() to each sink finishing is recorded
+    as the trace stage sink_<name> (or the metric sink.<name> without a trace), and the trace
+    is finished once every enabled sink has handled the output.
+    """
+    _run_on_main_thread = pyqtSignal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self._sinks = []
+        self._threads = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        # Queued even when publish() runs on the GUI thread, so publish() never runs a sink inline
+        self._run_on_main_thread.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+
+    def add(self, sink):
+        self._sinks.append(sink)
+        self._counts[sink.name] = {"delivered": 0, "failed": 0, "dropped": 0}
+        if not sink.main_thread:
+            self._threads[sink.name] = _SinkThread(self, sink)
+        return sink
+
+    def publish(self, output, trace=None):
+        output.setdefault("created", time.time())
+        sinks = []
+        for sink in self._sinks:
+            try:
+                if sink.enabled():
+                    sinks.append(sink)
+            except Exception:
+                log.exception("Sink enabled() failed", sink=sink.name)
+        if not sinks:
+            if trace is not None:
+                trace.finish()
+            return
+
+        delivery = _Delivery(output, trace, len(sinks))
+        for sink in sinks:
+            if sink.main_thread:
+                self._run_on_main_thread.emit(sink, delivery)
+            else:
+                self._threads[sink.name].put(delivery)
+
+    def _deliver(self, sink, delivery):
+        try:
+            sink.deliver(delivery.output)
+            self._count(sink, "delivered")
+        except Exception:
+            self._count(sink, "failed")
+            log.exception("Sink failed", sink=sink.name)
+        finally:
+            delivery.done(sink)
+
+    def _count(self, sink, outcome):
+        with self._lock:
+            self._counts[sink.name][outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+    def close(self):
+        for worker in self._threads.values():
+            worker.stop()
+        for sink in self._sinks:
+            try:
+                sink.close()
+            except Exception:
+                log.exception("Closing sink failed", sink=sink.name)
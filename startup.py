@@ -0,0 +1,108 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+from logs import get_logger
+
+log = get_logger("STARTUP")
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+# Released on purpose (e.g. after a long idle period); loaded again on next use
+UNLOADED = "unloaded"
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name, kind="import"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, kind, time.perf_counter() - start)
+
+    def mark(self, name):
+        # Milestones are measured from process start rather than as a duration
+        self._add(name, "milestone", time.perf_counter() - self.started)
+
+    def _add(self, name, kind, seconds):
+        with self._lock:
+            self.records.append({
+                "name": name,
+                "kind": kind,
+                "seconds": seconds,
+                "thread": threading.current_thread().name
+            })
+
+    def report(self):
+        with self._lock:
+            records = list(self.records)
+        lines = ["[STARTUP] Timing report:"]
+        for kind in ("import", "init", "milestone"):
+            for r in records:
+                if r["kind"] == kind:
+                    lines.append(
+                        f"[STARTUP]   {kind:<9} {r['name']:<28} {r['seconds'] * 1000:9.1f} ms  ({r['thread']})"
+                    )
+        return "\n".join(lines)
+
+
+def timed_import(module_name):
+    with startup_timer.measure(module_name):
+        return importlib.import_module(module_name)
+
+
+class BackgroundLoader:
+    def __init__(self):
+        self._tasks = []
+        self._states = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, name, init_fn):
+        self._tasks.append((name, init_fn))
+        with self._lock:
+            self._states[name] = LOADING
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for name, init_fn in self._tasks:
+            try:
+                init_fn()
+            except Exception as e:
+                log.error("Failed to load", component=name, error=str(e))
+                self.set_state(name, FAILED, e)
+            else:
+                self.set_state(name, READY)
+        startup_timer.mark("background loading done")
+        log.info(startup_timer.report())
+
+    def state(self, name):
+        with self._lock:
+            return self._states.get(name)
+
+    def error(self, name):
+        with self._lock:
+            return self._errors.get(name)
+
+    def set_state(self, name, state, error=None):
+        with self._lock:
+            self._states[name] = state
+            self._errors[name] = error
+
+
+startup_timer = StartupTimer()
+loader = BackgroundLoader()
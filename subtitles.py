@@ -0,0 +1,299 @@
+import argparse
+import difflib
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import cv2
+
+from watch import frame_signature, frames_differ
+
+# Bottom 30% of the frame, where hard subtitles usually sit
+DEFAULT_REGION = "0,0.7,1,0.3"
+PROGRESS_INTERVAL = 5.0
+
+
+def parse_region(value):
+    # "x,y,w,h" in pixels, or as fractions of the frame when every value is at most 1
+    parts = [float(v) for v in value.split(",")]
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("region must be x,y,w,h")
+    return tuple(parts)
+
+
+def crop_region(frame, region):
+    height, width = frame.shape[:2]
+    x, y, w, h = region
+    if all(v <= 1 for v in region):
+        x, y, w, h = x * width, y * height, w * width, h * height
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(width, int(x + w)), min(height, int(y + h))
+    if x1 <= x0 or y1 <= y0:
+        raise ValueError(f"region {region} is outside the {width}x{height} frame")
+    return frame[y0:y1, x0:x1]
+
+
+def format_srt_time(ms):
+    ms = max(0, int(round(ms)))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+class VideoSampler:
+    """Yields (timestamp_ms, crop) for sampled frames whose subtitle region changed.
+
+    Frames between samples are only grabbed, not converted. A sample counts as changed when
+    its thumbnail differs from the last yielded one (not the previous sample), so slow fades
+    still add up to a change. Only the current frame is held, however long the video.
+    """
+
+    def __init__(self, path, region, sample_ms=200, change_ratio=0.01):
+        self.path = path
+        self.region = region
+        self.sample_ms = sample_ms
+        self.change_ratio = change_ratio
+        self.fps = 0.0
+        self.frames = 0
+        self.samples = 0
+        self.keyframes = 0
+        self.position_ms = 0.0
+        self.duration_ms = 0.0
+
+    def __iter__(self):
+        capture = cv2.VideoCapture(self.path)
+        if not capture.isOpened():
+            raise ValueError(f"could not open video: {self.path}")
+        try:
+            self.fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+            if self.fps > 0:
+                self.duration_ms = capture.get(cv2.CAP_PROP_FRAME_COUNT) / self.fps * 1000
+            step = max(1, round(self.fps * self.sample_ms / 1000)) if self.fps > 0 else 1
+            last_signature = None
+            while capture.grab():
+                index = self.frames
+                self.frames += 1
+                self.position_ms = index / self.fps * 1000 if self.fps > 0 else capture.get(cv2.CAP_PROP_POS_MSEC)
+                if index % step:
+                    continue
+                ok, frame = capture.retrieve()
+                if not ok:
+                    continue
+                self.samples += 1
+                crop = crop_region(frame, self.region)
+                # The signature weights BGR channels as if they were RGB; only differences matter here
+                signature = frame_signature(crop)
+                if last_signature is not None and not frames_differ(signature, last_signature, self.change_ratio):
+                    continue
+                last_signature = signature
+                self.keyframes += 1
+                # Copied so the full decoded frame is not kept alive while the crop waits for OCR
+                yield self.position_ms, crop.copy()
+        finally:
+            capture.release()
+        # The last frame is shown for one frame interval
+        self.position_ms += 1000 / self.fps if self.fps > 0 else 0
+        self.duration_ms = max(self.duration_ms, self.position_ms)
+
+
+def _normalize_text(text):
+    return " ".join(text.split())
+
+
+class CueBuilder:
+    """Merges per-keyframe OCR results, in time order, into subtitle cues.
+
+    A keyframe whose text matches the open cue (difflib ratio >= similarity, which absorbs
+    OCR noise and fade frames) extends it, keeping the reading with the highest confidence;
+    different text closes it at that keyframe's time. Empty text closes the cue without
+    opening one. Cues shorter than min_duration_ms are dropped.
+    """
+
+    def __init__(self, similarity=0.85, min_duration_ms=0):
+        self.similarity = similarity
+        self.min_duration_ms = min_duration_ms
+        self.count = 0
+        self._open = None
+
+    def add(self, timestamp_ms, text, confidence):
+        text = _normalize_text(text)
+        cue = self._open
+        if cue is not None and text and \
+                difflib.SequenceMatcher(None, cue["text"], text).ratio() >= self.similarity:
+            cue["frames"] += 1
+            if confidence > cue["confidence"]:
+                cue["text"], cue["confidence"] = text, confidence
+            return []
+
+        finished = self.finish(timestamp_ms)
+        if text:
+            self._open = {"start": timestamp_ms, "text": text, "confidence": confidence, "frames": 1}
+        return finished
+
+    def finish(self, end_ms):
+        cue, self._open = self._open, None
+        if cue is None or end_ms - cue["start"] < self.min_duration_ms:
+            return []
+        self.count += 1
+        cue["end"] = end_ms
+        cue["index"] = self.count
+        return [cue]
+
+
+class SrtWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, cue):
+        self.out.write(f"{cue['index']}\n{format_srt_time(cue['start'])} --> {format_srt_time(cue['end'])}\n"
+                       f"{cue['text']}\n\n")
+        self.out.flush()
+
+
+class JsonlWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, cue):
+        self.out.write(json.dumps({
+            "index": cue["index"],
+            "start_ms": round(cue["start"]),
+            "end_ms": round(cue["end"]),
+            "text": cue["text"],
+            "lang": cue["lang"],
+            "confidence": round(cue["confidence"], 4),
+            "frames": cue["frames"],
+        }, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+
+def _stdout_to_stderr():
+    # Log records and native library output that would go to stdout end up on stderr instead
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+
+def _init_worker():
+    # Keep worker logging (including native library output) off stdout, which may carry the subtitles
+    _stdout_to_stderr()
+    from ocr import load_engines, load_classifier
+    load_engines()
+    load_classifier()
+
+
+def _recognize(crop):
+    # Same OCR as extract_text_with_lang(); the confidence is needed to pick between readings
+    from ocr import extract_text_details
+    result = extract_text_details(crop)
+    return result["text"], result["confidence"]
+
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def extract_subtitles(sampler, writer, workers=1, similarity=0.85, min_duration_ms=0, progress=None):
+    """Streams keyframes from `sampler` through OCR and writes cues as soon as they close.
+
+    Keyframes are recognised by `workers` spawned processes (0 = in this process). At most
+    2 * workers crops wait for OCR at a time; decoding pauses until the oldest is done, so
+    memory stays bounded for any video length. Returns the number of cues written.
+    """
+    from ocr import detect_unicode_script
+
+    builder = CueBuilder(similarity, min_duration_ms)
+    max_pending = max(1, 2 * workers)
+    pending = deque()
+
+    def emit(cues):
+        for cue in cues:
+            cue["lang"] = detect_unicode_script(cue["text"])
+            writer.write(cue)
+
+    def drain(limit):
+        while len(pending) > limit:
+            timestamp_ms, future = pending.popleft()
+            text, confidence = future.result()
+            emit(builder.add(timestamp_ms, text, confidence))
+
+    pool = None
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"), initializer=_init_worker)
+    try:
+        for timestamp_ms, crop in sampler:
+            if pool is not None:
+                pending.append((timestamp_ms, pool.submit(_recognize, crop)))
+            else:
+                pending.append((timestamp_ms, _completed(_recognize(crop))))
+            drain(max_pending - 1)
+            if progress:
+                progress(sampler, builder)
+        drain(0)
+        emit(builder.finish(sampler.duration_ms))
+    finally:
+        if pool is not None:
+            # Let workers exit normally so their exit hooks (e.g. cache persistence) run
+            pool.shutdown(wait=True, cancel_futures=True)
+    return builder.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract hard subtitles from a video file to SRT or JSONL.")
+    parser.add_argument("video")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file; .jsonl writes JSON lines, anything else SRT (default: SRT to stdout)")
+    parser.add_argument("--region", type=parse_region, default=parse_region(DEFAULT_REGION),
+                        help=f"subtitle area as x,y,w,h in pixels or frame fractions (default {DEFAULT_REGION})")
+    parser.add_argument("--sample-ms", type=float, default=200, help="time between sampled frames")
+    parser.add_argument("--change-ratio", type=float, default=0.01,
+                        help="fraction of the region's thumbnail that must change to re-run OCR")
+    parser.add_argument("--similarity", type=float, default=0.85,
+                        help="keyframes whose text is at least this similar extend the current cue")
+    parser.add_argument("--min-duration-ms", type=float, default=0, help="drop cues shorter than this")
+    parser.add_argument("-w", "--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="number of OCR processes, each holding its own model (0 = OCR in this process)")
+    args = parser.parse_args(argv)
+
+    sampler = VideoSampler(args.video, args.region, args.sample_ms, args.change_ratio)
+    last_report = [time.perf_counter()]
+
+    def progress(sampler, builder):
+        now = time.perf_counter()
+        if now - last_report[0] < PROGRESS_INTERVAL:
+            return
+        last_report[0] = now
+        print(f"[SUBS] {format_srt_time(sampler.position_ms)} / {format_srt_time(sampler.duration_ms)}, "
+              f"{sampler.keyframes} keyframes, {builder.count} cues", file=sys.stderr)
+
+    jsonl = args.output.lower().endswith(".jsonl")
+    start = time.perf_counter()
+    if args.output == "-":
+        # The subtitles get their own handle on stdout; everything else written there, including
+        # in-process OCR logging with --workers 0, goes to stderr
+        out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding=sys.stdout.encoding)
+        _stdout_to_stderr()
+        with out:
+            cues = extract_subtitles(sampler, SrtWriter(out), args.workers, args.similarity,
+                                     args.min_duration_ms, progress)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            writer = JsonlWriter(out) if jsonl else SrtWriter(out)
+            cues = extract_subtitles(sampler, writer, args.workers, args.similarity, args.min_duration_ms, progress)
+
+    elapsed = time.perf_counter() - start
+    print(f"[SUBS] {cues} cue(s) from {sampler.keyframes} keyframe(s) of {sampler.samples} sampled / "
+          f"{sampler.frames} frames in {elapsed:.1f}s ({sampler.duration_ms / 1000 / max(elapsed, 1e-6):.1f}x realtime)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import difflib
+import os
+
+import pytest
+
+from utils import settings
+
+
+def test_paddle_and_onnx_read_the_same_text(record_property):
+    pytest.importorskip("paddleocr")
+    pytest.importorskip("onnxruntime")
+    paths = [settings.get(key) for key in ("onnx_det_model", "onnx_rec_model", "onnx_rec_dict")]
+    if not all(path and os.path.exists(path) for path in paths):
+        pytest.skip("onnx_det_model, onnx_rec_model and onnx_rec_dict must point at exported PP-OCRv5 models")
+
+    from benchmarks.compare_backends import MIN_SIMILARITY, timed_predict
+    from benchmarks.synth import english_samples
+    from ocr_backends import create_backend
+
+    image = english_samples([28])[0]["image"]
+    outputs = {name: timed_predict(create_backend(name, settings.all()), image, repeat=3)
+               for name in ("paddle", "onnx")}
+    (paddle_text, paddle_ms), (onnx_text, onnx_ms) = outputs["paddle"], outputs["onnx"]
+    record_property("paddle_ms", round(paddle_ms, 1))
+    record_property("onnx_ms", round(onnx_ms, 1))
+    print(f"paddle {paddle_ms:.1f} ms, onnx {onnx_ms:.1f} ms")
+
+    similarity = difflib.SequenceMatcher(None, paddle_text, onnx_text).ratio()
+    assert similarity >= MIN_SIMILARITY, f"paddle: {paddle_text!r}, onnx: {onnx_text!r}"
@@ -0,0 +1,16 @@
+import pytest
+
+from ocr import bucket_shape
+
+SIDES = [320, 640, 960, 1280, 1920, 2560]
+
+
+@pytest.mark.parametrize("shape, expected", [
+    ((40, 300), (64, 320)),      # a single line steps by 32 below the first bucket
+    ((120, 500), (128, 640)),    # each side is bucketed on its own
+    ((700, 1000), (960, 1280)),
+    ((2600, 100), (2624, 128)),  # beyond the largest bucket
+    ((330, 330), (352, 352)),    # 640x640 would be more than twice the area
+])
+def test_bucket_shape(shape, expected):
+    assert bucket_shape(*shape, SIDES) == expected
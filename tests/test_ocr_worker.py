@@ -0,0 +1,118 @@
+import queue
+
+import numpy as np
+import pytest
+
+import ocr_worker
+from ocr_worker import OCRWorkerPool
+
+
+class FakeProcess:
+    def __init__(self):
+        self.alive = True
+        self.exitcode = None
+        self.pid = 0
+
+    def is_alive(self):
+        return self.alive
+
+    def crash(self):
+        self.alive = False
+        self.exitcode = -11
+
+
+class FakeContext:
+    Queue = queue.Queue
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Worker processes are replaced by fakes; the tests play the worker side through _handle_message
+    monkeypatch.setattr(ocr_worker, "RESTART_DELAY", 0)
+    pool = OCRWorkerPool(worker_count=2)
+    pool._ctx = FakeContext()
+    pool._running = True
+    pool.processes = {}
+
+    def spawn(worker_id, task_queue):
+        pool.processes[worker_id] = FakeProcess()
+        with pool._lock:
+            pool._task_queues[worker_id] = task_queue
+            pool._workers[worker_id] = pool.processes[worker_id]
+    monkeypatch.setattr(pool, "_spawn", spawn)
+    monkeypatch.setattr(pool, "_set_state", lambda state: setattr(pool, "state", state))
+    for worker_id in range(pool.worker_count):
+        pool._spawn(worker_id, queue.Queue())
+        pool._handle_message(("ready", worker_id))
+
+    pool.failures = []
+    pool.results = []
+    pool.job_failed.connect(lambda job_id, reason: pool.failures.append((job_id, reason)))
+    pool.result_ready.connect(lambda job_id, result: pool.results.append(job_id))
+    yield pool
+    for job_id in list(pool._segments):
+        pool._release(job_id)
+
+
+def submit(pool):
+    return pool.submit(np.zeros((4, 4, 3), dtype=np.uint8))
+
+
+def test_jobs_are_spread_over_the_workers(pool):
+    first, second = submit(pool), submit(pool)
+    assert pool._task_queues[0].get_nowait()[0] == first
+    assert pool._task_queues[1].get_nowait()[0] == second
+
+
+def test_crash_before_started_arrives_fails_the_job(pool):
+    job_id = submit(pool)
+    pool.processes[0].crash()
+    pool._check_workers()
+
+    assert pool.failures == [(job_id, "OCR worker crashed")]
+    assert not pool.busy()
+    # The restarted worker gets a fresh queue without the failed job
+    assert pool._task_queues[0].empty()
+
+
+def test_crash_fails_only_that_workers_jobs(pool):
+    first, second = submit(pool), submit(pool)
+    pool._handle_message(("started", 1, second))
+    pool.processes[0].crash()
+    pool._check_workers()
+
+    assert pool.failures == [(first, "OCR worker crashed")]
+    pool._handle_message(("done", 1, second, {"text": "ok"}))
+    assert pool.results == [second]
+    assert not pool.busy()
+
+
+def test_messages_from_a_crashed_worker_are_ignored(pool):
+    job_id = submit(pool)
+    pool.processes[0].crash()
+    pool._check_workers()
+
+    pool._handle_message(("started", 0, job_id))
+    pool._handle_message(("error", 0, job_id, "shared memory segment is gone"))
+    assert pool.failures == [(job_id, "OCR worker crashed")]
+    assert not pool._started
+
+
+def test_load_failure_fails_the_workers_jobs(pool):
+    job_id = submit(pool)
+    pool._handle_message(("failed", 0, "no model"))
+
+    assert pool.failures == [(job_id, "OCR worker failed to load: no model")]
+    # Later jobs skip the failed worker
+    later = submit(pool)
+    assert pool._task_queues[1].get_nowait()[0] == later
+
+
+def test_started_job_cannot_be_cancelled(pool):
+    started, waiting = submit(pool), submit(pool)
+    pool._handle_message(("started", 0, started))
+
+    assert not pool.cancel(started)
+    assert pool.cancel(waiting)
+    pool._handle_message(("error", 1, waiting, "shared memory segment is gone"))
+    assert pool.failures == [(waiting, "cancelled")]
@@ -0,0 +1,91 @@
+import pytest
+
+from profiles import ProfileManager, AUTO, FAST, ACCURATE, CUSTOM, EXPLORE_INTERVAL
+
+
+@pytest.fixture
+def config():
+    return {"ocr_profile": AUTO, "latency_target_ms": 800}
+
+
+@pytest.fixture
+def manager(config):
+    return ProfileManager(config)
+
+
+@pytest.mark.parametrize("profile, expected", [
+    (AUTO, [FAST, ACCURATE]),
+    (FAST, [FAST]),
+    (ACCURATE, [ACCURATE]),
+    (CUSTOM, [CUSTOM]),
+])
+def test_candidates_cover_every_profile_choose_can_pick(config, manager, profile, expected):
+    config["ocr_profile"] = profile
+    assert manager.candidates() == expected
+
+
+def test_first_cold_call_is_left_out_of_the_stats(manager):
+    manager.record(ACCURATE, (200, 400), 2, 5000)
+    assert ACCURATE not in manager.stats()
+
+    manager.record(ACCURATE, (200, 400), 2, 100)
+    assert manager.stats()[ACCURATE]["count"] == 1
+
+
+def test_warmed_profile_records_its_first_call(manager):
+    manager.mark_warm(ACCURATE)
+    manager.record(ACCURATE, (200, 400), 2, 100)
+    assert manager.stats()[ACCURATE]["count"] == 1
+
+
+def test_slow_accurate_profile_is_still_retried(manager):
+    manager.mark_warm(ACCURATE)
+    for _ in range(10):
+        manager.record(ACCURATE, (2000, 2000), 20, 5000)
+
+    choices = [manager.choose((2000, 2000), 20) for _ in range(2 * EXPLORE_INTERVAL)]
+    assert choices.count(ACCURATE) == 2
+    assert choices.count(FAST) == 2 * EXPLORE_INTERVAL - 2
+
+
+class StubRecognizer:
+    built = 0
+
+    def __init__(self, model_name=None):
+        StubRecognizer.built += 1
+        self.model_name = model_name
+
+    def recognize(self, crops):
+        return [("", 0.0) for _ in crops]
+
+
+def test_recognizer_is_shared_by_profiles_with_the_same_model(config, manager):
+    from ocr_backends import register_backend, register_recognizer
+
+    register_backend("stub_rec", lambda settings, options: pytest.fail("the pipeline should not be loaded"))
+    register_recognizer("stub_rec", StubRecognizer, lambda settings, options: {"model_name": options.get("rec")})
+    config.update({"ocr_backend": "stub_rec", "custom_profile": {"rec": "server"}})
+    StubRecognizer.built = 0
+
+    custom = manager.get_recognizer(CUSTOM)
+    assert manager.get_recognizer(CUSTOM) is custom
+    # The built-in profiles have no options for this backend, so they share a second model
+    assert manager.get_recognizer(FAST) is manager.get_recognizer(ACCURATE) is not custom
+    assert StubRecognizer.built == 2
+
+
+def test_loaded_pipeline_shares_its_recognizer(config, manager):
+    from ocr_backends import OCRBackend, register_backend, register_recognizer
+
+    class Pipeline(OCRBackend):
+        def __init__(self):
+            self.recognizer = StubRecognizer.__new__(StubRecognizer)
+
+    register_backend("stub_pipeline", lambda settings, options: Pipeline())
+    register_recognizer("stub_pipeline", StubRecognizer, lambda settings, options: {})
+    config["ocr_backend"] = "stub_pipeline"
+    StubRecognizer.built = 0
+
+    pipeline = manager.get_backend(ACCURATE)
+    assert manager.get_recognizer(ACCURATE) is pipeline.recognizer
+    assert StubRecognizer.built == 0
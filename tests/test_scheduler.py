@@ -0,0 +1,242 @@
+import threading
+
+import pytest
+
+from scheduler import HotkeyDispatcher, JobScheduler, CAPTURE, WATCH
+
+
+class ScriptedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ManualPool:
+    """Records submitted jobs; the test decides when each one finishes."""
+
+    def __init__(self):
+        self.scheduler = None
+        self.submitted = []
+        self.cancelled = []
+
+    def submit(self, img):
+        self.submitted.append(img)
+        return len(self.submitted)
+
+    def cancel(self, pool_id):
+        self.cancelled.append(pool_id)
+        return True
+
+    def finish(self, pool_id):
+        self.scheduler.job_done(pool_id, {"text": self.submitted[pool_id - 1]})
+
+    def fail(self, pool_id, reason="boom"):
+        self.scheduler.job_failed(pool_id, reason)
+
+
+@pytest.fixture
+def pool_and_outcomes():
+    pool = ManualPool()
+    outcomes = {"result": [], "failed": [], "cancelled": []}
+    scheduler = JobScheduler(
+        pool.submit, pool.cancel,
+        on_result=lambda job_id, result, ctx: outcomes["result"].append((job_id, result["text"], ctx)),
+        on_failed=lambda job_id, reason, ctx: outcomes["failed"].append((job_id, reason, ctx)),
+        on_cancelled=lambda job_id, ctx: outcomes["cancelled"].append((job_id, ctx)),
+    )
+    pool.scheduler = scheduler
+    return scheduler, pool, outcomes
+
+
+# --- HotkeyDispatcher ---
+
+def fire_presses(dispatcher, clock, presses, repeat_hz, runs):
+    for i in range(presses):
+        clock.now = i / repeat_hz
+        dispatcher.fire("alt+q", lambda: runs.append(clock.now))
+        dispatcher.wait_idle()
+
+
+def test_key_repeat_is_debounced():
+    clock = ScriptedClock()
+    dispatcher = HotkeyDispatcher(debounce_ms=250, clock=clock)
+    runs = []
+    fire_presses(dispatcher, clock, presses=30, repeat_hz=30, runs=runs)
+    # Accepted at 0, 8/30, 16/30 and 24/30 s: the first press at least 250 ms after the last one
+    assert runs == pytest.approx([0, 8 / 30, 16 / 30, 24 / 30])
+    assert dispatcher.accepted == 4
+    assert dispatcher.dropped == 26
+
+
+def test_zero_debounce_runs_every_press_once_idle():
+    clock = ScriptedClock()
+    dispatcher = HotkeyDispatcher(debounce_ms=0, clock=clock)
+    runs = []
+    fire_presses(dispatcher, clock, presses=30, repeat_hz=30, runs=runs)
+    assert len(runs) == 30
+
+
+def test_presses_while_callback_runs_are_coalesced():
+    dispatcher = HotkeyDispatcher(debounce_ms=0)
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def slow_callback():
+        started.set()
+        runs.append("first")
+        release.wait(5)
+
+    assert dispatcher.fire("alt+w", slow_callback)
+    assert started.wait(5)
+    accepted = [dispatcher.fire("alt+w", lambda: runs.append("again")) for _ in range(19)]
+    release.set()
+    dispatcher.wait_idle()
+
+    assert not any(accepted)
+    assert runs == ["first"]
+    assert dispatcher.dropped == 19
+
+
+def test_hotkeys_are_coalesced_independently():
+    dispatcher = HotkeyDispatcher(debounce_ms=1000, clock=ScriptedClock())
+    runs = []
+    assert dispatcher.fire("alt+q", lambda: runs.append("q"))
+    assert dispatcher.fire("alt+w", lambda: runs.append("w"))
+    dispatcher.wait_idle()
+    assert sorted(runs) == ["q", "w"]
+
+
+def test_failing_callback_does_not_stop_the_dispatcher():
+    dispatcher = HotkeyDispatcher(debounce_ms=0)
+    runs = []
+    dispatcher.fire("alt+q", lambda: 1 / 0)
+    dispatcher.wait_idle()
+    dispatcher.fire("alt+q", lambda: runs.append(1))
+    dispatcher.wait_idle()
+    assert runs == [1]
+
+
+# --- JobScheduler ---
+
+def test_newest_capture_supersedes_waiting_and_running(pool_and_outcomes):
+    scheduler, pool, outcomes = pool_and_outcomes
+    first = scheduler.submit(CAPTURE, "c1", "ctx1")
+    second = scheduler.submit(CAPTURE, "c2", "ctx2")
+    third = scheduler.submit(CAPTURE, "c3", "ctx3")
+
+    # c1 went to the pool; c2 was waiting and never reaches it; c1 is asked to cancel
+    assert pool.submitted == ["c1"]
+    assert pool.cancelled == [1]
+    assert sorted(outcomes["cancelled"]) == [(first, "ctx1"), (second, "ctx2")]
+
+    # The pool finished c1 anyway: its result is dropped and the slot goes to c3
+    pool.finish(1)
+    assert outcomes["result"] == []
+    assert pool.submitted == ["c1", "c3"]
+
+    pool.finish(2)
+    assert outcomes["result"] == [(third, "c3", "ctx3")]
+    assert scheduler.stats() == {"submitted": 3, "completed": 1, "failed": 0, "superseded": 2,
+                                 "running": 0, "waiting": 0}
+
+
+def test_capture_burst_delivers_only_the_newest(pool_and_outcomes):
+    scheduler, pool, outcomes = pool_and_outcomes
+    for seq in range(20):
+        scheduler.submit(CAPTURE, f"c{seq}", seq)
+        assert scheduler.running(CAPTURE) <= scheduler.limits[CAPTURE]
+        # The pool only finishes what it has, one job at a time
+        if seq % 5 == 4:
+            pool.finish(len(pool.submitted))
+    while scheduler.running():
+        pool.finish(len(pool.submitted))
+
+    assert [ctx for _, _, ctx in outcomes["result"]] == [19]
+    assert len(outcomes["cancelled"]) == 19
+
+
+def test_watch_jobs_queue_up_within_their_limit(pool_and_outcomes):
+    scheduler, pool, outcomes = pool_and_outcomes
+    for seq in range(3):
+        scheduler.submit(WATCH, f"w{seq}", seq)
+    assert scheduler.running(WATCH) == 1
+    assert scheduler.waiting(WATCH) == 2
+
+    # Each kind has its own limit, so a capture is not held up behind watch jobs
+    scheduler.submit(CAPTURE, "c", "capture")
+    assert scheduler.running(CAPTURE) == 1
+
+    # Pool ids follow dispatch order: w0, c, then w1 and w2 as watch slots free up
+    for pool_id in (1, 2, 3, 4):
+        pool.finish(pool_id)
+    assert pool.submitted == ["w0", "c", "w1", "w2"]
+    assert [ctx for _, _, ctx in outcomes["result"]] == [0, "capture", 1, 2]
+    assert outcomes["cancelled"] == []
+
+
+def test_raising_a_limit_dispatches_waiting_jobs(pool_and_outcomes):
+    scheduler, pool, _ = pool_and_outcomes
+    for seq in range(3):
+        scheduler.submit(WATCH, f"w{seq}", seq)
+    scheduler.set_limits({WATCH: 3})
+    assert pool.submitted == ["w0", "w1", "w2"]
+    assert scheduler.waiting() == 0
+
+
+def test_pool_failures_are_reported(pool_and_outcomes):
+    scheduler, pool, outcomes = pool_and_outcomes
+    job = scheduler.submit(WATCH, "w", "ctx")
+    pool.fail(1, "worker died")
+    assert outcomes["failed"] == [(job, "worker died", "ctx")]
+    assert scheduler.running() == 0
+
+
+def test_submit_errors_fail_the_job_and_keep_going():
+    failed = []
+
+    def submit(img):
+        if img == "bad":
+            raise RuntimeError("queue closed")
+        return 1
+
+    scheduler = JobScheduler(submit, on_failed=lambda job_id, reason, ctx: failed.append((ctx, reason)))
+    scheduler.submit(WATCH, "bad", "first")
+    scheduler.submit(WATCH, "good", "second")
+    assert failed == [("first", "queue closed")]
+    assert scheduler.running(WATCH) == 1
+
+
+def test_failure_of_a_superseded_job_is_not_reported(pool_and_outcomes):
+    scheduler, pool, outcomes = pool_and_outcomes
+    scheduler.submit(CAPTURE, "c1", "ctx1")
+    scheduler.submit(CAPTURE, "c2", "ctx2")
+    pool.fail(1, "cancelled")
+    assert outcomes["failed"] == []
+    assert pool.submitted == ["c1", "c2"]
+
+
+def test_submit_errors_are_reported_outside_the_lock():
+    unlocked = []
+
+    def submit(img):
+        if img == "bad":
+            raise RuntimeError("queue closed")
+        return 1
+
+    def on_failed(job_id, reason, ctx):
+        # Another thread can take the lock while the callback runs
+        probe = threading.Thread(target=scheduler.stats)
+        probe.start()
+        probe.join(timeout=1)
+        unlocked.append(not probe.is_alive())
+
+    scheduler = JobScheduler(submit, on_failed=on_failed)
+    scheduler.submit(WATCH, "good")
+    scheduler.submit(WATCH, "bad")
+    assert unlocked == []
+    # The next job is handed to the pool when the running one finishes
+    scheduler.job_done(1, {})
+    scheduler.submit(WATCH, "bad")
+    assert unlocked == [True, True]
@@ -0,0 +1,187 @@
+import threading
+import time
+import wave
+
+import pytest
+
+from tts import TTSWorker, IDLE, SPEAKING, split_chunks
+
+TIMEOUT = 5
+
+
+class StubEngine:
+    # Plays the pyttsx3 side in direct mode: an utterance starts on iterate() and runs until finish()
+    def __init__(self, driver=None):
+        self.callbacks = {}
+        self.queued = []
+        self.current = None
+        self.spoken = []
+        self.stopped = []
+        self.saved = {}
+        self._finish = threading.Event()
+
+    def getProperty(self, name):
+        return {"voices": [], "rate": 200}[name]
+
+    def setProperty(self, name, value):
+        pass
+
+    def connect(self, topic, callback):
+        self.callbacks[topic] = callback
+
+    def startLoop(self, use_driver_loop=True):
+        pass
+
+    def endLoop(self):
+        pass
+
+    def isBusy(self):
+        return self.current is not None or bool(self.queued)
+
+    def say(self, text):
+        self.queued.append(text)
+
+    def stop(self):
+        self.queued.clear()
+        if self.current is not None:
+            self.stopped.append(self.current)
+            self.current = None
+            self.callbacks["finished-utterance"](None, False)
+
+    def finish(self):
+        self._finish.set()
+
+    def iterate(self):
+        if self.current is not None and self._finish.is_set():
+            self._finish.clear()
+            self.current = None
+            self.callbacks["finished-utterance"](None, True)
+        if self.current is None and self.queued:
+            self.current = self.queued.pop(0)
+            self.spoken.append(self.current)
+            self.callbacks["started-utterance"](None)
+
+    # Streaming mode
+    def save_to_file(self, text, path):
+        self.saved[path] = text
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(b"\0\0" * 8)
+
+    def runAndWait(self):
+        pass
+
+
+class StubPlayer:
+    def __init__(self):
+        self.played = []
+
+    def play(self, path, stop_event):
+        self.played.append(path)
+
+
+def wait_for(predicate):
+    deadline = time.monotonic() + TIMEOUT
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def make_worker():
+    workers = []
+
+    def make(player_factory=lambda: None, gate=None):
+        engines = []
+
+        def factory(driver):
+            if gate is not None:
+                gate.wait(TIMEOUT)
+            engines.append(StubEngine(driver))
+            return engines[0]
+
+        worker = TTSWorker(engine_factory=factory, player_factory=player_factory)
+        worker.states = []
+        worker.subscribe(worker.states.append)
+        worker.engine = lambda: engines[0]
+        workers.append(worker)
+        return worker
+
+    yield make
+    for worker in workers:
+        worker.shutdown()
+
+
+def test_requests_are_spoken_in_order(make_worker):
+    worker = make_worker()
+    worker.wait_ready()
+    engine = worker.engine()
+
+    for text in ["first", "second"]:
+        worker.speak(text)
+        wait_for(lambda: engine.spoken[-1:] == [text] and worker.state == SPEAKING)
+        engine.finish()
+        wait_for(lambda: worker.state == IDLE)
+
+    assert engine.spoken == ["first", "second"]
+    assert engine.stopped == []
+    assert worker.states == [SPEAKING, IDLE, SPEAKING, IDLE]
+
+
+def test_newer_request_cancels_the_current_utterance(make_worker):
+    worker = make_worker()
+    worker.wait_ready()
+    engine = worker.engine()
+
+    worker.speak("old")
+    wait_for(lambda: worker.state == SPEAKING)
+    worker.speak("new")
+    wait_for(lambda: engine.spoken == ["old", "new"] and worker.state == SPEAKING)
+
+    assert engine.stopped == ["old"]
+    assert worker.states == [SPEAKING, IDLE, SPEAKING]
+
+
+def test_requests_queued_before_the_engine_starts_collapse_to_the_newest(make_worker):
+    gate = threading.Event()
+    worker = make_worker(gate=gate)
+    for text in ["one", "two", "three"]:
+        worker.speak(text)
+    gate.set()
+    worker.wait_ready()
+    engine = worker.engine()
+
+    wait_for(lambda: worker.state == SPEAKING)
+    engine.finish()
+    wait_for(lambda: worker.state == IDLE)
+    assert engine.spoken == ["three"]
+
+
+def test_stop_speaking_goes_idle(make_worker):
+    worker = make_worker()
+    worker.wait_ready()
+    engine = worker.engine()
+
+    worker.speak("text")
+    wait_for(lambda: worker.state == SPEAKING)
+    worker.stop_speaking()
+    wait_for(lambda: worker.state == IDLE)
+
+    assert engine.stopped == ["text"]
+    assert worker.states == [SPEAKING, IDLE]
+
+
+def test_streaming_plays_chunks_in_order(make_worker):
+    player = StubPlayer()
+    worker = make_worker(player_factory=lambda: player)
+    worker.wait_ready()
+    engine = worker.engine()
+    text = "The first sentence is here. Then a second one follows. And the third ends it."
+
+    worker.speak(text)
+    wait_for(lambda: len(player.played) == 3 and worker.state == IDLE)
+
+    assert [engine.saved[path] for path in player.played] == split_chunks(text)
+    assert worker.states == [SPEAKING, IDLE]
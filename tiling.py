@@ -0,0 +1,102 @@
+import re
+
+# Fragments of one line seen by two tiles must share at least this much of their height
+SAME_ROW_OVERLAP = 0.6
+DUPLICATE_AREA_OVERLAP = 0.5
+
+_CJK_CHAR = re.compile(r"[぀-ヿ㐀-鿿가-힯＀-￯]")
+
+
+def _starts(length, tile, overlap):
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def plan_tiles(width, height, tile_size, overlap):
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in _starts(height, tile_size, overlap)
+        for x in _starts(width, tile_size, overlap)
+    ]
+
+
+def _vertical_overlap(a, b):
+    top, bottom = max(a[1], b[1]), min(a[3], b[3])
+    return max(0, bottom - top) / max(1, min(a[3] - a[1], b[3] - b[1]))
+
+
+def _horizontal_gap(a, b):
+    return max(a[0], b[0]) - min(a[2], b[2])
+
+
+def _area(box):
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+
+def _intersection(a, b):
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    return max(0, w) * max(0, h)
+
+
+def join_fragments(left, right):
+    if right in left:
+        return left
+    if left in right:
+        return right
+    # Longest suffix of the left fragment that is also a prefix of the right one
+    for k in range(min(len(left), len(right)), 0, -1):
+        if left.endswith(right[:k]):
+            return left + right[k:]
+    joiner = "" if _CJK_CHAR.match(left[-1:]) and _CJK_CHAR.match(right[:1]) else " "
+    return left + joiner + right
+
+
+def merge_tile_lines(lines):
+    # lines: dicts with text, score, box (x0, y0, x1, y1 in full-image coordinates) and tile index
+    merged = []
+    for line in sorted(lines, key=lambda l: (l["box"][0], l["box"][1])):
+        for existing in merged:
+            if line["tile"] in existing["tiles"]:
+                continue
+            a, b = existing["box"], line["box"]
+            duplicate = _intersection(a, b) / max(1, min(_area(a), _area(b))) > DUPLICATE_AREA_OVERLAP
+            fragment = _vertical_overlap(a, b) >= SAME_ROW_OVERLAP and _horizontal_gap(a, b) < 0
+            if not (duplicate or fragment):
+                continue
+
+            if duplicate and (line["text"] in existing["text"] or existing["text"] in line["text"]):
+                if len(line["text"]) > len(existing["text"]):
+                    existing["text"] = line["text"]
+            else:
+                first, second = (existing, line) if a[0] <= b[0] else (line, existing)
+                existing["text"] = join_fragments(first["text"], second["text"])
+            existing["box"] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+            existing["score"] = min(existing["score"], line["score"])
+            existing["tiles"].add(line["tile"])
+            break
+        else:
+            merged.append({**line, "tiles": {line["tile"]}})
+    return reading_order(merged)
+
+
+def reading_order(lines):
+    rows = []
+    for line in sorted(lines, key=lambda l: (l["box"][1] + l["box"][3]) / 2):
+        for row in rows:
+            if _vertical_overlap(row["box"], line["box"]) >= 0.5:
+                row["lines"].append(line)
+                box = row["box"]
+                row["box"] = [box[0], min(box[1], line["box"][1]), box[2], max(box[3], line["box"][3])]
+                break
+        else:
+            rows.append({"box": list(line["box"]), "lines": [line]})
+
+    ordered = []
+    for row in rows:
+        ordered.extend(sorted(row["lines"], key=lambda l: l["box"][0]))
+    return ordered
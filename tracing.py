@@ -0,0 +1,153 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+HISTOGRAM_WINDOW = 1000
+
+
+class RollingHistogram:
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.values = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+
+    def summary(self):
+        data = np.fromiter(self.values, dtype=np.float64)
+        p50, p95, p99 = np.percentile(data, [50, 95, 99])
+        return {
+            "count": self.count,
+            "p50": round(float(p50), 2),
+            "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2),
+            "max": round(float(data.max()), 2),
+        }
+
+
+class Metrics:
+    """Rolling latency histograms (last HISTOGRAM_WINDOW samples) per metric name."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, ms):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = RollingHistogram()
+            histogram.add(ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self._histograms.items()) if h.values}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+class TraceWriter:
+    # Appends one JSON object per finished trace; the path comes from the trace_path setting
+    def __init__(self):
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def configure(self, path):
+        with self._lock:
+            if path == self.path:
+                return
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path = path or None
+
+    def write(self, record):
+        with self._lock:
+            if self.path is None:
+                return
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.configure(None)
+
+
+class Trace:
+    """Stage timings for one capture as it moves through grab → crop → OCR → outputs.
+
+    Stage names are recorded as "<kind>.<stage>" histograms; "<kind>.end_to_end" covers the
+    time from the last restart() (e.g. the mouse release) to finish().
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, metrics, writer):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.metrics = metrics
+        self.writer = writer
+        self.created = time.time()
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.attrs = {}
+        self.finished = False
+
+    def restart(self):
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name, ms):
+        self.stages[name] = round(self.stages.get(name, 0.0) + ms, 2)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self.stages["end_to_end"] = round((time.perf_counter() - self.started) * 1000, 2)
+        for name, ms in self.stages.items():
+            self.metrics.observe(f"{self.kind}.{name}", ms)
+        self.writer.write({
+            "trace": self.id,
+            "kind": self.kind,
+            "ts": round(self.created, 3),
+            "stages_ms": self.stages,
+            **self.attrs,
+        })
+
+
+metrics = Metrics()
+trace_writer = TraceWriter()
+
+
+def start_trace(kind):
+    return Trace(kind, metrics, trace_writer)
+
+
+def format_metrics(snapshot):
+    if not snapshot:
+        return "No samples yet."
+    width = max(len(name) for name in snapshot)
+    lines = [f"{'stage':<{width}} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)"]
+    for name, s in snapshot.items():
+        lines.append(f"{name:<{width}} {s['count']:>7} {s['p50']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f} {s['max']:>9.1f}")
+    return "\n".join(lines)
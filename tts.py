@@ -1,11 +1,24 @@
-import pyttsx3
+import os
+import queue
+import re
+import sys
 import threading
+import time
+import wave
+from logs import get_logger
+from startup import startup_timer
+from utils import settings
+from tts_cache import AudioCache
+from tracing import metrics
 
-# Initialize shared TTS engine and synchronization primitives
-tts_engine = pyttsx3.init()
-tts_lock = threading.Lock()
-tts_stop_event = threading.Event()
-current_tts_thread = None
+log = get_logger("TTS")
+
+IDLE = "idle"
+SPEAKING = "speaking"
+
+# How often the worker pumps the engine's event loop while an utterance is playing
+ITERATE_INTERVAL = 0.05
+READY_TIMEOUT = 30
 
 # Voice name or ID hints for language-based matching
 VOICE_HINTS = {
@@ -16,39 +29,342 @@ VOICE_HINTS = {
     'ko': ['Heami', 'Korean']
 }
 
+_STOP = "stop"
+_SHUTDOWN = "shutdown"
 
-def find_voice_for_lang(engine, lang_code: str):
-    hints = VOICE_HINTS.get(lang_code, [])
-    for voice in engine.getProperty('voices'):
-        if any(h.lower() in voice.name.lower() or h.lower() in voice.id.lower() for h in hints):
-            return voice.id
-    return None
+# Sentence ends (CJK and Latin), then clause breaks for sentences that are still too long
+_SENTENCE_BREAK = re.compile(r"(?<=[。！？!?…；;])|(?<=\.)(?=\s)|\n+")
+_CLAUSE_BREAK = re.compile(r"(?<=[，、,：:])")
+CHUNK_MAX_CHARS = 200
+CHUNK_MIN_CHARS = 4
 
 
-def speak_text(text, lang_code='en'):
-    global current_tts_thread, tts_stop_event, tts_engine
+def split_chunks(text, max_chars=CHUNK_MAX_CHARS):
+    chunks = []
+    for sentence in _SENTENCE_BREAK.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        # Stray fragments like "Ok?" or "はい" ride along with the previous chunk
+        if chunks and len(sentence) < CHUNK_MIN_CHARS:
+            chunks[-1] += " " + sentence
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+            continue
+
+        # Overlong sentences are packed clause by clause, hard-split only as a last resort
+        part = ""
+        for clause in _CLAUSE_BREAK.split(sentence):
+            if part and len(part) + len(clause) > max_chars:
+                chunks.append(part.strip())
+                part = ""
+            part += clause
+            while len(part) > max_chars:
+                chunks.append(part[:max_chars].strip())
+                part = part[max_chars:]
+        if part.strip():
+            chunks.append(part.strip())
+    return chunks
+
+
+def wav_duration(path):
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / max(1, f.getframerate())
+
+
+class WinsoundPlayer:
+    def play(self, path, stop_event):
+        import winsound
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+        if stop_event.wait(wav_duration(path)):
+            winsound.PlaySound(None, 0)
+
+
+class SimpleaudioPlayer:
+    def __init__(self):
+        import simpleaudio
+        self.simpleaudio = simpleaudio
+
+    def play(self, path, stop_event):
+        playback = self.simpleaudio.WaveObject.from_wave_file(path).play()
+        while playback.is_playing():
+            if stop_event.wait(ITERATE_INTERVAL):
+                playback.stop()
+                break
+
+
+def load_player():
+    # Streaming needs a way to play WAV files; without one the engine speaks directly
+    if sys.platform == "win32":
+        return WinsoundPlayer()
+    try:
+        return SimpleaudioPlayer()
+    except ImportError:
+        return None
+
+
+def build_voice_map(engine):
+    # One pass over the installed voices instead of one per utterance
+    voices = list(engine.getProperty('voices'))
+    mapping = {}
+    for lang_code, hints in VOICE_HINTS.items():
+        for voice in voices:
+            if any(h.lower() in voice.name.lower() or h.lower() in voice.id.lower() for h in hints):
+                mapping[lang_code] = voice.id
+                break
+    return mapping
+
+
+def create_engine(driver=None):
+    with startup_timer.measure("pyttsx3"):
+        import pyttsx3
+    with startup_timer.measure("pyttsx3.init()", kind="init"):
+        return pyttsx3.init(driverName=driver or None)
+
+
+class TTSWorker:
+    """Owns one pyttsx3 engine on a dedicated thread and speaks queued requests.
+
+    pyttsx3 engines (SAPI5 in particular) must be driven from the thread that created them,
+    so the engine is built and used only inside the worker. A new request interrupts the
+    current utterance; requests that pile up while the worker is busy collapse to the newest.
+
+    With an audio player available, text is split into sentences that are synthesised to WAV
+    one by one and played on a second thread, so the first sentence plays while the rest are
+    still being synthesised. The WAV files stay in an AudioCache for replays.
+    """
+
+    def __init__(self, driver=None, engine_factory=create_engine, player_factory=load_player,
+                 rate=0, cache_max_bytes=32 * 1024 * 1024):
+        self.driver = driver
+        self.engine_factory = engine_factory
+        self.player_factory = player_factory
+        self.rate = rate
+        self.cache = AudioCache(cache_max_bytes)
+        self.player = None
+        self.state = IDLE
+        self.error = None
+        self.voices = {}
+        self._missing_voices = set()
+        # perf_counter() of the request whose first audio has not started yet
+        self._awaiting_audio = None
+        self._requests = queue.Queue()
+        self._ready = threading.Event()
+        self._listeners = []
+        self._thread = None
+        self._lock = threading.Lock()
+        self._playback = queue.Queue()
+        self._playback_stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+                self._thread.start()
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("TTS engine did not start in time")
+        if self.error is not None:
+            raise self.error
+
+    def subscribe(self, callback):
+        # callback(state) runs on the TTS thread
+        self._listeners.append(callback)
 
-    def tts_worker():
-        engine = pyttsx3.init()  # Reinitialize each time
-        voice_id = find_voice_for_lang(engine, lang_code)
-        if voice_id:
+    def speak(self, text, lang_code='en'):
+        self.start()
+        self._requests.put((text, lang_code, time.perf_counter()))
+
+    def stop_speaking(self):
+        self._requests.put(_STOP)
+
+    def shutdown(self):
+        if self._thread is not None:
+            self._requests.put(_SHUTDOWN)
+            self._thread.join(timeout=2)
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if state == SPEAKING and self._awaiting_audio is not None:
+            metrics.observe("tts.first_audio", (time.perf_counter() - self._awaiting_audio) * 1000)
+            self._awaiting_audio = None
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                log.warning("State listener failed", error=str(e))
+
+    def _next_request(self, engine=None):
+        # Block while idle; while speaking, wake up regularly to keep the engine loop running
+        try:
+            request = self._requests.get(timeout=ITERATE_INTERVAL if engine and engine.isBusy() else None)
+        except queue.Empty:
+            return None
+        # Only the newest request matters, except that shutdown always wins
+        while request != _SHUTDOWN:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+        return request
+
+    def _select_voice(self, engine, lang_code, current_voice):
+        voice_id = self.voices.get(lang_code)
+        if voice_id is None:
+            if lang_code not in self._missing_voices:
+                self._missing_voices.add(lang_code)
+                log.info("No matching voice, using default", lang=lang_code)
+        elif voice_id != current_voice:
             engine.setProperty('voice', voice_id)
-            print(f"[TTS] Using voice: {voice_id}")
+            log.info("Using voice", voice=voice_id)
+            return voice_id
+        return current_voice
+
+    def _run(self):
+        try:
+            engine = self.engine_factory(self.driver)
+            self.voices = build_voice_map(engine)
+            if self.rate:
+                engine.setProperty('rate', self.rate)
+            self.rate = engine.getProperty('rate')
+            self.player = self.player_factory()
+            if self.player is None:
+                engine.connect('started-utterance', lambda name: self._set_state(SPEAKING))
+                engine.connect('finished-utterance', lambda name, completed: self._set_state(IDLE))
+                engine.startLoop(False)
+        except Exception as e:
+            log.error("Failed to start the TTS engine", error=str(e))
+            self.error = e
+            self._ready.set()
+            return
+
+        mode = "streaming" if self.player else "direct"
+        log.info("Engine ready", mode=mode, voices=self.voices or "default only")
+        self._ready.set()
+        if self.player:
+            self._run_streaming(engine)
         else:
-            print(f"[TTS] No matching voice for {lang_code}, using default.")
+            self._run_direct(engine)
+        self._set_state(IDLE)
+        self.cache.clear()
+
+    def _run_direct(self, engine):
+        current_voice = None
+        while True:
+            request = self._next_request(engine)
+            engine.iterate()
+            if request is None:
+                continue
+            if request == _SHUTDOWN:
+                break
+
+            # Cancels the utterance in progress and anything still queued in the engine
+            engine.stop()
+            if request == _STOP:
+                self._set_state(IDLE)
+                continue
+
+            text, lang_code, requested = request
+            self._awaiting_audio = requested
+            current_voice = self._select_voice(engine, lang_code, current_voice)
+            engine.say(text)
+            engine.iterate()
+
+        engine.endLoop()
 
-        engine.say(text)
+    def _run_streaming(self, engine):
+        player = threading.Thread(target=self._play_loop, name="tts-playback", daemon=True)
+        player.start()
+        current_voice = None
+        request = None
+        while True:
+            if request is None:
+                request = self._next_request()
+            # Interrupt whatever is playing; stale chunks from the old request are skipped
+            self._playback_stop.set()
+            self._playback_stop = threading.Event()
+            if request == _SHUTDOWN:
+                self._playback.put(None)
+                break
+            if request == _STOP:
+                self._playback.put((None, self._playback_stop))
+                request = None
+                continue
+
+            text, lang_code, requested = request
+            self._awaiting_audio = requested
+            request = None
+            current_voice = self._select_voice(engine, lang_code, current_voice)
+            stop = self._playback_stop
+            for chunk in split_chunks(text):
+                if not self._requests.empty():
+                    # A newer request arrived mid-synthesis; pick it up without finishing this one
+                    request = self._next_request()
+                    break
+                path = self._synthesise(engine, chunk, current_voice)
+                if path is not None:
+                    self._playback.put((path, stop))
+            else:
+                # End-of-request marker: playback goes idle once it gets here
+                self._playback.put((None, stop))
+        player.join(timeout=2)
+
+    def _synthesise(self, engine, chunk, voice_id):
+        key = (chunk, voice_id, self.rate)
+        path = self.cache.get(key)
+        if path is not None:
+            return path
+        path = self.cache.path_for(key)
         try:
+            engine.save_to_file(chunk, path)
             engine.runAndWait()
-        except RuntimeError:
-            print("[TTS] Stopped before completion.")
-        engine.stop()
-
-    # Stop any previous playback
-    if current_tts_thread and current_tts_thread.is_alive():
-        tts_stop_event.set()
-        current_tts_thread.join()
-
-    tts_stop_event.clear()
-    current_tts_thread = threading.Thread(target=tts_worker, daemon=True)
-    current_tts_thread.start()
+        except Exception as e:
+            log.warning("Synthesis failed", error=str(e))
+            return None
+        if not os.path.exists(path):
+            return None
+        self.cache.put(key, path)
+        return path
+
+    def _play_loop(self):
+        while True:
+            item = self._playback.get()
+            if item is None:
+                break
+            path, stop = item
+            if path is None or stop.is_set():
+                if self._playback.empty():
+                    self._set_state(IDLE)
+                continue
+            self._set_state(SPEAKING)
+            try:
+                self.player.play(path, stop)
+            except Exception as e:
+                log.warning("Playback failed", error=str(e))
+
+
+tts_worker = TTSWorker(
+    settings.get("tts_driver") or None,
+    rate=settings.get("tts_rate", 0),
+    cache_max_bytes=settings.get("tts_cache_max_mb", 32) * 1024 * 1024
+)
+
+
+def load_tts():
+    # Called by the startup loader; blocks that thread until the engine is up
+    tts_worker.wait_ready()
+    return tts_worker
+
+
+def speak_text(text, lang_code='en'):
+    # Returns immediately; playback happens on the TTS thread
+    tts_worker.speak(text, lang_code)
+
+
+def stop_speech():
+    tts_worker.stop_speaking()
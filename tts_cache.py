@@ -0,0 +1,87 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class AudioCache:
+    """Synthesised WAV files keyed by (text chunk, voice, rate), evicted LRU by total file size.
+
+    Without a directory, a temporary one is created on the first path_for() call and removed on
+    clear() or at interpreter exit, so importing tts never leaves one behind.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._owns_directory = directory is None
+        self._cleanup = None
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ensure_directory(self):
+        with self._lock:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix="multilangocr-tts-")
+                self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+            else:
+                os.makedirs(self.directory, exist_ok=True)
+            return self.directory
+
+    def path_for(self, key):
+        directory = self._ensure_directory()
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(directory, f"{digest}.wav")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not os.path.exists(entry[0]):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, path):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = (path, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (evicted, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            if self._owns_directory and self._cleanup is not None:
+                self._cleanup()
+                self._cleanup = None
+                self.directory = None
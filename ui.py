@@ -1,7 +1,12 @@
-from PyQt6.QtWidgets import QLabel, QWidget, QVBoxLayout, QApplication
+from PyQt6.QtWidgets import QLabel, QWidget, QVBoxLayout, QApplication, QPlainTextEdit
 from PyQt6.QtCore import Qt, QTimer, QPoint
 from PyQt6.QtGui import QFont, QColor, QPalette
 
+from logs import get_logger
+from tracing import metrics, format_metrics
+
+log = get_logger("Overlay")
+
 class FlashOverlay(QWidget):
     def __init__(self):
         super().__init__()
@@ -49,7 +54,7 @@ class FlashOverlay(QWidget):
                 y = geometry.height() - self.height() - 40
                 self.move(QPoint(x, y))
         else:
-            print("[Overlay] QApplication not initialized.")
+            log.warning("QApplication not initialized")
 
     def showEvent(self, event):
         self.move_to_bottom_center()
@@ -61,3 +66,39 @@ class FlashOverlay(QWidget):
         self.show()
         self.raise_()
         self.timer.start(4000)
+
+
+class MetricsWindow(QWidget):
+    # Rolling p50/p95/p99 per pipeline stage, refreshed while the window is open.
+    # `memory_report` returns extra text (process and component memory) shown below the table
+    def __init__(self, memory_report=None):
+        super().__init__()
+        self.memory_report = memory_report
+        self.setWindowTitle("MultiLangOCR - Latency Stats")
+        self.setMinimumSize(640, 360)
+
+        self.text = QPlainTextEdit(self)
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 10))
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.text)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        text = format_metrics(metrics.snapshot())
+        if self.memory_report is not None:
+            text += "\n\n" + self.memory_report()
+        self.text.setPlainText(text)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(1000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
@@ -1,24 +1,183 @@
 import json
 import os
+import threading
+import time
+
+from logs import get_logger
+
+log = get_logger("UTIL")
 
 DEFAULT_SETTINGS = {
     "auto_copy": True,
     "auto_tts": False,
     "auto_start": False,
-    "prefer_ja_over_zh": False
+    "prefer_ja_over_zh": False,
+    "ocr_hotkey": "alt+q",
+    "tts_hotkey": "alt+w",
+    "tts_driver": "",
+    "tts_rate": 0,
+    "tts_cache_max_mb": 32,
+    "watch_hotkey": "alt+e",
+    "hotkey_debounce_ms": 300,
+    "selector_preview_scale": 0.5,
+    "watch_interval_ms": 500,
+    "watch_max_interval_ms": 4000,
+    "watch_change_ratio": 0.01,
+    "ocr_workers": 1,
+    "job_limits": {"capture": 1, "watch": 1},
+    "ocr_idle_unload_s": 600,
+    "memory_limit_mb": 0,
+    "ocr_server_url": "",
+    "ocr_server_host": "127.0.0.1",
+    "ocr_server_port": 8765,
+    "ocr_server_max_batch": 8,
+    "ocr_server_batch_window_ms": 10,
+    "ocr_server_queue_size": 32,
+    "ocr_backend": "paddle",
+    "ocr_profile": "auto",
+    "latency_target_ms": 800,
+    "custom_profile": {},
+    "onnx_profiles": {},
+    "onnx_det_model": "",
+    "onnx_rec_model": "",
+    "onnx_rec_dict": "",
+    "onnx_int8": False,
+    "onnx_threads": 0,
+    "normalize_input": True,
+    "tile_threshold": 2560,
+    "tile_size": 1280,
+    "tile_overlap": 192,
+    "cascade_threshold": 0.8,
+    "cascade_profile": "accurate",
+    "cascade_upscale": 1.5,
+    "shape_buckets": [320, 640, 960, 1280, 1920, 2560],
+    "ocr_warmup": True,
+    "warmup_shapes": [[64, 640], [320, 640], [640, 1280]],
+    "ocr_cache_mode": "exact",
+    "ocr_cache_max_mb": 64,
+    "ocr_cache_path": "",
+    "history_path": "history.db",
+    "output_file_path": "",
+    "output_socket_port": 0,
+    "log_level": "INFO",
+    "log_json_path": "",
+    "trace_path": ""
 }
 
-def load_app_settings(config_path="config.json"):
-    if not os.path.exists(config_path):
-        return DEFAULT_SETTINGS.copy()
-
-    try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return {
-                key: data.get(key, default)
-                for key, default in DEFAULT_SETTINGS.items()
-            }
-    except Exception as e:
-        print(f"[UTIL] Failed to load config from {config_path}: {e}")
-        return DEFAULT_SETTINGS.copy()
+class SettingsStore:
+    def __init__(self, config_path="config.json"):
+        self.config_path = config_path
+        self._file_data = {}
+        # In-process values layered over config.json and never written back (CLI flags, benchmarks)
+        self._overrides = {}
+        self._data = DEFAULT_SETTINGS.copy()
+        self._mtime = None
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self._watcher = None
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self, force=False):
+        mtime = self._current_mtime()
+        with self._lock:
+            if self._loaded and not force and mtime == self._mtime:
+                return False
+
+            file_data = {}
+            if mtime is not None:
+                try:
+                    with open(self.config_path, "r", encoding="utf-8") as f:
+                        file_data = json.load(f)
+                except Exception as e:
+                    log.warning("Failed to load config", path=self.config_path, error=str(e))
+                    return False
+
+            first_load = not self._loaded
+            old = self._data
+            self._file_data = file_data
+            self._data = {**DEFAULT_SETTINGS, **file_data, **self._overrides}
+            self._mtime = mtime
+            self._loaded = True
+            changed = {k for k in set(old) | set(self._data) if old.get(k) != self._data.get(k)}
+
+        if changed and not first_load:
+            self._notify(changed)
+        return bool(changed)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.reload()
+
+    def get(self, key, default=None):
+        self._ensure_loaded()
+        return self._data.get(key, default)
+
+    def all(self):
+        self._ensure_loaded()
+        return dict(self._data)
+
+    def update(self, values):
+        self._ensure_loaded()
+        with self._lock:
+            file_data = {**self._file_data, **values}
+            # Write to a temp file and swap it in so readers never see a half-written config
+            tmp_path = f"{self.config_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(file_data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.config_path)
+
+            old = self._data
+            self._file_data = file_data
+            self._data = {**DEFAULT_SETTINGS, **file_data, **self._overrides}
+            self._mtime = self._current_mtime()
+            changed = {k for k in values if old.get(k) != self._data.get(k)}
+
+        if changed:
+            self._notify(changed)
+
+    def override(self, values):
+        self._ensure_loaded()
+        with self._lock:
+            old = self._data
+            self._overrides.update(values)
+            self._data = {**DEFAULT_SETTINGS, **self._file_data, **self._overrides}
+            changed = {k for k in values if old.get(k) != self._data.get(k)}
+
+        if changed:
+            self._notify(changed)
+
+    def subscribe(self, callback):
+        # callback(changed_keys, settings) runs on the thread that noticed the change
+        self._subscribers.append(callback)
+
+    def _notify(self, changed):
+        snapshot = self.all()
+        for callback in list(self._subscribers):
+            try:
+                callback(changed, snapshot)
+            except Exception:
+                log.exception("Settings subscriber failed")
+
+    def start_watching(self, interval=1.0):
+        if self._watcher is not None:
+            return
+        self._ensure_loaded()
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="settings-watcher", daemon=True)
+        self._watcher.start()
+
+settings = SettingsStore()
+
+def load_app_settings():
+    return settings.all()
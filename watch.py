@@ -0,0 +1,135 @@
+import threading
+
+import numpy as np
+
+from capture import grab_screen, crop_to_bgr
+from logs import get_logger
+from tracing import start_trace
+
+log = get_logger("WATCH")
+
+# Frames are compared on a small greyscale thumbnail; a cell counts as changed above this delta
+SIGNATURE_SIZE = (64, 32)
+PIXEL_DELTA = 12
+BACKOFF_FACTOR = 2.0
+RECOVERY_FACTOR = 0.75
+
+
+def frame_signature(frame):
+    import cv2
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def frames_differ(a, b, change_ratio):
+    changed = np.count_nonzero(np.abs(a - b) > PIXEL_DELTA)
+    return changed > change_ratio * a.size
+
+
+class RegionWatcher:
+    """Samples a fixed screen region and hands changed frames to `submit(img_bgr, trace) -> job_id`.
+
+    Only one job is in flight at a time. While OCR is still busy the sampling interval backs
+    off (up to max_interval_ms) and recovers once results come back in time.
+    """
+
+    def __init__(self, submit, interval_ms=500, max_interval_ms=4000, change_ratio=0.01):
+        self.submit = submit
+        self.interval_ms = interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.change_ratio = change_ratio
+        self.bbox = None
+        self._current_interval = interval_ms
+        self._inflight = None
+        self._last_signature = None
+        self._last_text = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, bbox):
+        # bbox: (left, top, right, bottom) in screen pixels
+        self.stop()
+        self.bbox = tuple(int(v) for v in bbox)
+        self._current_interval = self.interval_ms
+        self._inflight = None
+        self._last_signature = None
+        self._last_text = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="region-watch", daemon=True)
+        self._thread.start()
+        log.info("Watching region", bbox=self.bbox, interval_ms=self.interval_ms)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        log.info("Stopped")
+
+    def owns(self, job_id):
+        with self._lock:
+            return job_id == self._inflight
+
+    def finish(self, job_id, result=None):
+        # Returns the result if its text is new, None for failures and repeats of the last text
+        with self._lock:
+            if job_id != self._inflight:
+                return None
+            self._inflight = None
+            if result is None:
+                return None
+            text = result["text"].strip()
+            if text == self._last_text:
+                return None
+            # An empty read (e.g. a gap between subtitles) lets the same line be announced again
+            self._last_text = text
+        return result if text else None
+
+    def _run(self):
+        while not self._stop.wait(self._current_interval / 1000):
+            try:
+                self._sample()
+            except Exception as e:
+                log.warning("Sampling failed", error=str(e))
+                self._back_off()
+
+    def _sample(self):
+        trace = start_trace("watch")
+        with trace.stage("grab"):
+            frame = grab_screen(self.bbox)
+        with trace.stage("signature"):
+            signature = frame_signature(frame)
+        if self._last_signature is not None and \
+                not frames_differ(signature, self._last_signature, self.change_ratio):
+            self._recover()
+            return
+
+        with self._lock:
+            busy = self._inflight is not None
+        if busy:
+            # Leave the signature alone so this change is picked up once OCR catches up
+            self._back_off()
+            return
+
+        self._last_signature = signature
+        with trace.stage("crop"):
+            img_bgr = crop_to_bgr(frame, 0, 0, frame.shape[1], frame.shape[0])
+        # Held across submit so a fast result cannot arrive before the job is marked in flight
+        with self._lock:
+            self._inflight = self.submit(img_bgr, trace)
+        self._recover()
+
+    def _back_off(self):
+        previous = self._current_interval
+        self._current_interval = min(self.max_interval_ms, self._current_interval * BACKOFF_FACTOR)
+        if self._current_interval != previous:
+            log.info("OCR is behind, backing off", interval_ms=round(self._current_interval))
+
+    def _recover(self):
+        self._current_interval = max(self.interval_ms, self._current_interval * RECOVERY_FACTOR)